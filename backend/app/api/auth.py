@@ -1,12 +1,17 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, RefreshToken
+from app.database import get_db, get_read_db_for, mark_user_write
+from app.models import User
 from app.schemas.auth import UserRegister, UserLogin, TokenResponse, TokenRefresh, UserProfile, UserUpdate
-from app.utils.password import hash_password, verify_password
-from app.utils.jwt import create_access_token, create_refresh_token, verify_token
+from app.utils.password import PasswordHasherBusy, password_hasher
+from app.utils.jwt import create_access_token, verify_token
+from app.services.principal_cache import Principal, principal_cache
+from app.services.refresh_token_service import RefreshTokenReused, consume_refresh_token, issue_refresh_token
 from app.config import settings
 
 router = APIRouter()
@@ -16,33 +21,43 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/login", auto_error=False)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def _token_claims(user: User) -> dict:
+    """Claims shared by access and refresh tokens; ver ties them to user.token_version"""
+    return {"sub": str(user.id), "email": user.email, "ver": user.token_version}
+
+
+def _hashing_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _decode_access_token(token: Optional[str]) -> dict:
     if not token:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    # Verify the access token
+    # Verify the access token (signature and exp)
     payload = verify_token(token, token_type="access")
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: int = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
-    
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+
+def _load_active_user(db: Session, payload: dict) -> User:
+    """Load the token owner and check that the token has not been revoked"""
+    user = db.query(User).filter(User.id == payload["sub"]).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     if not user.is_active:
         raise HTTPException(
@@ -50,20 +65,90 @@ def get_current_user(
             detail="User account is inactive"
         )
     
+    # Password change / deactivation bump token_version and revoke older tokens
+    if payload.get("ver", 0) != user.token_version:
+        raise _credentials_exception()
+    
     return user
 
 
-@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
     """
-    Register a new user.
+    Dependency for endpoints that only need the caller's identity.
     
-    - **email**: User's email address (must be unique)
-    - **password**: User's password (minimum 8 characters)
-    - **name**: User's display name
+    Verified principals are cached by token id, so repeated requests with
+    the same token do not touch the users table (nor check out a connection).
+    """
+    payload = _decode_access_token(token)
     
-    Returns access and refresh tokens upon successful registration.
+    principal = principal_cache.get(payload)
+    if principal is not None:
+        return principal
+    
+    return principal_cache.put(payload, _load_active_user(db, payload))
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency to get the current authenticated user from JWT token.
+    
+    The token is validated through the principal cache; on a miss the row
+    loaded for validation is already in the session's identity map.
     """
+    user = db.get(User, principal.user_id)
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+def get_principal_read_db(principal: Principal = Depends(get_current_principal)):
+    """Read session for the caller's own data: a replica unless they have just written"""
+    yield from get_read_db_for(principal.user_id)()
+
+
+def _profile(user: User) -> UserProfile:
+    return UserProfile(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        is_active=user.is_active,
+        level=user.level,
+        xp=user.xp,
+        streak=user.streak,
+        daily_goal=user.daily_goal,
+        completed_today=user.completed_today,
+        selected_categories=user.selected_categories or [],
+        notifications=user.notifications or [],
+        scheduler=user.scheduler
+    )
+
+
+def _issue_tokens(db: Session, user: User) -> TokenResponse:
+    # Create tokens
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data=_token_claims(user),
+        expires_delta=access_token_expires
+    )
+    
+    # New login starts a new rotation family; only the token hash is stored
+    refresh_token = issue_refresh_token(db, user.id, _token_claims(user))
+    db.commit()
+    
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        token_type="bearer"
+    )
+
+
+def _create_user(db: Session, user_data: UserRegister, hashed_password: str) -> TokenResponse:
     # Check if user with this email already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
     if existing_user:
@@ -72,8 +157,6 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = hash_password(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -85,35 +168,51 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_user)
     
-    # Create tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(new_user.id), "email": new_user.email},
-        expires_delta=access_token_expires
-    )
+    return _issue_tokens(db, new_user)
+
+
+def _find_login_user(db: Session, email: str) -> Optional[User]:
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        # Release the pooled connection while bcrypt runs; the loaded row stays usable
+        db.expunge(user)
+        db.rollback()
+    return user
+
+
+def _finish_login(db: Session, user: User, new_hash: Optional[str]) -> TokenResponse:
+    # Upgrade hashes made with an older cost factor. Core UPDATE on purpose:
+    # a rehash is not a password change and must not bump token_version
+    if new_hash is not None:
+        db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
     
-    refresh_token = create_refresh_token(data={"sub": str(new_user.id), "email": new_user.email})
+    return _issue_tokens(db, user)
+
+
+@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+    """
+    Register a new user.
     
-    # Store refresh token in database
-    refresh_token_expires = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    db_refresh_token = RefreshToken(
-        user_id=new_user.id,
-        token=refresh_token,
-        expires_at=refresh_token_expires,
-        is_revoked=False
-    )
-    db.add(db_refresh_token)
-    db.commit()
+    - **email**: User's email address (must be unique)
+    - **password**: User's password (minimum 8 characters)
+    - **name**: User's display name
     
-    return TokenResponse(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
-    )
+    Returns access and refresh tokens upon successful registration.
+    """
+    # Hash before touching the session: no connection is held while bcrypt
+    # runs in the hashing pool, and the event loop only awaits its future
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _hashing_busy_exception()
+    
+    # The session is synchronous, so database work stays off the event loop
+    return await run_in_threadpool(_create_user, db, user_data, hashed_password)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """
     Login with email and password.
     
@@ -123,7 +222,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     Returns access and refresh tokens upon successful authentication.
     """
     # Find user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await run_in_threadpool(_find_login_user, db, credentials.email)
     
     if not user:
         raise HTTPException(
@@ -133,7 +232,12 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    try:
+        is_valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise _hashing_busy_exception()
+    
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -147,31 +251,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
-    # Create tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email},
-        expires_delta=access_token_expires
-    )
-    
-    refresh_token = create_refresh_token(data={"sub": str(user.id), "email": user.email})
-    
-    # Store refresh token in database
-    refresh_token_expires = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    db_refresh_token = RefreshToken(
-        user_id=user.id,
-        token=refresh_token,
-        expires_at=refresh_token_expires,
-        is_revoked=False
-    )
-    db.add(db_refresh_token)
-    db.commit()
-    
-    return TokenResponse(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
-    )
+    return await run_in_threadpool(_finish_login, db, user, new_hash)
 
 
 @router.post("/refresh", response_model=TokenResponse)
@@ -200,28 +280,20 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if refresh token exists in database and is not revoked
-    db_refresh_token = db.query(RefreshToken).filter(
-        RefreshToken.token == token_data.refresh_token,
-        RefreshToken.user_id == user_id,
-        RefreshToken.is_revoked == False
-    ).first()
-    
-    if not db_refresh_token:
+    # Consume the token (one atomic UPDATE); reuse of a rotated token revokes its family
+    try:
+        family_id = consume_refresh_token(db, token_data.refresh_token, user_id)
+    except RefreshTokenReused:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token not found or revoked",
+            detail="Refresh token reuse detected, session revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if token is expired
-    if datetime.now(timezone.utc) > db_refresh_token.expires_at:
-        # Mark token as revoked
-        db_refresh_token.is_revoked = True
-        db.commit()
+    if family_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token has expired",
+            detail="Refresh token not found, revoked or expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
@@ -233,28 +305,23 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
             detail="User not found or inactive"
         )
     
+    # Tokens issued before a password change / deactivation are revoked
+    if payload.get("ver", 0) != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     # Create new access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email},
+        data=_token_claims(user),
         expires_delta=access_token_expires
     )
     
-    # Optionally create a new refresh token (rotate refresh tokens for better security)
-    new_refresh_token = create_refresh_token(data={"sub": str(user.id), "email": user.email})
-    
-    # Revoke old refresh token
-    db_refresh_token.is_revoked = True
-    
-    # Store new refresh token
-    refresh_token_expires = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    new_db_refresh_token = RefreshToken(
-        user_id=user.id,
-        token=new_refresh_token,
-        expires_at=refresh_token_expires,
-        is_revoked=False
-    )
-    db.add(new_db_refresh_token)
+    # Rotate: the new refresh token joins the same family
+    new_refresh_token = issue_refresh_token(db, user.id, _token_claims(user), family_id=family_id)
     db.commit()
     
     return TokenResponse(
@@ -265,25 +332,21 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
 
 
 @router.get("/profile", response_model=UserProfile)
-def get_profile(current_user: User = Depends(get_current_user)):
+def get_profile(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_principal_read_db)
+):
     """
     Get current user's profile.
     
-    Requires a valid access token in the Authorization header.
+    Requires a valid access token in the Authorization header. A cached
+    principal skips the token check query; the profile row is read from a
+    replica when one is configured.
     """
-    return UserProfile(
-        id=current_user.id,
-        email=current_user.email,
-        name=current_user.name,
-        is_active=current_user.is_active,
-        level=current_user.level,
-        xp=current_user.xp,
-        streak=current_user.streak,
-        daily_goal=current_user.daily_goal,
-        completed_today=current_user.completed_today,
-        selected_categories=current_user.selected_categories or [],
-        notifications=current_user.notifications or []
-    )
+    user = db.get(User, principal.user_id)
+    if user is None:
+        raise _credentials_exception()
+    return _profile(user)
 
 
 @router.put("/profile", response_model=UserProfile)
@@ -303,23 +366,15 @@ def update_profile(
         
     if user_update.selected_categories is not None:
         current_user.selected_categories = user_update.selected_categories
+
+    if user_update.scheduler is not None:
+        current_user.scheduler = user_update.scheduler
     
+    mark_user_write(db, current_user.id)
     db.commit()
     db.refresh(current_user)
     
-    return UserProfile(
-        id=current_user.id,
-        email=current_user.email,
-        name=current_user.name,
-        is_active=current_user.is_active,
-        level=current_user.level,
-        xp=current_user.xp,
-        streak=current_user.streak,
-        daily_goal=current_user.daily_goal,
-        completed_today=current_user.completed_today,
-        selected_categories=current_user.selected_categories or [],
-        notifications=current_user.notifications or []
-    )
+    return _profile(current_user)
 
 
 
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_read_db
 from app.models import Category
 from app.schemas.category import CategoryResponse
+from app.services.catalog_cache import catalog_cache, compile_payload, payload_response
 
 router = APIRouter()
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, db: Session = Depends(get_read_db)):
     """Получить список всех категорий"""
-    categories = db.query(Category).all()
-    return categories
-
+    body = catalog_cache.get_or_load(
+        db,
+        ("categories",),
+        lambda: compile_payload(List[CategoryResponse], db.query(Category).all())
+    )
+    return payload_response(request, body)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, undefer_group
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_read_db, get_read_db_for, mark_user_write
 from app.models import Course, UserCourse, User
-from app.schemas.course import CourseResponse, CourseEnrollResponse
+from app.schemas.course import CourseResponse, CourseSummary, CourseEnrollResponse, CourseProgressResponse
 from app.schemas.lesson import LessonListItem
+from app.services.course_service import compile_courses, courses_list_statement, get_courses_progress, parse_course_fields
+from app.services.catalog_cache import catalog_cache, compile_payload, payload_response, CompiledPayload
 
 router = APIRouter()
 
@@ -13,28 +15,59 @@ router = APIRouter()
 DEFAULT_USER_ID = 1
 
 
-@router.get("/courses", response_model=List[CourseResponse])
+@router.get(
+    "/courses",
+    response_model=None,
+    responses={200: {
+        "model": List[CourseSummary],
+        "description": "Без fields — CourseSummary; с fields — course_id и перечисленные поля CourseResponse",
+    }},
+)
 def get_courses(
+    request: Request,
     category_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Поля CourseResponse через запятую или *; по умолчанию — CourseSummary"),
+    db: Session = Depends(get_read_db)
 ):
-    """Получить список курсов (с опциональной фильтрацией по категории)"""
-    query = db.query(Course)
+    """
+    Получить список курсов (с опциональной фильтрацией по категории).
+    Отдаются только поля карточки, описания — в GET /courses/{id}.
+    """
+    try:
+        selected = parse_course_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    if category_id:
-        query = query.filter(Course.category_id == category_id)
+    def load() -> CompiledPayload:
+        courses = db.scalars(courses_list_statement(selected, category_id)).all()
+        return compile_courses(selected, courses)
     
-    courses = query.all()
-    return courses
+    return payload_response(request, catalog_cache.get_or_load(db, ("courses", category_id, selected), load))
+
+
+@router.get("/courses/progress", response_model=List[CourseProgressResponse])
+def get_enrolled_courses_progress(
+    course_ids: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_read_db_for(DEFAULT_USER_ID))
+):
+    """Получить прогресс по курсам пользователя (по умолчанию — по всем, на которые он записан)"""
+    progress = get_courses_progress(db, DEFAULT_USER_ID, course_ids)
+    return [
+        CourseProgressResponse(course_id=course_id, progress=value)
+        for course_id, value in progress.items()
+    ]
 
 
 @router.get("/courses/{course_id}", response_model=CourseResponse)
-def get_course(course_id: str, db: Session = Depends(get_db)):
+def get_course(course_id: str, request: Request, db: Session = Depends(get_read_db)):
     """Получить детали курса"""
-    course = db.query(Course).filter(Course.course_id == course_id).first()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    return course
+    def load() -> CompiledPayload:
+        course = db.query(Course).options(undefer_group("details")).filter(Course.course_id == course_id).first()
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return compile_payload(CourseResponse, course)
+    
+    return payload_response(request, catalog_cache.get_or_load(db, ("course", course_id), load))
 
 
 @router.post("/courses/{course_id}/enroll", response_model=CourseEnrollResponse)
@@ -63,6 +96,7 @@ def enroll_course(course_id: str, db: Session = Depends(get_db)):
         course_id=course_id
     )
     db.add(user_course)
+    mark_user_write(db, DEFAULT_USER_ID)
     db.commit()
     
     return CourseEnrollResponse(
@@ -72,14 +106,17 @@ def enroll_course(course_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/courses/{course_id}/lessons", response_model=List[LessonListItem])
-def get_course_lessons(course_id: str, db: Session = Depends(get_db)):
+def get_course_lessons(course_id: str, request: Request, db: Session = Depends(get_read_db)):
     """Получить уроки курса"""
     from app.models import Lesson
     
-    course = db.query(Course).filter(Course.course_id == course_id).first()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
+    def load() -> CompiledPayload:
+        course = db.query(Course).filter(Course.course_id == course_id).first()
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        lessons = db.query(Lesson).filter(Lesson.course_id == course_id).order_by(Lesson.order).all()
+        return compile_payload(List[LessonListItem], lessons)
     
-    lessons = db.query(Lesson).filter(Lesson.course_id == course_id).order_by(Lesson.order).all()
-    return lessons
+    return payload_response(request, catalog_cache.get_or_load(db, ("course_lessons", course_id), load))
 
@@ -0,0 +1,126 @@
+"""
+Async-версия роутера курсов (включается при DB_ASYNC=true)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, undefer_group
+from typing import List, Optional
+from app.database import get_async_db, get_async_read_db, get_async_read_db_for, mark_user_write
+from app.models import Course, UserCourse, Lesson
+from app.schemas.course import CourseResponse, CourseSummary, CourseEnrollResponse, CourseProgressResponse
+from app.schemas.lesson import LessonListItem
+from app.services.course_service import (
+    compile_courses, courses_list_statement, get_courses_progress_async, parse_course_fields
+)
+from app.services.catalog_cache import catalog_cache, compile_payload, payload_response, CompiledPayload
+
+router = APIRouter()
+
+DEFAULT_USER_ID = 1
+
+
+async def _get_course_or_404(db: AsyncSession, course_id: str, *options) -> Course:
+    course = (await db.scalars(
+        select(Course).options(*options).where(Course.course_id == course_id)
+    )).first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return course
+
+
+@router.get(
+    "/courses",
+    response_model=None,
+    responses={200: {
+        "model": List[CourseSummary],
+        "description": "Без fields — CourseSummary; с fields — course_id и перечисленные поля CourseResponse",
+    }},
+)
+async def get_courses(
+    request: Request,
+    category_id: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Поля CourseResponse через запятую или *; по умолчанию — CourseSummary"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Получить список курсов (с опциональной фильтрацией по категории).
+    Отдаются только поля карточки, описания — в GET /courses/{id}.
+    """
+    try:
+        selected = parse_course_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def load() -> CompiledPayload:
+        courses = (await db.scalars(courses_list_statement(selected, category_id))).all()
+        return compile_courses(selected, courses)
+    
+    return payload_response(request, await catalog_cache.get_or_load_async(db, ("courses", category_id, selected), load))
+
+
+@router.get("/courses/progress", response_model=List[CourseProgressResponse])
+async def get_enrolled_courses_progress(
+    course_ids: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db_for(DEFAULT_USER_ID))
+):
+    """Получить прогресс по курсам пользователя (по умолчанию — по всем, на которые он записан)"""
+    progress = await get_courses_progress_async(db, DEFAULT_USER_ID, course_ids)
+    return [
+        CourseProgressResponse(course_id=course_id, progress=value)
+        for course_id, value in progress.items()
+    ]
+
+
+@router.get("/courses/{course_id}", response_model=CourseResponse)
+async def get_course(course_id: str, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Получить детали курса"""
+    async def load() -> CompiledPayload:
+        # В async ленивая загрузка недоступна: категорию и описания берём сразу
+        course = await _get_course_or_404(db, course_id, selectinload(Course.category), undefer_group("details"))
+        return compile_payload(CourseResponse, course)
+    
+    return payload_response(request, await catalog_cache.get_or_load_async(db, ("course", course_id), load))
+
+
+@router.post("/courses/{course_id}/enroll", response_model=CourseEnrollResponse)
+async def enroll_course(course_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Записаться на курс"""
+    await _get_course_or_404(db, course_id)
+    
+    # Проверяем, не записан ли уже
+    existing = (await db.scalars(
+        select(UserCourse).where(
+            UserCourse.user_id == DEFAULT_USER_ID,
+            UserCourse.course_id == course_id
+        )
+    )).first()
+    
+    if existing:
+        return CourseEnrollResponse(
+            message="Already enrolled",
+            course_id=course_id
+        )
+    
+    db.add(UserCourse(user_id=DEFAULT_USER_ID, course_id=course_id))
+    mark_user_write(db, DEFAULT_USER_ID)
+    await db.commit()
+    
+    return CourseEnrollResponse(
+        message="Successfully enrolled",
+        course_id=course_id
+    )
+
+
+@router.get("/courses/{course_id}/lessons", response_model=List[LessonListItem])
+async def get_course_lessons(course_id: str, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Получить уроки курса"""
+    async def load() -> CompiledPayload:
+        await _get_course_or_404(db, course_id)
+        
+        lessons = (await db.scalars(
+            select(Lesson).where(Lesson.course_id == course_id).order_by(Lesson.order)
+        )).all()
+        return compile_payload(List[LessonListItem], lessons)
+    
+    return payload_response(request, await catalog_cache.get_or_load_async(db, ("course_lessons", course_id), load))
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from datetime import datetime
-from app.database import get_db
+from app.database import get_db, mark_user_write
 from app.models import UserProgress, User, Lesson
-from app.schemas.progress import BlockProgressCreate, LessonProgressCreate, ProgressResponse
-from app.services.achievement_service import check_and_unlock_achievements
+from app.schemas.progress import (
+    BlockProgressCreate, LessonProgressCreate, LessonsProgressCreate, ProgressResponse, LessonsProgressResponse
+)
+from app.services.achievement_service import record_event
+from app.services.progress_service import complete_block, complete_lessons
+from app.services.activity_service import record_activity
+from app.services.statistics_service import record_statistics
 
 router = APIRouter()
 
@@ -38,32 +42,29 @@ def mark_block_completed(
     db: Session = Depends(get_db)
 ):
     """Отметить блок как выполненный"""
-    # Проверяем, не отмечен ли уже
-    existing = db.query(UserProgress).filter(
-        UserProgress.user_id == DEFAULT_USER_ID,
-        UserProgress.block_id == progress_data.block_id
-    ).first()
+    events = complete_block(
+        db,
+        DEFAULT_USER_ID,
+        progress_data.block_id,
+        progress_data.lesson_id,
+        progress_data.course_id
+    )
 
-    if existing:
+    if not events:
+        db.rollback()
         return ProgressResponse(
             message="Block already completed",
             block_id=progress_data.block_id
         )
 
-    # Создаем запись о прогрессе
-    user_progress = UserProgress(
-        user_id=DEFAULT_USER_ID,
-        block_id=progress_data.block_id,
-        lesson_id=progress_data.lesson_id,
-        course_id=progress_data.course_id,
-        completed_at=datetime.utcnow()
-    )
-    db.add(user_progress)
+    # Обновляем достижения, статистику и журнал активности в той же транзакции
+    for event in events:
+        record_event(db, event)
+    record_statistics(db, DEFAULT_USER_ID, events)
+    record_activity(db, DEFAULT_USER_ID, events)
+    mark_user_write(db, DEFAULT_USER_ID)
     db.commit()
 
-    # Проверяем достижения
-    check_and_unlock_achievements(db, DEFAULT_USER_ID)
-
     return ProgressResponse(
         message="Block marked as completed",
         block_id=progress_data.block_id
@@ -76,34 +77,37 @@ def mark_lesson_completed(
     db: Session = Depends(get_db)
 ):
     """Отметить урок как завершенный"""
-    # Получаем все блоки урока
-    from app.models import Block
-    blocks = db.query(Block).filter(Block.lesson_id == progress_data.lesson_id).all()
-
-    # Отмечаем все блоки как завершенные
-    for block in blocks:
-        existing = db.query(UserProgress).filter(
-            UserProgress.user_id == DEFAULT_USER_ID,
-            UserProgress.block_id == block.id
-        ).first()
-
-        if not existing:
-            user_progress = UserProgress(
-                user_id=DEFAULT_USER_ID,
-                block_id=block.id,
-                lesson_id=progress_data.lesson_id,
-                course_id=progress_data.course_id,
-                completed_at=datetime.utcnow()
-            )
-            db.add(user_progress)
-
+    # Все блоки урока отмечаются одним INSERT ... ON CONFLICT DO NOTHING
+    events = complete_lessons(db, DEFAULT_USER_ID, [progress_data.lesson_id])
+    for event in events:
+        record_event(db, event)
+    record_statistics(db, DEFAULT_USER_ID, events)
+    record_activity(db, DEFAULT_USER_ID, events)
+    mark_user_write(db, DEFAULT_USER_ID)
     db.commit()
 
-    # Проверяем достижения
-    check_and_unlock_achievements(db, DEFAULT_USER_ID)
-
     return ProgressResponse(
         message="Lesson marked as completed",
         lesson_id=progress_data.lesson_id
     )
 
+
+@router.post("/progress/lessons", response_model=LessonsProgressResponse)
+def mark_lessons_completed(
+    progress_data: LessonsProgressCreate,
+    db: Session = Depends(get_db)
+):
+    """Отметить несколько уроков как завершенные (синхронизация офлайн-прогресса)"""
+    events = complete_lessons(db, DEFAULT_USER_ID, progress_data.lesson_ids)
+    for event in events:
+        record_event(db, event)
+    record_statistics(db, DEFAULT_USER_ID, events)
+    record_activity(db, DEFAULT_USER_ID, events)
+    mark_user_write(db, DEFAULT_USER_ID)
+    db.commit()
+
+    return LessonsProgressResponse(
+        message="Lessons marked as completed",
+        lesson_ids=progress_data.lesson_ids,
+        blocks_completed=sum(len(event.block_ids) for event in events)
+    )
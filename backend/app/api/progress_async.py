@@ -0,0 +1,117 @@
+"""
+Async-версия роутера прогресса (включается при DB_ASYNC=true)
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, mark_user_write
+from app.models import UserProgress
+from app.schemas.progress import (
+    BlockProgressCreate, LessonProgressCreate, LessonsProgressCreate, ProgressResponse, LessonsProgressResponse
+)
+from app.services.achievement_service import record_event_async
+from app.services.progress_service import complete_block_async, complete_lessons_async
+from app.services.activity_service import record_activity_async
+from app.services.statistics_service import record_statistics_async
+
+router = APIRouter()
+
+DEFAULT_USER_ID = 1
+
+
+@router.get("/progress")
+async def get_progress(db: AsyncSession = Depends(get_async_db)):
+    """Получить прогресс пользователя по всем курсам"""
+    progress_items = (await db.scalars(
+        select(UserProgress).where(UserProgress.user_id == DEFAULT_USER_ID)
+    )).all()
+
+    return {
+        "total_blocks_completed": len(progress_items),
+        "progress": [
+            {
+                "block_id": p.block_id,
+                "lesson_id": p.lesson_id,
+                "course_id": p.course_id,
+                "completed_at": p.completed_at.isoformat() if p.completed_at else None
+            }
+            for p in progress_items
+        ]
+    }
+
+
+@router.post("/progress/block", response_model=ProgressResponse)
+async def mark_block_completed(
+    progress_data: BlockProgressCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Отметить блок как выполненный"""
+    events = await complete_block_async(
+        db,
+        DEFAULT_USER_ID,
+        progress_data.block_id,
+        progress_data.lesson_id,
+        progress_data.course_id
+    )
+
+    if not events:
+        await db.rollback()
+        return ProgressResponse(
+            message="Block already completed",
+            block_id=progress_data.block_id
+        )
+
+    # Обновляем достижения, статистику и журнал активности в той же транзакции
+    for event in events:
+        await record_event_async(db, event)
+    await record_statistics_async(db, DEFAULT_USER_ID, events)
+    await record_activity_async(db, DEFAULT_USER_ID, events)
+    mark_user_write(db, DEFAULT_USER_ID)
+    await db.commit()
+
+    return ProgressResponse(
+        message="Block marked as completed",
+        block_id=progress_data.block_id
+    )
+
+
+@router.post("/progress/lesson", response_model=ProgressResponse)
+async def mark_lesson_completed(
+    progress_data: LessonProgressCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Отметить урок как завершенный"""
+    # Все блоки урока отмечаются одним INSERT ... ON CONFLICT DO NOTHING
+    events = await complete_lessons_async(db, DEFAULT_USER_ID, [progress_data.lesson_id])
+    for event in events:
+        await record_event_async(db, event)
+    await record_statistics_async(db, DEFAULT_USER_ID, events)
+    await record_activity_async(db, DEFAULT_USER_ID, events)
+    mark_user_write(db, DEFAULT_USER_ID)
+    await db.commit()
+
+    return ProgressResponse(
+        message="Lesson marked as completed",
+        lesson_id=progress_data.lesson_id
+    )
+
+
+@router.post("/progress/lessons", response_model=LessonsProgressResponse)
+async def mark_lessons_completed(
+    progress_data: LessonsProgressCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Отметить несколько уроков как завершенные (синхронизация офлайн-прогресса)"""
+    events = await complete_lessons_async(db, DEFAULT_USER_ID, progress_data.lesson_ids)
+    for event in events:
+        await record_event_async(db, event)
+    await record_statistics_async(db, DEFAULT_USER_ID, events)
+    await record_activity_async(db, DEFAULT_USER_ID, events)
+    mark_user_write(db, DEFAULT_USER_ID)
+    await db.commit()
+
+    return LessonsProgressResponse(
+        message="Lessons marked as completed",
+        lesson_ids=progress_data.lesson_ids,
+        blocks_completed=sum(len(event.block_ids) for event in events)
+    )
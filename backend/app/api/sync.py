@@ -0,0 +1,28 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas.sync import SyncRequest, SyncResponse
+from app.services.sync_service import apply_sync_batch
+
+router = APIRouter()
+
+DEFAULT_USER_ID = 1
+
+
+@router.post("/sync", response_model=SyncResponse)
+def sync_events(request: SyncRequest, db: Session = Depends(get_db)):
+    """
+    Синхронизировать офлайн-события клиента (отметки блоков и ответы на
+    карточки) одной транзакцией и вернуть итоговое состояние с сервера
+    """
+    completed_block_ids, cards, unlocked = apply_sync_batch(db, DEFAULT_USER_ID, request.events)
+
+    return SyncResponse(
+        message="Events synchronized",
+        server_time=datetime.utcnow(),
+        events_applied=len(request.events),
+        completed_block_ids=completed_block_ids,
+        cards=cards,
+        unlocked_achievements=unlocked
+    )
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.training import TrainingCardResponse, TrainingSubmitRequest, TrainingSubmitResponse
-from app.schemas.block import BlockResponse, TheoryBlockResponse, PracticeBlockResponse
-from app.services.training_service import get_cards_for_training, submit_answer
-from app.services.achievement_service import check_and_unlock_achievements
+from app.schemas.training import TrainingCardResponse, TrainingDueResponse, TrainingSubmitRequest, TrainingSubmitResponse
+from app.schemas.block import to_block_response
+from app.services.training_service import get_cards_for_training, get_due_counts, submit_answer
 
 router = APIRouter()
 
@@ -16,37 +15,19 @@ def get_training_cards(db: Session = Depends(get_db)):
     """Получить карточки для тренировки"""
     cards = get_cards_for_training(db, DEFAULT_USER_ID, limit=10)
     
-    block_responses = []
-    for block in cards:
-        if block.type == "theory":
-            block_responses.append(TheoryBlockResponse(
-                id=block.id,
-                type=block.type,
-                order=block.order,
-                title=block.title,
-                content=block.content or "",
-                visualization_hint=block.visualization_hint or ""
-            ))
-        else:
-            block_responses.append(PracticeBlockResponse(
-                id=block.id,
-                type=block.type,
-                subtype=block.subtype or "",
-                order=block.order,
-                title=block.title,
-                question=block.question,
-                content=block.content,
-                options=block.options,
-                hints=block.hints or [],
-                correct_answer=block.correct_answer,
-                explanation=block.explanation,
-                answer=block.answer,
-                sample_answer=block.sample_answer
-            ))
+    block_responses = [to_block_response(block) for block in cards]
     
     return TrainingCardResponse(cards=block_responses)
 
 
+@router.get("/training/due", response_model=TrainingDueResponse)
+def get_training_due(db: Session = Depends(get_db)):
+    """Сколько карточек нужно повторить сегодня и на этой неделе (для бейджа)"""
+    due_today, due_this_week = get_due_counts(db, DEFAULT_USER_ID)
+    
+    return TrainingDueResponse(due_today=due_today, due_this_week=due_this_week)
+
+
 @router.post("/training/submit", response_model=TrainingSubmitResponse)
 def submit_training_answer(
     request: TrainingSubmitRequest,
@@ -62,9 +43,6 @@ def submit_training_answer(
         request.is_correct
     )
     
-    # Проверяем достижения
-    check_and_unlock_achievements(db, DEFAULT_USER_ID)
-    
     return TrainingSubmitResponse(
         message="Answer submitted",
         next_review=repetition_data.next_review.isoformat() if repetition_data.next_review else "",
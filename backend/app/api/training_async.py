@@ -0,0 +1,54 @@
+"""
+Async-версия роутера тренировок (включается при DB_ASYNC=true)
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas.training import TrainingCardResponse, TrainingDueResponse, TrainingSubmitRequest, TrainingSubmitResponse
+from app.schemas.block import to_block_response
+from app.services.training_service import get_cards_for_training_async, get_due_counts_async, submit_answer_async
+
+router = APIRouter()
+
+DEFAULT_USER_ID = 1
+
+
+@router.get("/training/cards", response_model=TrainingCardResponse)
+async def get_training_cards(db: AsyncSession = Depends(get_async_db)):
+    """Получить карточки для тренировки"""
+    cards = await get_cards_for_training_async(db, DEFAULT_USER_ID, limit=10)
+    
+    block_responses = [to_block_response(block) for block in cards]
+    
+    return TrainingCardResponse(cards=block_responses)
+
+
+@router.get("/training/due", response_model=TrainingDueResponse)
+async def get_training_due(db: AsyncSession = Depends(get_async_db)):
+    """Сколько карточек нужно повторить сегодня и на этой неделе (для бейджа)"""
+    due_today, due_this_week = await get_due_counts_async(db, DEFAULT_USER_ID)
+    
+    return TrainingDueResponse(due_today=due_today, due_this_week=due_this_week)
+
+
+@router.post("/training/submit", response_model=TrainingSubmitResponse)
+async def submit_training_answer(
+    request: TrainingSubmitRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Отправить ответ на карточку"""
+    repetition_data = await submit_answer_async(
+        db,
+        DEFAULT_USER_ID,
+        request.block_id,
+        request.lesson_id,
+        request.course_id,
+        request.is_correct
+    )
+    
+    return TrainingSubmitResponse(
+        message="Answer submitted",
+        next_review=repetition_data.next_review.isoformat() if repetition_data.next_review else "",
+        interval=repetition_data.interval,
+        needs_review=repetition_data.needs_review
+    )
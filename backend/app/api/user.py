@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db_for, mark_user_write
 from app.models import User, UserStatistics
-from app.schemas.user import UserResponse, UserUpdate, UserStatisticsResponse
+from app.schemas.user import UserResponse, UserUpdate, UserStatisticsResponse, UserActivityResponse
+from app.services.activity_service import DEFAULT_DAILY_GOAL, get_activity_summary
 
 router = APIRouter()
 
@@ -21,9 +22,9 @@ def get_user(db: Session = Depends(get_db)):
             name="Алексей",
             level=12,
             xp=1245,
-            streak=14,
+            streak=0,
             daily_goal=5,
-            completed_today=3,
+            completed_today=0,
             selected_categories=["health", "tech"],
             notifications=[{"time": "09:00"}, {"time": "19:00"}]
         )
@@ -44,28 +45,42 @@ def update_user(user_update: UserUpdate, db: Session = Depends(get_db)):
     for field, value in update_data.items():
         setattr(user, field, value)
     
+    mark_user_write(db, DEFAULT_USER_ID)
     db.commit()
     db.refresh(user)
     return user
 
 
 @router.get("/user/statistics", response_model=UserStatisticsResponse)
-def get_user_statistics(db: Session = Depends(get_db)):
-    """Получить статистику пользователя"""
+def get_user_statistics(db: Session = Depends(get_read_db_for(DEFAULT_USER_ID))):
+    """
+    Получить статистику пользователя. Счётчики поддерживаются при записи
+    (statistics_service), поэтому это чтение одной строки.
+    """
     stats = db.query(UserStatistics).filter(UserStatistics.user_id == DEFAULT_USER_ID).first()
     
     if not stats:
-        # Создаем статистику по умолчанию
-        stats = UserStatistics(
-            user_id=DEFAULT_USER_ID,
-            total_lessons=156,
-            average_accuracy=87.0,
-            days_learning=45,
-            total_cards_reviewed=1245
+        # Пользователь ещё ничего не прошёл
+        return UserStatisticsResponse(
+            total_lessons=0,
+            average_accuracy=0.0,
+            days_learning=0,
+            total_cards_reviewed=0
         )
-        db.add(stats)
-        db.commit()
-        db.refresh(stats)
     
     return stats
 
+
+@router.get("/user/activity", response_model=UserActivityResponse)
+def get_user_activity(db: Session = Depends(get_read_db_for(DEFAULT_USER_ID))):
+    """Серия, дневная цель и активные дни из журнала активности"""
+    summary = get_activity_summary(db, DEFAULT_USER_ID)
+    daily_goal = db.query(User.daily_goal).filter(User.id == DEFAULT_USER_ID).scalar()
+    return UserActivityResponse(
+        streak=summary.streak,
+        active_days=summary.active_days,
+        completed_today=summary.completed_today,
+        daily_goal=daily_goal or DEFAULT_DAILY_GOAL,
+        goal_met_today=summary.goal_met_today,
+        goal_days=summary.goal_days
+    )
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Dict, Optional, List
 import secrets
 
 
@@ -9,6 +9,76 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = 5
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_RECYCLE: int = 3600
+    DB_POOL_TIMEOUT: float = 30.0
+    # Async stack (asyncpg): включает async-версии роутеров training/progress/courses
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Реплики для чтения каталога и статистики (пусто — всё читается с primary).
+    # Для локальной проверки маршрутизации можно указать сам DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_READ_YOUR_WRITES_SECONDS: float = 10.0
+    
+    # Catalog cache (категории, курсы, уроки, блоки)
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+    CATALOG_VERSION_CHECK_SECONDS: float = 5.0
+    
+    # Spaced repetition: алгоритм по умолчанию ("sm2" | "fsrs"), курс или
+    # пользователь могут переопределить его полем scheduler
+    SCHEDULER_DEFAULT: str = "sm2"
+    FSRS_DESIRED_RETENTION: float = 0.9
+    
+    # Сжатие ответов (gzip, brotli при установленном пакете brotli) от
+    # COMPRESSION_MIN_SIZE байт
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    
+    # SQL-инструментирование: Server-Timing, гистограммы по маршрутам и
+    # топ выражений (GET /health/queries). Выражения дольше QUERY_STATS_SLOW_MS
+    # и повторённые за запрос QUERY_STATS_REPEAT_WARN раз попадают в лог
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_MAX_STATEMENTS: int = 1000
+    QUERY_STATS_SLOW_MS: float = 200.0
+    QUERY_STATS_REPEAT_WARN: int = 20
+    # /health/queries показывает текст SQL, поэтому по умолчанию выключен (404)
+    QUERY_STATS_ENDPOINT_ENABLED: bool = False
+    
+    # Допуск к пулу БД: запрос ждёт соединение не дольше бюджета своего класса
+    # (или маршрута), освободившиеся соединения достаются классам по порядку
+    # critical → normal → low; класс получает 503 с Retry-After сразу, если в
+    # очереди уже DB_ADMISSION_QUEUE_LIMITS[класс] ожидающих
+    DB_ADMISSION_ENABLED: bool = True
+    DB_ADMISSION_BUDGETS_MS: Dict[str, int] = {"critical": 5000, "normal": 2000, "low": 500}
+    DB_ADMISSION_QUEUE_LIMITS: Dict[str, int] = {"critical": 200, "normal": 50, "low": 10}
+    DB_ADMISSION_ROUTE_PRIORITIES: Dict[str, str] = {
+        "POST /api/training/submit": "critical",
+        "POST /api/progress/block": "critical",
+        "POST /api/progress/lesson": "critical",
+        "POST /api/progress/lessons": "critical",
+        "POST /api/sync": "critical",
+        "GET /api/categories": "low",
+        "GET /api/courses": "low",
+        "GET /api/courses/{course_id}": "low",
+        "GET /api/courses/{course_id}/lessons": "low",
+        "GET /api/lessons/{lesson_id}": "low",
+        "GET /api/achievements": "low",
+    }
+    # Переопределение бюджета для отдельных маршрутов ("METHOD /path": мс)
+    DB_ADMISSION_ROUTE_BUDGETS_MS: Dict[str, int] = {}
+    DB_ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    
+    # GET /metrics (формат Prometheus): задержки по маршрутам, пулы БД и потоков
+    METRICS_ENABLED: bool = True
+    
+    # Журнал активности: после полуночи UTC серии и дневные счётчики
+    # пересчитываются пачками пользователей
+    ACTIVITY_ROLLOVER_ENABLED: bool = True
+    ACTIVITY_ROLLOVER_BATCH_SIZE: int = 5000
     
     # API
     API_V1_PREFIX: str = "/api"
@@ -21,7 +91,35 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15 
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30 
+    # Revoked refresh tokens are kept this long to detect reuse, then pruned
+    REFRESH_TOKEN_REVOKED_RETENTION_HOURS: int = 24
+    REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_PRUNE_BATCH_SIZE: int = 5000
+    
+    # Password hashing: bcrypt cost and the dedicated process pool. When more
+    # than PASSWORD_HASH_MAX_PENDING hashes are queued, login/register answer 503
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_POOL_ENABLED: bool = True
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    
+    # Verified-principal cache (access token jti -> user); TTL also bounds
+    # how long other workers may honour a token after revocation
+    AUTH_PRINCIPAL_CACHE_ENABLED: bool = True
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 60
     
+    @property
+    def async_database_url(self) -> str:
+        """URL для asyncpg: явный ASYNC_DATABASE_URL или DATABASE_URL со сменой драйвера"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        return self.to_async_url(self.DATABASE_URL)
+
+    @staticmethod
+    def to_async_url(url: str) -> str:
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
     class Config:
         env_file = ".env"
         case_sensitive = True
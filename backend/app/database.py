@@ -1,19 +1,121 @@
-from sqlalchemy import create_engine
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event, Delete, Insert, Update
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import Pool, QueuePool
 from app.config import settings
+from app.utils.admission import guarded_pool
+from app.utils.metrics import pool_class
+from app.utils.query_stats import query_stats
+from app.utils.replicas import Replica, ReplicaHealthChecker, ReplicaSet
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=settings.DB_POOL_SIZE if hasattr(settings, 'DB_POOL_SIZE') else 5,
-    max_overflow=settings.DB_MAX_OVERFLOW if hasattr(settings, 'DB_MAX_OVERFLOW') else 10,
-    pool_recycle=settings.DB_POOL_RECYCLE if hasattr(settings, 'DB_POOL_RECYCLE') else 3600,
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _create_engine(url: str, name: str):
+    engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        # Допуск с приоритетами и замер ожидания соединения для /metrics
+        poolclass=pool_class(name, guarded_pool(
+            name, QueuePool, capacity=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        )),
+    )
+    query_stats.instrument(engine)
+    return engine
+
+
+class RoutingSession(Session):
+    """
+    Сессия с маршрутизацией чтений. Если зависимость выбрала реплику
+    (info["replica"]), запросы идут на неё; flush и явные INSERT/UPDATE/DELETE
+    всегда идут на primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing and not isinstance(clause, (Insert, Update, Delete)):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+engine = _create_engine(settings.DATABASE_URL, "sync")
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+replica_set = ReplicaSet(
+    [
+        Replica(name=f"replica-{index}", engine=_create_engine(url, f"replica-{index}"))
+        for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    read_your_writes_seconds=settings.REPLICA_READ_YOUR_WRITES_SECONDS,
+)
+replica_health = ReplicaHealthChecker(replica_set, settings.REPLICA_HEALTH_CHECK_SECONDS)
+
+# Async engine создаётся только при DB_ASYNC=true, чтобы asyncpg оставался
+# необязательной зависимостью для синхронного режима
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    def _create_async_engine(url: str, name: str):
+        engine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            poolclass=pool_class(name, guarded_pool(
+                name, AsyncAdaptedQueuePool, capacity=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW, is_async=True
+            )),
+        )
+        query_stats.instrument(engine.sync_engine)
+        return engine
+
+    async_engine = _create_async_engine(settings.async_database_url, "async")
+    for replica, url in zip(replica_set.replicas, settings.DATABASE_REPLICA_URLS):
+        replica.async_engine = _create_async_engine(settings.to_async_url(url), f"{replica.name}-async").sync_engine
+    # expire_on_commit=False: после commit атрибуты нельзя лениво догрузить в async
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+    )
+
+
+def engine_pools() -> Dict[str, Pool]:
+    """Пулы всех движков по имени (как в pool_class/guarded_pool)"""
+    pools = {"sync": engine.pool}
+    if async_engine is not None:
+        pools["async"] = async_engine.pool
+    for replica in replica_set.replicas:
+        pools[replica.name] = replica.engine.pool
+        if replica.async_engine is not None:
+            pools[f"{replica.name}-async"] = replica.async_engine.pool
+    return pools
+
+
+def mark_user_write(db, user_id: int) -> None:
+    """
+    Помечает, что сессия меняет данные пользователя: после commit его чтения
+    через get_read_db_for ещё REPLICA_READ_YOUR_WRITES_SECONDS идут на primary.
+    """
+    db.info.setdefault("written_users", set()).add(user_id)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_written_users(session: Session) -> None:
+    users = session.info.pop("written_users", None)
+    if users:
+        replica_set.pin(users)
+
 
 def get_db():
     db = SessionLocal()
@@ -22,3 +124,65 @@ def get_db():
     finally:
         db.close()
 
+
+def _read_db(user_id: Optional[int]):
+    db = SessionLocal()
+    replica = replica_set.pick(user_id)
+    if replica is not None:
+        db.info["replica"] = replica.engine
+    try:
+        yield db
+    except OperationalError as e:
+        # Реплика недоступна: снимаем её до следующей проверки здоровья
+        if replica is not None:
+            replica_set.mark_failed(replica, e)
+        raise
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """Сессия только для чтения общих данных (каталог): реплика, если есть здоровая"""
+    yield from _read_db(None)
+
+
+def get_read_db_for(user_id: int):
+    """Зависимость чтения данных пользователя: сразу после его записи — с primary"""
+    def get_user_read_db():
+        yield from _read_db(user_id)
+    return get_user_read_db
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database layer is disabled (set DB_ASYNC=true)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _async_read_db(user_id: Optional[int]):
+    # Фабрика, а не делегирование через async for: исключение эндпоинта
+    # должно дойти до генератора, чтобы снять реплику и закрыть сессию
+    async def get_async_read_db():
+        if AsyncSessionLocal is None:
+            raise RuntimeError("Async database layer is disabled (set DB_ASYNC=true)")
+        replica = replica_set.pick(user_id)
+        async with AsyncSessionLocal() as db:
+            if replica is not None:
+                db.info["replica"] = replica.async_engine
+            try:
+                yield db
+            except OperationalError as e:
+                if replica is not None:
+                    replica_set.mark_failed(replica, e)
+                raise
+    return get_async_read_db
+
+
+# Async-вариант get_read_db
+get_async_read_db = _async_read_db(None)
+
+
+def get_async_read_db_for(user_id: int):
+    """Async-вариант get_read_db_for"""
+    return _async_read_db(user_id)
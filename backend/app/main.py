@@ -1,19 +1,35 @@
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.api import categories, courses, lessons, user, progress, training, achievements, auth
+from app.api import categories, courses, lessons, user, progress, training, achievements, auth, sync
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.compression import CompressionMiddleware
 from app.middleware.error_handler import GlobalErrorHandler
-from app.database import get_db, Base, engine, SessionLocal
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_timing import QueryTimingMiddleware
+from app.services.catalog_cache import catalog_cache
+from app.services.principal_cache import principal_cache
+from app.services.activity_service import activity_rollover
+from app.services.refresh_token_service import refresh_token_pruner
+from app.utils import metrics as metrics_format
+from app.utils.admission import admission_gates
+from app.utils.metrics import request_metrics
+from app.utils.password import password_hasher
+from app.utils.query_stats import SORT_KEYS, query_stats
+from app.database import get_db, Base, engine, engine_pools, replica_health, replica_set, SessionLocal
 from app import models  # Force import of all models
 from app.models import Category
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from fastapi import Depends, status, Response
+from fastapi import Depends, HTTPException, Query, status, Response
+from fastapi.responses import PlainTextResponse
+import anyio.to_thread
 
 
-app = FastAPI(title="Learnify API", version="1.0.0")
+# orjson вместо json.dumps для всех ответов без явного класса
+app = FastAPI(title="Learnify API", version="1.0.0", default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
 def on_startup():
@@ -28,16 +44,32 @@ def on_startup():
         if category_count == 0:
             print("Database is empty, loading seed data...")
             from app.seed_data import main
-            main()
+            main([])
             print("Seed data loaded successfully!")
         else:
             print(f"Database already contains data ({category_count} categories), skipping seed data.")
+
+        # Компилируем уроки заранее, чтобы первые запросы не платили за сериализацию
+        from app.services.lesson_service import precompile_lessons
+        print(f"Precompiled {precompile_lessons(db)} lessons")
     except Exception as e:
         print(f"Error loading seed data: {e}")
         # Don't fail startup if seed data fails
     finally:
         db.close()
 
+    refresh_token_pruner.start()
+    activity_rollover.start()
+    replica_health.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    refresh_token_pruner.stop()
+    activity_rollover.stop()
+    replica_health.stop()
+    password_hasher.shutdown()
+
 
 # CORS
 app.add_middleware(
@@ -48,18 +80,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route-aware priority and wait budget for DB pool checkouts
+app.add_middleware(AdmissionMiddleware)
+
 # Global Exception Handler
 app.add_middleware(GlobalErrorHandler)
 
+# SQL per request: Server-Timing and per-route stats (error responses included)
+app.add_middleware(QueryTimingMiddleware, stats=query_stats)
+
+# Compression (outside the error handler: also covers error responses)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    enabled=settings.COMPRESSION_ENABLED,
+)
+
+# Request latency/in-flight for /metrics; outermost so the whole stack is timed
+app.add_middleware(MetricsMiddleware, metrics=request_metrics, enabled=settings.METRICS_ENABLED)
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["authentication"])
 app.include_router(categories.router, prefix=settings.API_V1_PREFIX, tags=["categories"])
-app.include_router(courses.router, prefix=settings.API_V1_PREFIX, tags=["courses"])
 app.include_router(lessons.router, prefix=settings.API_V1_PREFIX, tags=["lessons"])
 app.include_router(user.router, prefix=settings.API_V1_PREFIX, tags=["user"])
-app.include_router(progress.router, prefix=settings.API_V1_PREFIX, tags=["progress"])
-app.include_router(training.router, prefix=settings.API_V1_PREFIX, tags=["training"])
+
+# Курсы, прогресс и тренировки: sync (psycopg2) или async (asyncpg) по DB_ASYNC
+if settings.DB_ASYNC:
+    from app.api import courses_async, progress_async, training_async
+    app.include_router(courses_async.router, prefix=settings.API_V1_PREFIX, tags=["courses"])
+    app.include_router(progress_async.router, prefix=settings.API_V1_PREFIX, tags=["progress"])
+    app.include_router(training_async.router, prefix=settings.API_V1_PREFIX, tags=["training"])
+else:
+    app.include_router(courses.router, prefix=settings.API_V1_PREFIX, tags=["courses"])
+    app.include_router(progress.router, prefix=settings.API_V1_PREFIX, tags=["progress"])
+    app.include_router(training.router, prefix=settings.API_V1_PREFIX, tags=["training"])
 app.include_router(achievements.router, prefix=settings.API_V1_PREFIX, tags=["achievements"])
+app.include_router(sync.router, prefix=settings.API_V1_PREFIX, tags=["sync"])
 
 
 @app.get("/")
@@ -91,3 +148,67 @@ def health_detailed(db: Session = Depends(get_db)):
             }
         )
 
+
+@app.get("/health/cache")
+def health_cache():
+    """Счётчики кэшей (попадания, промахи, вытеснения) для подбора размера"""
+    return {"catalog": catalog_cache.stats(), "principals": principal_cache.stats()}
+
+
+@app.get("/health/replicas")
+def health_replicas():
+    """Состояние реплик для чтения: здоровье, отставание, число чтений"""
+    return replica_set.stats()
+
+
+def _query_report(
+    top: int = Query(20, ge=1, le=200),
+    sort: str = Query("total_ms", description="total_ms | calls | max_ms | max_per_request")
+) -> dict:
+    if not settings.QUERY_STATS_ENDPOINT_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"sort must be one of {SORT_KEYS}")
+    return {
+        **query_stats.stats(),
+        "routes": query_stats.routes(),
+        "statements": query_stats.top_statements(top, sort),
+    }
+
+
+@app.get("/health/queries")
+def health_queries(report: dict = Depends(_query_report)):
+    """
+    SQL по маршрутам (гистограммы числа выражений и времени в БД) и топ
+    выражений. sort=max_per_request поднимает наверх кандидатов в N+1.
+    """
+    return report
+
+
+@app.post("/health/queries/reset")
+def health_queries_reset(report: dict = Depends(_query_report)):
+    """Отдаёт отчёт, как GET /health/queries, и обнуляет агрегаты"""
+    query_stats.reset()
+    return report
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики в текстовом формате Prometheus. Эндпоинт async: лимитер пула
+    потоков anyio доступен только из цикла событий.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    limits = (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    pools = engine_pools()
+    limiter = anyio.to_thread.current_default_thread_limiter()
+
+    lines = request_metrics.render()
+    lines += metrics_format.render_pools(pools, {name: limits for name in pools})
+    lines += metrics_format.render_admission({name: admission_gates[name].stats() for name in pools})
+    lines += metrics_format.render_threadpool(
+        limiter.total_tokens, limiter.borrowed_tokens, limiter.statistics().tasks_waiting
+    )
+    return PlainTextResponse(metrics_format.render(lines), media_type=metrics_format.CONTENT_TYPE)
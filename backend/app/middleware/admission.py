@@ -0,0 +1,26 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils import admission
+
+
+class AdmissionMiddleware:
+    """
+    Exposes the request scope to the connection pool guard.
+
+    The pool reads the matched route from the scope when a connection is
+    checked out, so priority and wait budget follow the route template.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = admission.begin_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.end_request(token)
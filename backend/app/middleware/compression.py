@@ -0,0 +1,110 @@
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import StreamCompressor, compress, is_compressible, negotiate_encoding, representation_etag
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression as a plain ASGI middleware.
+
+    Single-chunk responses of at least minimum_size bytes are compressed in
+    one pass and get an exact Content-Length; streamed responses are
+    compressed chunk by chunk. Responses that already carry a
+    Content-Encoding (e.g. pre-compressed catalog payloads) pass through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, enabled: bool = True):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Message = {}
+        self._started = False
+        self._passthrough = False
+        self._stream: Optional[StreamCompressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Headers are held back until the first body chunk decides the encoding
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            self._passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not is_compressible(headers.get("content-type"))
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self._passthrough:
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self._started:
+            if not more_body:
+                # Whole response in one message
+                if len(body) < self.minimum_size:
+                    await self._flush_start()
+                    await self._send(message)
+                    return
+                compressed = compress(body, self.encoding)
+                self._set_encoding_headers(content_length=len(compressed))
+                await self._flush_start()
+                await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+            self._stream = StreamCompressor(self.encoding)
+            self._set_encoding_headers(content_length=None)
+            await self._flush_start()
+
+        data = self._stream.chunk(body) if body else b""
+        if not more_body:
+            data += self._stream.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _set_encoding_headers(self, content_length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The compressed body is a different representation: it gets its own strong validator
+        etag = headers.get("etag")
+        if etag:
+            headers["ETag"] = representation_etag(etag, self.encoding)
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+
+    async def _flush_start(self) -> None:
+        if not self._started:
+            self._started = True
+            await self._send(self._start)
@@ -1,27 +1,65 @@
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError, TimeoutError as PoolTimeoutError
 from fastapi.exceptions import RequestValidationError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.admission import PoolSaturated
 import logging
-from typing import Union
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-class GlobalErrorHandler(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class GlobalErrorHandler:
+    """
+    Maps unhandled exceptions to JSON error responses.
+
+    Plain ASGI middleware: the downstream app gets the original send, so
+    there is no per-request task or body stream wrapping and streaming
+    responses pass through untouched. If the response has already started
+    when the exception is raised, it cannot be replaced; the exception is
+    logged and re-raised.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            return await self.handle_exception(e)
+            if response_started:
+                logger.exception(f"Exception after response started: {e}")
+                raise
+            response = await self.handle_exception(e)
+            await response(scope, receive, send)
 
     async def handle_exception(self, exc: Exception) -> JSONResponse:
         error_content = {"message": "Internal Server Error", "detail": str(exc)}
         status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        headers = None
 
+        if isinstance(exc, PoolTimeoutError):
+            # Shed by the pool admission guard (or a plain pool_timeout): ask the client to back off
+            logger.warning(f"Database pool saturated: {exc}")
+            status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            error_content["message"] = "Service Unavailable"
+            error_content["detail"] = "Database is overloaded, please retry."
+            retry_after = exc.retry_after if isinstance(exc, PoolSaturated) else settings.DB_ADMISSION_RETRY_AFTER_SECONDS
+            headers = {"Retry-After": str(retry_after)}
 
-
-        if isinstance(exc, OperationalError):
+        elif isinstance(exc, OperationalError):
             logger.error(f"Database Operational Error: {exc}")
             status_code = status.HTTP_503_SERVICE_UNAVAILABLE
             error_content["message"] = "Service Unavailable"
@@ -50,7 +88,8 @@ class GlobalErrorHandler(BaseHTTPMiddleware):
         
         return JSONResponse(
             status_code=status_code,
-            content=error_content
+            content=error_content,
+            headers=headers
         )
 
 # Helper function if we want to use exception_handlers instead of middleware for some specific types
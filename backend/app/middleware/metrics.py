@@ -0,0 +1,39 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.query_timing import route_template
+from app.utils.metrics import RequestMetrics
+
+
+class MetricsMiddleware:
+    """
+    Records request latency (until the last body chunk) by method, route
+    template and status, and the number of requests in flight.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics, enabled: bool = True):
+        self.app = app
+        self.metrics = metrics
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        # A request that fails before responding is reported as 500
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.started()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.finished(scope["method"], route_template(scope), status, time.perf_counter() - started)
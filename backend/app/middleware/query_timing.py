@@ -0,0 +1,55 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.query_stats import NO_ROUTE, QueryStats
+
+
+def route_template(scope: Scope) -> str:
+    """Matched route path ("/api/lessons/{lesson_id}") so path params do not split the stats"""
+    return getattr(scope.get("route"), "path", None) or NO_ROUTE
+
+
+def route_name(scope: Scope) -> str:
+    template = route_template(scope)
+    return f"{scope['method']} {template}" if template != NO_ROUTE else NO_ROUTE
+
+
+class QueryTimingMiddleware:
+    """
+    Attributes SQL statements to the current request and reports them.
+
+    Adds a Server-Timing header with DB time, statement count and rows, plus
+    total time until the response started, and merges the counters into the
+    per-route aggregates of QueryStats when the request finishes.
+    """
+
+    def __init__(self, app: ASGIApp, stats: QueryStats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.stats.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = self.stats.begin_request()
+        queries = self.stats.current()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={queries.db_ms:.1f};desc="{queries.count} queries, {queries.rows} rows", '
+                    f"app;dur={total_ms:.1f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.stats.end_request(token, route_name(scope))
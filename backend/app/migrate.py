@@ -0,0 +1,44 @@
+"""
+Приведение схемы БД к последней миграции перед запуском API.
+
+    python -m app.migrate
+
+ON CONFLICT в сервисах опирается на уникальные ограничения из миграций
+(uq_user_achievements_user_achievement, uq_user_progress_user_block,
+uq_repetition_data_user_block), которых нет в базах, созданных через
+Base.metadata.create_all. Такие базы (таблицы есть, alembic_version нет)
+помечаются ревизией BASELINE_REVISION — схемой, которую строил create_all
+до миграций 003+, — и доводятся до head. Пустая база создаётся миграциями.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.config import settings
+from app.database import engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_REVISION = "002_add_authentication"
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    # % в пароле экранируется: значения ini проходят интерполяцию
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+    return config
+
+
+def main():
+    config = alembic_config()
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" not in tables and "users" in tables:
+        print(f"Schema was created without migrations, stamping {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    main()
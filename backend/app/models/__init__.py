@@ -5,12 +5,16 @@ from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.block import Block
 from app.models.achievement import Achievement
+from app.models.catalog import CatalogVersion
 from app.models.progress import (
     UserCourse,
     UserProgress,
     RepetitionData,
     UserAchievement,
-    UserStatistics
+    UserStatistics,
+    UserAchievementCounters,
+    UserDueCard,
+    UserActivity
 )
 
 __all__ = [
@@ -21,10 +25,14 @@ __all__ = [
     "Lesson",
     "Block",
     "Achievement",
+    "CatalogVersion",
     "UserCourse",
     "UserProgress",
     "RepetitionData",
     "UserAchievement",
     "UserStatistics",
+    "UserAchievementCounters",
+    "UserDueCard",
+    "UserActivity",
 ]
 
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, ARRAY, JSON, ForeignKey
+from sqlalchemy import Column, Index, String, Integer, ARRAY, JSON, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class Block(Base):
     __tablename__ = "blocks"
+    __table_args__ = (
+        Index("ix_blocks_lesson_id_order", "lesson_id", "order"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     lesson_id = Column(String, ForeignKey("lessons.id"), nullable=False)
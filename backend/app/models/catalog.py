@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, BigInteger
+from app.database import Base
+
+
+class CatalogVersion(Base):
+    """Счётчик версии каталога (одна строка), увеличивается при записи контента"""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
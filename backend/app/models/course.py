@@ -1,5 +1,5 @@
 from sqlalchemy import Column, String, Integer, Boolean, ARRAY, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -17,20 +17,23 @@ class Course(Base):
     estimated_duration_hours = Column(Integer, nullable=False)
     total_lessons = Column(Integer, nullable=False)
     total_practice_tasks = Column(Integer, nullable=False)
-    tags = Column(ARRAY(String), default=list)
+    # Тяжёлые поля описания (группа "details") нужны только карточке курса:
+    # по умолчанию не загружаются, GET /courses/{id} берёт их undefer_group("details")
+    tags = deferred(Column(ARRAY(String), default=list), group="details")
     author = Column(String, nullable=False)
     creation_date = Column(DateTime(timezone=True), server_default=func.now())
     last_updated = Column(DateTime(timezone=True), onupdate=func.now())
     status = Column(String, default="active")
     language = Column(String, default="ru")
-    target_audience = Column(ARRAY(String), default=list)
+    target_audience = deferred(Column(ARRAY(String), default=list), group="details")
     completion_certificate = Column(Boolean, default=False)
     short_description = Column(String, nullable=False)
-    full_description = Column(String, nullable=False)
-    learning_outcomes = Column(ARRAY(String), default=list)
-    prerequisites = Column(ARRAY(String), default=list)
+    full_description = deferred(Column(String, nullable=False), group="details")
+    learning_outcomes = deferred(Column(ARRAY(String), default=list), group="details")
+    prerequisites = deferred(Column(ARRAY(String), default=list), group="details")
     cover_image_url = Column(String, nullable=False)
     promo_video_url = Column(String, nullable=True)
+    scheduler = Column(String, nullable=True)  # алгоритм повторений ('sm2', 'fsrs')
 
     category = relationship("Category", backref="courses")
     lessons = relationship("Lesson", back_populates="course", cascade="all, delete-orphan")
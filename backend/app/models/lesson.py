@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, Index, String, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class Lesson(Base):
     __tablename__ = "lessons"
+    __table_args__ = (
+        Index("ix_lessons_course_id_order", "course_id", "order"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     course_id = Column(String, ForeignKey("courses.course_id"), nullable=False)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, SmallInteger, String, ForeignKey, Date, DateTime, Boolean, Float, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import BIT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,6 +7,9 @@ from app.database import Base
 
 class UserCourse(Base):
     __tablename__ = "user_courses"
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_user_courses_user_course"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,6 +22,12 @@ class UserCourse(Base):
 
 class UserProgress(Base):
     __tablename__ = "user_progress"
+    __table_args__ = (
+        UniqueConstraint("user_id", "block_id", name="uq_user_progress_user_block"),
+        # Проверки «урок/курс уже начат» и прогресс по урокам/курсам
+        Index("ix_user_progress_user_lesson", "user_id", "lesson_id"),
+        Index("ix_user_progress_user_course", "user_id", "course_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -34,6 +44,9 @@ class UserProgress(Base):
 
 class RepetitionData(Base):
     __tablename__ = "repetition_data"
+    __table_args__ = (
+        UniqueConstraint("user_id", "block_id", name="uq_repetition_data_user_block"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -46,6 +59,9 @@ class RepetitionData(Base):
     ease_factor = Column(Float, default=2.5)
     needs_review = Column(Boolean, default=False)
     mistakes = Column(Integer, default=0)
+    # Состояние модели памяти FSRS (для SM-2 не используется)
+    stability = Column(Float, nullable=True)
+    difficulty = Column(Float, nullable=True)
 
     user = relationship("User", backref="repetition_data")
     block = relationship("Block")
@@ -53,6 +69,9 @@ class RepetitionData(Base):
 
 class UserAchievement(Base):
     __tablename__ = "user_achievements"
+    __table_args__ = (
+        UniqueConstraint("user_id", "achievement_id", name="uq_user_achievements_user_achievement"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -65,15 +84,79 @@ class UserAchievement(Base):
 
 
 class UserStatistics(Base):
+    """
+    Денормализованная статистика пользователя. Обновляется инкрементально
+    в транзакции записи прогресса и ответов (statistics_service) и
+    периодически сверяется с исходными таблицами.
+    """
     __tablename__ = "user_statistics"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
-    total_lessons = Column(Integer, default=0)
-    average_accuracy = Column(Float, default=0.0)
-    days_learning = Column(Integer, default=0)
-    total_cards_reviewed = Column(Integer, default=0)
+    total_lessons = Column(Integer, default=0, nullable=False)  # полностью пройденные уроки
+    average_accuracy = Column(Float, default=0.0, nullable=False)
+    days_learning = Column(Integer, default=0, nullable=False)  # дни с активностью
+    total_cards_reviewed = Column(Integer, default=0, nullable=False)  # разные карточки
+    answers_correct = Column(Integer, default=0, nullable=False)
+    answers_wrong = Column(Integer, default=0, nullable=False)
+    last_active_on = Column(Date, nullable=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     user = relationship("User", backref="statistics")
 
+
+
+class UserAchievementCounters(Base):
+    """Счётчики, из которых вычисляются условия достижений (обновляются инкрементально)"""
+    __tablename__ = "user_achievement_counters"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    blocks_completed = Column(Integer, default=0, nullable=False)
+    lessons_started = Column(Integer, default=0, nullable=False)
+    courses_started = Column(Integer, default=0, nullable=False)
+    cards_reviewed = Column(Integer, default=0, nullable=False)
+    cards_clean = Column(Integer, default=0, nullable=False)  # карточки без ошибок
+    streak = Column(Integer, default=0, nullable=False)
+
+    user = relationship("User", backref="achievement_counters")
+
+
+class UserDueCard(Base):
+    """
+    Материализованная очередь повторения: по строке на карточку пользователя.
+    priority 0 — карточка с ошибкой (needs_review), 1 — по расписанию due_at.
+    Обновляется вместе с repetition_data при каждом ответе.
+    """
+    __tablename__ = "user_due_cards"
+    __table_args__ = (
+        UniqueConstraint("user_id", "block_id", name="uq_user_due_cards_user_block"),
+        # Выборка очереди и счётчики — range scan по (user_id, priority, due_at)
+        Index("ix_user_due_cards_queue", "user_id", "priority", "due_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    block_id = Column(String, ForeignKey("blocks.id"), nullable=False)
+    priority = Column(SmallInteger, nullable=False)
+    due_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class UserActivity(Base):
+    """
+    Журнал активности пользователя: бит на день. Бит i в active_bits —
+    была ли активность в день first_day + i, в goal_bits — выполнена ли в
+    этот день дневная цель. Последний бит соответствует last_day,
+    today_count — число действий за last_day. Серия, выполнение цели и
+    число активных дней вычисляются из битов (activity_service).
+    """
+    __tablename__ = "user_activity"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    first_day = Column(Date, nullable=False)
+    last_day = Column(Date, nullable=False)
+    active_bits = Column(BIT(varying=True), nullable=False)
+    goal_bits = Column(BIT(varying=True), nullable=False)
+    today_count = Column(Integer, default=0, nullable=False)
+
+    user = relationship("User", backref="activity")
@@ -11,6 +11,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     name = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Увеличивается при смене пароля/деактивации, отзывает выданные токены
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     level = Column(Integer, default=1)
     xp = Column(Integer, default=0)
     streak = Column(Integer, default=0)
@@ -18,6 +20,7 @@ class User(Base):
     completed_today = Column(Integer, default=0)
     selected_categories = Column(JSON, default=list)
     notifications = Column(JSON, default=list)
+    scheduler = Column(String, nullable=True)  # алгоритм повторений, перекрывает курс
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
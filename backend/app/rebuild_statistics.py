@@ -0,0 +1,39 @@
+"""
+Сверка денормализованной статистики пользователей (user_statistics).
+
+    python -m app.rebuild_statistics [--batch-size 1000] [--user-id 1]
+
+Пересобирает счётчики из user_progress и repetition_data пачками по
+--batch-size пользователей, каждая пачка — одна транзакция. Запускается
+по расписанию (cron) и после массовой загрузки данных в обход API.
+"""
+import argparse
+import time
+from typing import List, Optional
+
+from app.database import SessionLocal
+from app.services.statistics_service import REBUILD_BATCH_SIZE, rebuild_all_statistics, rebuild_statistics
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        if args.user_id is not None:
+            rebuild_statistics(db, [args.user_id])
+            db.commit()
+            users = 1
+        else:
+            users = rebuild_all_statistics(db, args.batch_size)
+    finally:
+        db.close()
+    print({"users": users, "seconds": round(time.perf_counter() - started, 2)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Пакетный пересчёт расписаний spaced repetition.
+
+    python -m app.reschedule snap --chunk-size 50000 [--dry-run]
+
+snap — после изменения REVIEW_INTERVALS переносит все строки repetition_data
+на новую сетку: читает таблицу чанками по id (keyset-пагинация), считает
+новые интервалы и next_review векторно (NumPy) и записывает изменившиеся
+строки пакетным UPDATE вместе с позициями в очереди user_due_cards.
+Пересчитывается только привязка к сетке (snap_schedule): ease_factor не
+меняется, ответы не переигрываются. Строки без last_review или interval
+пропускаются. calculate_next_review_batch сюда не подходит: ему нужен
+результат ответа, а при смене сетки ответа нет (он используется в
+SM2Scheduler.review_batch; совпадение со скалярной версией проверяет
+tests/test_spaced_repetition_batch.py).
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import RepetitionData, UserDueCard
+from app.utils.spaced_repetition_batch import snap_schedule
+
+
+def _to_datetime64(values: List[Optional[datetime]]) -> np.ndarray:
+    """timestamptz из БД -> naive UTC datetime64[us], None -> NaT"""
+    return np.array([
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value and value.tzinfo else value
+        for value in values
+    ], dtype="datetime64[us]")
+
+
+def _rows_chunk(db: Session, after_id: int, chunk_size: int):
+    return db.execute(
+        select(
+            RepetitionData.id,
+            RepetitionData.user_id,
+            RepetitionData.block_id,
+            RepetitionData.last_review,
+            RepetitionData.next_review,
+            RepetitionData.interval
+        )
+        .where(
+            RepetitionData.id > after_id,
+            RepetitionData.last_review.isnot(None),
+            RepetitionData.interval.isnot(None)
+        )
+        .order_by(RepetitionData.id)
+        .limit(chunk_size)
+    ).all()
+
+
+_update_due_queue = (
+    update(UserDueCard)
+    .where(UserDueCard.user_id == bindparam("b_user_id"), UserDueCard.block_id == bindparam("b_block_id"))
+    .values(due_at=bindparam("b_due_at"))
+)
+
+
+def snap_all(db: Session, chunk_size: int, dry_run: bool = False) -> dict:
+    """Переносит все расписания на текущую сетку интервалов; каждый чанк — своя транзакция"""
+    scanned = changed = 0
+    after_id = 0
+    started = time.perf_counter()
+
+    while True:
+        rows = _rows_chunk(db, after_id, chunk_size)
+        if not rows:
+            break
+        ids, user_ids, block_ids, last_reviews, next_reviews, intervals = zip(*rows)
+        after_id = ids[-1]
+        scanned += len(rows)
+
+        new_next, new_interval = snap_schedule(_to_datetime64(last_reviews), np.array(intervals, dtype=np.int64))
+        old_next = _to_datetime64(next_reviews)
+        mask = (new_interval != np.array(intervals)) | (new_next != old_next)
+        positions = np.flatnonzero(mask)
+        changed += len(positions)
+
+        if len(positions) and not dry_run:
+            next_values = new_next[positions].tolist()
+            interval_values = new_interval[positions].tolist()
+            db.execute(update(RepetitionData), [
+                {"id": ids[i], "interval": interval, "next_review": next_review}
+                for i, interval, next_review in zip(positions.tolist(), interval_values, next_values)
+            ])
+            db.execute(_update_due_queue, [
+                {"b_user_id": user_ids[i], "b_block_id": block_ids[i], "b_due_at": next_review}
+                for i, next_review in zip(positions.tolist(), next_values)
+            ])
+        db.commit()
+        print(f"scanned {scanned}, changed {changed}", file=sys.stderr)
+
+    return {
+        "scanned": scanned,
+        "changed": changed,
+        "dry_run": dry_run,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    snap = commands.add_parser("snap", help="перенести расписания на текущую сетку интервалов")
+    snap.add_argument("--chunk-size", type=int, default=50_000)
+    snap.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        print(snap_all(db, args.chunk_size, args.dry_run))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
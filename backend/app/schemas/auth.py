@@ -32,6 +32,7 @@ class UserUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     daily_goal: Optional[int] = Field(None, ge=1, le=50)
     selected_categories: Optional[list[str]] = None
+    scheduler: Optional[str] = Field(None, pattern="^(sm2|fsrs)$", description="Spaced repetition algorithm")
 
 
 class UserProfile(BaseModel):
@@ -47,6 +48,7 @@ class UserProfile(BaseModel):
     completed_today: int
     selected_categories: list
     notifications: list
+    scheduler: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -35,3 +35,31 @@ class PracticeBlockResponse(BaseModel):
 
 BlockResponse = TheoryBlockResponse | PracticeBlockResponse
 
+
+
+def to_block_response(block) -> BlockResponse:
+    """Преобразует модель Block в схему ответа нужного типа"""
+    if block.type == "theory":
+        return TheoryBlockResponse(
+            id=block.id,
+            type=block.type,
+            order=block.order,
+            title=block.title,
+            content=block.content or "",
+            visualization_hint=block.visualization_hint or ""
+        )
+    return PracticeBlockResponse(
+        id=block.id,
+        type=block.type,
+        subtype=block.subtype or "",
+        order=block.order,
+        title=block.title,
+        question=block.question,
+        content=block.content,
+        options=block.options,
+        hints=block.hints or [],
+        correct_answer=block.correct_answer,
+        explanation=block.explanation,
+        answer=block.answer,
+        sample_answer=block.sample_answer
+    )
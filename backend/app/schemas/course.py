@@ -38,7 +38,29 @@ class CourseResponse(CourseBase):
         from_attributes = True
 
 
+class CourseSummary(BaseModel):
+    """Курс в списке каталога: только поля карточки, без тяжёлых описаний"""
+    course_id: str
+    title: str
+    category_id: str
+    level: str
+    estimated_duration_hours: int
+    total_lessons: int
+    total_practice_tasks: int
+    short_description: str
+    cover_image_url: str
+    category: Optional[CategoryResponse] = None
+
+    class Config:
+        from_attributes = True
+
+
 class CourseEnrollResponse(BaseModel):
     message: str
     course_id: str
 
+
+
+class CourseProgressResponse(BaseModel):
+    course_id: str
+    progress: float
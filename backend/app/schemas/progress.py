@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 
 class BlockProgressCreate(BaseModel):
@@ -14,8 +14,18 @@ class LessonProgressCreate(BaseModel):
     course_id: str
 
 
+class LessonsProgressCreate(BaseModel):
+    """Пакетная отметка уроков (например, синхронизация офлайн-клиента)"""
+    lesson_ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
 class ProgressResponse(BaseModel):
     message: str
     block_id: Optional[str] = None
     lesson_id: Optional[str] = None
 
+
+class LessonsProgressResponse(BaseModel):
+    message: str
+    lesson_ids: List[str]
+    blocks_completed: int
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Union
+from datetime import datetime
+
+
+class SyncBlockCompleted(BaseModel):
+    type: Literal["block_completed"]
+    block_id: str
+    lesson_id: str
+    course_id: str
+    client_timestamp: datetime
+
+
+class SyncTrainingAnswer(BaseModel):
+    type: Literal["training_answer"]
+    block_id: str
+    lesson_id: str
+    course_id: str
+    is_correct: bool
+    client_timestamp: datetime
+
+
+SyncEvent = Annotated[Union[SyncBlockCompleted, SyncTrainingAnswer], Field(discriminator="type")]
+
+
+class SyncRequest(BaseModel):
+    """Упорядоченная пачка событий, накопленных клиентом офлайн"""
+    events: List[SyncEvent] = Field(..., min_length=1, max_length=1000)
+
+
+class SyncCardState(BaseModel):
+    block_id: str
+    last_review: Optional[datetime] = None
+    next_review: Optional[datetime] = None
+    interval: int
+    ease_factor: float
+    needs_review: bool
+    mistakes: int
+
+
+class SyncResponse(BaseModel):
+    message: str
+    server_time: datetime
+    events_applied: int
+    completed_block_ids: List[str]
+    cards: List[SyncCardState]
+    unlocked_achievements: List[str]
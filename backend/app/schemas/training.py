@@ -23,3 +23,7 @@ class TrainingSubmitResponse(BaseModel):
     interval: int
     needs_review: bool
 
+
+class TrainingDueResponse(BaseModel):
+    due_today: int
+    due_this_week: int
@@ -22,9 +22,7 @@ class UserUpdate(BaseModel):
     name: Optional[str] = None
     level: Optional[int] = None
     xp: Optional[int] = None
-    streak: Optional[int] = None
     daily_goal: Optional[int] = None
-    completed_today: Optional[int] = None
     selected_categories: Optional[List[str]] = None
     notifications: Optional[List[dict]] = None
 
@@ -47,3 +45,12 @@ class UserStatisticsResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class UserActivityResponse(BaseModel):
+    streak: int
+    active_days: int
+    completed_today: int
+    daily_goal: int
+    goal_met_today: bool
+    goal_days: int
+
@@ -1,16 +1,30 @@
 """
 Скрипт для загрузки начальных данных в базу данных
+
+    python -m app.seed_data
+    python -m app.seed_data --synthetic --users 1000 --courses 20 --repetition-rows 10000
 """
+import argparse
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.database import SessionLocal
 from app.models import (
-    Category, Course, Lesson, Block, Achievement, User, UserStatistics
+    Category, Course, Lesson, Block, Achievement, User, RepetitionData
 )
 from app.utils.password import hash_password
+from app.services.catalog_cache import bump_catalog_version
+from app.services.statistics_service import rebuild_all_statistics
+from app.services.training_service import rebuild_due_queue
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy import text
 
+# Синтетические данные для нагрузочных тестов (benchmarks/)
+SYNTHETIC_CATEGORY_ID = "synthetic"
+SYNTHETIC_PASSWORD = "password123"
+SYNTHETIC_BATCH_SIZE = 5000
+
 
 def seed_categories(db: Session):
     """Загрузить категории"""
@@ -390,22 +404,13 @@ def seed_default_user(db: Session):
             name="Алексей",
             level=12,
             xp=1245,
-            streak=14,
+            streak=0,
             daily_goal=5,
-            completed_today=3,
+            completed_today=0,
             selected_categories=["health", "tech"],
             notifications=[{"time": "09:00"}, {"time": "19:00"}]
         )
         db.add(user)
-        
-        stats = UserStatistics(
-            user_id=1,
-            total_lessons=156,
-            average_accuracy=87.0,
-            days_learning=45,
-            total_cards_reviewed=1245
-        )
-        db.add(stats)
         db.commit()
 
         
@@ -415,8 +420,165 @@ def seed_default_user(db: Session):
         print("Default user seeded")
 
 
-def main():
+def synthetic_course_id(course_index: int) -> str:
+    return f"SYN-{course_index:04d}"
+
+
+def synthetic_lesson_id(course_index: int, lesson_index: int) -> str:
+    return f"syn-{course_index}-lesson-{lesson_index}"
+
+
+def synthetic_block_id(course_index: int, lesson_index: int, block_index: int) -> str:
+    return f"syn-{course_index}-{lesson_index}-block-{block_index}"
+
+
+def synthetic_user_email(user_index: int) -> str:
+    return f"synthetic-{user_index}@example.com"
+
+
+def _insert_batches(db: Session, model, rows):
+    """Пакетная вставка, повторный запуск не создаёт дублей"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= SYNTHETIC_BATCH_SIZE:
+            db.execute(pg_insert(model).values(batch).on_conflict_do_nothing())
+            batch = []
+    if batch:
+        db.execute(pg_insert(model).values(batch).on_conflict_do_nothing())
+
+
+def seed_synthetic(
+    db: Session,
+    users: int = 100,
+    courses: int = 10,
+    lessons_per_course: int = 10,
+    blocks_per_lesson: int = 10,
+    repetition_rows: int = 1000
+):
+    """
+    Загрузить синтетический набор данных заданного масштаба: курсы с уроками
+    и практическими блоками, пользователей (пароль SYNTHETIC_PASSWORD) и до
+    repetition_rows карточек повторения у каждого из них и у пользователя 1.
+    Идемпотентно: существующие строки не перезаписываются.
+    """
+    _insert_batches(db, Category, [{"id": SYNTHETIC_CATEGORY_ID, "name": "Синтетика", "icon": "⏱"}])
+    _insert_batches(db, Course, (
+        {
+            "course_id": synthetic_course_id(c),
+            "title": f"Синтетический курс {c}",
+            "category_id": SYNTHETIC_CATEGORY_ID,
+            "subcategory": "Синтетика",
+            "level": "Легкий",
+            "difficulty_score": 1,
+            "estimated_duration_weeks": 1,
+            "estimated_duration_hours": 1,
+            "total_lessons": lessons_per_course,
+            "total_practice_tasks": lessons_per_course * blocks_per_lesson,
+            "tags": [],
+            "author": "seed_data",
+            "target_audience": [],
+            "learning_outcomes": [],
+            "prerequisites": [],
+            "short_description": "Синтетические данные",
+            "full_description": "Синтетические данные для нагрузочных тестов",
+            "cover_image_url": "https://example.com/covers/synthetic.jpg",
+        }
+        for c in range(courses)
+    ))
+    _insert_batches(db, Lesson, (
+        {
+            "id": synthetic_lesson_id(c, l),
+            "course_id": synthetic_course_id(c),
+            "order": l + 1,
+            "title": f"Урок {l + 1}",
+            "description": "Синтетический урок",
+        }
+        for c in range(courses)
+        for l in range(lessons_per_course)
+    ))
+    _insert_batches(db, Block, (
+        {
+            "id": synthetic_block_id(c, l, b),
+            "lesson_id": synthetic_lesson_id(c, l),
+            "type": "practice",
+            "subtype": "multiple_choice",
+            "order": b + 1,
+            "title": f"Вопрос {b + 1}",
+            "content": "Синтетический вопрос",
+            "question": "2 + 2 = ?",
+            "options": ["3", "4", "5"],
+            "hints": [],
+            "correct_answer": "4",
+        }
+        for c in range(courses)
+        for l in range(lessons_per_course)
+        for b in range(blocks_per_lesson)
+    ))
+    db.commit()
+    print(f"Synthetic catalog seeded: {courses} courses, {courses * lessons_per_course * blocks_per_lesson} blocks")
+
+    # bcrypt медленный: один хэш на всех синтетических пользователей
+    hashed_password = hash_password(SYNTHETIC_PASSWORD)
+    _insert_batches(db, User, (
+        {
+            "email": synthetic_user_email(u),
+            "hashed_password": hashed_password,
+            "name": f"Synthetic {u}",
+            "selected_categories": [],
+            "notifications": [],
+        }
+        for u in range(users)
+    ))
+    db.commit()
+    print(f"Synthetic users seeded: {users}")
+
+    user_ids = [1] + [
+        user_id for (user_id,) in db.query(User.id).filter(User.email.like("synthetic-%@example.com"))
+    ]
+    blocks = [
+        (synthetic_block_id(c, l, b), synthetic_lesson_id(c, l), synthetic_course_id(c))
+        for c in range(courses)
+        for l in range(lessons_per_course)
+        for b in range(blocks_per_lesson)
+    ][:repetition_rows]
+    now = datetime.utcnow()
+
+    # ~20% карточек просрочены, ~1% с ошибками, остальные запланированы на будущее
+    _insert_batches(db, RepetitionData, (
+        {
+            "user_id": user_id,
+            "block_id": block_id,
+            "lesson_id": lesson_id,
+            "course_id": course_id,
+            "last_review": now - timedelta(days=7),
+            "next_review": now - timedelta(hours=index % 48) if index % 5 == 0 else now + timedelta(days=1 + index % 30),
+            "interval": 7,
+            "ease_factor": 2.5,
+            "needs_review": index % 100 == 0,
+            "mistakes": 1 if index % 100 == 0 else 0,
+        }
+        for user_id in user_ids
+        for index, (block_id, lesson_id, course_id) in enumerate(blocks)
+    ))
+    # Core-вставки не проходят через submit_answer: пересобираем очередь повторения и статистику
+    rebuild_due_queue(db)
+    db.commit()
+    rebuild_all_statistics(db)
+    print(f"Synthetic repetition data seeded: {len(blocks)} rows for {len(user_ids)} users")
+
+
+def main(argv: Optional[List[str]] = None):
     """Основная функция для загрузки всех данных"""
+    parser = argparse.ArgumentParser(description="Загрузка данных в базу")
+    parser.add_argument("--synthetic", action="store_true", help="добавить синтетический набор данных")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--lessons-per-course", type=int, default=10)
+    parser.add_argument("--blocks-per-lesson", type=int, default=10)
+    parser.add_argument("--repetition-rows", type=int, default=1000, help="карточек повторения на пользователя")
+    args = parser.parse_args(argv)
+
     db = SessionLocal()
     try:
         print("Starting data seeding...")
@@ -425,6 +587,18 @@ def main():
         seed_course_tm_inter_002(db)
         seed_additional_courses(db)
         seed_default_user(db)
+        if args.synthetic:
+            seed_synthetic(
+                db,
+                users=args.users,
+                courses=args.courses,
+                lessons_per_course=args.lessons_per_course,
+                blocks_per_lesson=args.blocks_per_lesson,
+                repetition_rows=args.repetition_rows
+            )
+        # Сбрасываем кэш каталога во всех воркерах
+        bump_catalog_version(db)
+        db.commit()
         print("Data seeding completed!")
     except Exception as e:
         print(f"Error seeding data: {e}")
@@ -1,131 +1,259 @@
+from dataclasses import dataclass
 from datetime import datetime
 from sqlalchemy.orm import Session
-from app.models import UserAchievement, Achievement, UserProgress, RepetitionData, User
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Boolean, DateTime, Integer, String, and_, or_, case, column, exists, func, literal, null, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import (
+    UserAchievement, Achievement, UserAchievementCounters, UserProgress, RepetitionData, User, Course
+)
+from app.services.events import Event, BlockCompleted, AnswerSubmitted, StreakChanged
+from typing import Callable, Dict, FrozenSet, List, Tuple
 
 
-def check_and_unlock_achievements(db: Session, user_id: int) -> List[UserAchievement]:
+COUNTER_FIELDS = (
+    "blocks_completed",
+    "lessons_started",
+    "courses_started",
+    "cards_reviewed",
+    "cards_clean",
+    "streak",
+)
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    """
+    Условие достижения: от каких счётчиков зависит и как по ним
+    вычислить (progress, should_unlock)
+    """
+    inputs: FrozenSet[str]
+    evaluate: Callable[[Dict[str, int]], Tuple[int, bool]]
+
+
+def _accuracy(counters: Dict[str, int]) -> float:
+    if counters["cards_reviewed"] == 0:
+        return 0.0
+    return (counters["cards_clean"] / counters["cards_reviewed"]) * 100
+
+
+def _accuracy_rule(threshold: float) -> AchievementRule:
+    def evaluate(counters: Dict[str, int]) -> Tuple[int, bool]:
+        accuracy = _accuracy(counters)
+        return int(accuracy), counters["cards_reviewed"] > 0 and accuracy >= threshold
+
+    return AchievementRule(frozenset({"cards_reviewed", "cards_clean"}), evaluate)
+
+
+def _threshold_rule(field: str, threshold: int) -> AchievementRule:
+    return AchievementRule(
+        frozenset({field}),
+        lambda counters: (counters[field], counters[field] >= threshold)
+    )
+
+
+ACHIEVEMENT_RULES: Dict[str, AchievementRule] = {
+    # Завершить первый урок
+    "first_step": AchievementRule(
+        frozenset({"blocks_completed"}),
+        lambda c: (min(c["blocks_completed"], 1), c["blocks_completed"] > 0)
+    ),
+    # 7 дней подряд
+    "seven_days": _threshold_rule("streak", 7),
+    # 100 карточек
+    "hundred_cards": _threshold_rule("cards_reviewed", 100),
+    # 90% точности
+    "excellent": _accuracy_rule(90),
+    # 5 уроков
+    "fast_start": _threshold_rule("lessons_started", 5),
+    # 30 дней подряд
+    "persistence": _threshold_rule("streak", 30),
+    # Все курсы
+    "all_courses": AchievementRule(
+        frozenset({"courses_started"}),
+        lambda c: (
+            c["courses_started"],
+            c["total_courses"] > 0 and c["courses_started"] >= c["total_courses"]
+        )
+    ),
+    # 100% точность
+    "perfect": _accuracy_rule(100),
+}
+
+
+def _counter_changes(event: Event) -> Tuple[Dict[str, object], Dict[str, object]]:
     """
-    Проверяет условия достижений и разблокирует их при необходимости
+    Переводит событие в изменения счётчиков: (приращения, присваивания).
+    Приращения могут быть SQL-выражениями, вычисляемыми в том же запросе.
     """
-    unlocked = []
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return unlocked
-    
-    # Получаем все достижения
-    achievements = db.query(Achievement).all()
-    
-    for achievement in achievements:
-        # Проверяем, не разблокировано ли уже
-        existing = db.query(UserAchievement).filter(
-            UserAchievement.user_id == user_id,
-            UserAchievement.achievement_id == achievement.id
-        ).first()
-        
-        if existing and existing.unlocked_at:
-            continue
-        
-        # Проверяем условия
-        progress = 0
-        should_unlock = False
-        
-        if achievement.id == "first_step":
-            # Завершить первый урок
-            progress_count = db.query(UserProgress).filter(
-                UserProgress.user_id == user_id
-            ).count()
-            if progress_count > 0:
-                should_unlock = True
-                progress = 1
-        
-        elif achievement.id == "seven_days":
-            # 7 дней подряд
-            if user.streak >= 7:
-                should_unlock = True
-                progress = user.streak
-        
-        elif achievement.id == "hundred_cards":
-            # 100 карточек
-            cards_reviewed = db.query(RepetitionData).filter(
-                RepetitionData.user_id == user_id
-            ).count()
-            progress = cards_reviewed
-            if cards_reviewed >= 100:
-                should_unlock = True
-        
-        elif achievement.id == "excellent":
-            # 90% точности
-            total_reviews = db.query(RepetitionData).filter(
-                RepetitionData.user_id == user_id
-            ).count()
-            if total_reviews > 0:
-                correct_reviews = db.query(RepetitionData).filter(
-                    RepetitionData.user_id == user_id,
-                    RepetitionData.mistakes == 0
-                ).count()
-                accuracy = (correct_reviews / total_reviews) * 100
-                progress = int(accuracy)
-                if accuracy >= 90:
-                    should_unlock = True
-        
-        elif achievement.id == "fast_start":
-            # 5 уроков за неделю
-            lessons_completed = db.query(UserProgress).filter(
-                UserProgress.user_id == user_id
-            ).distinct(UserProgress.lesson_id).count()
-            progress = lessons_completed
-            if lessons_completed >= 5:
-                should_unlock = True
-        
-        elif achievement.id == "persistence":
-            # 30 дней подряд
-            progress = user.streak
-            if user.streak >= 30:
-                should_unlock = True
-        
-        elif achievement.id == "all_courses":
-            # Все курсы
-            courses_count = db.query(UserProgress).filter(
-                UserProgress.user_id == user_id
-            ).distinct(UserProgress.course_id).count()
-            progress = courses_count
-            # Нужно знать общее количество курсов
-            total_courses = db.query(UserProgress).distinct(UserProgress.course_id).count()
-            if courses_count >= total_courses and total_courses > 0:
-                should_unlock = True
-        
-        elif achievement.id == "perfect":
-            # 100% точность
-            total_reviews = db.query(RepetitionData).filter(
-                RepetitionData.user_id == user_id
-            ).count()
-            if total_reviews > 0:
-                correct_reviews = db.query(RepetitionData).filter(
-                    RepetitionData.user_id == user_id,
-                    RepetitionData.mistakes == 0
-                ).count()
-                accuracy = (correct_reviews / total_reviews) * 100
-                progress = int(accuracy)
-                if accuracy >= 100:
-                    should_unlock = True
-        
-        # Создаем или обновляем запись
-        if not existing:
-            existing = UserAchievement(
-                user_id=user_id,
-                achievement_id=achievement.id,
-                progress=progress
+    if isinstance(event, BlockCompleted):
+        # Урок/курс новый, если до вставки (без всех блоков пачки) в нём не было прогресса
+        inserted = event.batch_block_ids or event.block_ids
+        increments: Dict[str, object] = {"blocks_completed": len(event.block_ids)}
+        if event.count_lesson:
+            seen_lesson = exists().where(
+                UserProgress.user_id == event.user_id,
+                UserProgress.lesson_id == event.lesson_id,
+                UserProgress.block_id.notin_(inserted)
             )
-            db.add(existing)
-        
-        if should_unlock and not existing.unlocked_at:
-            existing.unlocked_at = datetime.utcnow()
-            existing.progress = progress
-            unlocked.append(existing)
-        else:
-            existing.progress = progress
-    
-    db.commit()
-    return unlocked
+            increments["lessons_started"] = case((seen_lesson, 0), else_=1)
+        if event.count_course:
+            seen_course = exists().where(
+                UserProgress.user_id == event.user_id,
+                UserProgress.course_id == event.course_id,
+                UserProgress.block_id.notin_(inserted)
+            )
+            increments["courses_started"] = case((seen_course, 0), else_=1)
+        return increments, {}
+
+    if isinstance(event, AnswerSubmitted):
+        # Карточка «чистая», пока по ней не было ни одной ошибки
+        clean_delta = 0
+        if event.is_new_card:
+            clean_delta = 1 if event.is_correct else 0
+        elif not event.is_correct and event.previous_mistakes == 0:
+            clean_delta = -1
+        increments = {
+            "cards_reviewed": int(event.is_new_card),
+            "cards_clean": clean_delta,
+        }
+        return {field: delta for field, delta in increments.items() if delta != 0}, {}
+
+    if isinstance(event, StreakChanged):
+        return {}, {"streak": event.streak}
+
+    raise TypeError(f"Unsupported event: {event!r}")
+
+
+def _counters_statement(user_id: int, increments: Dict[str, object], assignments: Dict[str, object]):
+    """Один UPSERT счётчиков пользователя, возвращающий их новые значения"""
+    table = UserAchievementCounters.__table__
+    stmt = pg_insert(UserAchievementCounters).values(user_id=user_id, **increments, **assignments)
+
+    set_ = {field: table.c[field] + stmt.excluded[field] for field in increments}
+    set_.update({field: stmt.excluded[field] for field in assignments})
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserAchievementCounters.user_id],
+        set_=set_
+    ).returning(
+        *(table.c[field] for field in COUNTER_FIELDS),
+        # Общее число курсов нужно только условию all_courses
+        select(func.count(Course.course_id)).scalar_subquery().label("total_courses")
+    )
+    return stmt
+
+
+def _achievements_statement(user_id: int, results: Dict[str, Tuple[int, bool]]):
+    """
+    Один INSERT ... ON CONFLICT для всех пересчитанных достижений.
+    Уже разблокированные и не изменившиеся записи не перезаписываются;
+    RETURNING отдаёт только вставленные/обновлённые строки.
+    """
+    now = datetime.utcnow()
+    evaluated = values(
+        column("achievement_id", String),
+        column("progress", Integer),
+        column("unlocked", Boolean),
+        name="evaluated"
+    ).data([
+        (achievement_id, progress, should_unlock)
+        for achievement_id, (progress, should_unlock) in results.items()
+    ])
+
+    # JOIN с achievements пропускает правила для незагруженных достижений
+    source = select(
+        literal(user_id, Integer),
+        evaluated.c.achievement_id,
+        evaluated.c.progress,
+        case((evaluated.c.unlocked, literal(now, DateTime(timezone=True))), else_=null())
+    ).select_from(
+        evaluated.join(Achievement, Achievement.id == evaluated.c.achievement_id)
+    )
+
+    stmt = pg_insert(UserAchievement).from_select(
+        ["user_id", "achievement_id", "progress", "unlocked_at"], source
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_user_achievements_user_achievement",
+        set_={"progress": stmt.excluded.progress, "unlocked_at": stmt.excluded.unlocked_at},
+        where=and_(
+            UserAchievement.unlocked_at.is_(None),
+            or_(
+                UserAchievement.progress.is_distinct_from(stmt.excluded.progress),
+                stmt.excluded.unlocked_at.isnot(None)
+            )
+        )
+    ).returning(UserAchievement.achievement_id, UserAchievement.unlocked_at)
+    return stmt
+
+
+def _newly_unlocked(rows) -> List[str]:
+    return [row.achievement_id for row in rows if row.unlocked_at is not None]
+
+
+def _evaluate(counters: Dict[str, int], changed: FrozenSet[str]) -> Dict[str, Tuple[int, bool]]:
+    return {
+        achievement_id: rule.evaluate(counters)
+        for achievement_id, rule in ACHIEVEMENT_RULES.items()
+        if rule.inputs & changed
+    }
+
+
+def record_event(db: Session, event: Event) -> List[str]:
+    """
+    Обновляет счётчики по событию и пересчитывает только те достижения,
+    чьи входные данные изменились. Не больше двух запросов на событие;
+    транзакцию фиксирует вызывающий код.
+    Возвращает id только что разблокированных достижений.
+    """
+    increments, assignments = _counter_changes(event)
+    changed = frozenset(increments) | frozenset(assignments)
+    if not changed:
+        return []
+
+    counters = dict(db.execute(_counters_statement(event.user_id, increments, assignments)).one()._mapping)
+    results = _evaluate(counters, changed)
+    if not results:
+        return []
+    return _newly_unlocked(db.execute(_achievements_statement(event.user_id, results)))
+
+
+async def record_event_async(db: AsyncSession, event: Event) -> List[str]:
+    """Async-вариант record_event для AsyncSession"""
+    increments, assignments = _counter_changes(event)
+    changed = frozenset(increments) | frozenset(assignments)
+    if not changed:
+        return []
+
+    counters = dict((await db.execute(_counters_statement(event.user_id, increments, assignments))).one()._mapping)
+    results = _evaluate(counters, changed)
+    if not results:
+        return []
+    return _newly_unlocked(await db.execute(_achievements_statement(event.user_id, results)))
+
+
+def check_and_unlock_achievements(db: Session, user_id: int) -> List[str]:
+    """
+    Полный пересчёт: заново собирает счётчики из user_progress и
+    repetition_data и проверяет все достижения. Нужен для сверки
+    и пакетной обработки; обычные записи используют record_event.
+    """
+    user_streak = select(func.coalesce(User.streak, 0)).where(User.id == user_id).scalar_subquery()
+    progress_of_user = select(UserProgress).where(UserProgress.user_id == user_id).subquery()
+    cards_of_user = select(RepetitionData).where(RepetitionData.user_id == user_id).subquery()
+
+    rebuilt = {
+        "blocks_completed": select(func.count()).select_from(progress_of_user).scalar_subquery(),
+        "lessons_started": select(func.count(progress_of_user.c.lesson_id.distinct())).scalar_subquery(),
+        "courses_started": select(func.count(progress_of_user.c.course_id.distinct())).scalar_subquery(),
+        "cards_reviewed": select(func.count()).select_from(cards_of_user).scalar_subquery(),
+        "cards_clean": select(func.count()).select_from(cards_of_user).where(
+            cards_of_user.c.mistakes == 0
+        ).scalar_subquery(),
+        "streak": user_streak,
+    }
 
+    counters = dict(db.execute(_counters_statement(user_id, {}, rebuilt)).one()._mapping)
+    results = _evaluate(counters, frozenset(COUNTER_FIELDS))
+    return _newly_unlocked(db.execute(_achievements_statement(user_id, results)))
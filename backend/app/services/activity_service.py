@@ -0,0 +1,315 @@
+"""
+Серия дней и дневная цель из битового журнала активности (user_activity).
+
+Каждое действие (завершённый блок, ответ на карточку) одним UPSERT
+выставляет бит своего дня и увеличивает счётчик дня. Серия — число
+единиц в конце active_bits, активные дни — число единиц, выполнение
+цели — бит goal_bits. users.streak и users.completed_today — проекции
+журнала для существующих ответов API; их обнуляет ночной проход
+rollover пачками пользователей.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import Date, String, and_, case, cast, func, literal, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import BIT, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal, mark_user_write
+from app.models import User, UserAchievementCounters, UserActivity
+from app.services.achievement_service import record_event, record_event_async
+from app.services.events import AnswerSubmitted, BlockCompleted, Event, StreakChanged
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAILY_GOAL = 5
+_VARBIT = BIT(varying=True)
+# Константы битов в тексте запроса: asyncpg не принимает str параметром BIT VARYING
+_ONE = literal_column("B'1'", _VARBIT)
+_ZERO = literal_column("B'0'", _VARBIT)
+_NEVER = date(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class ActivitySummary:
+    """Показатели, вычисленные из журнала на дату today"""
+    streak: int
+    active_days: int
+    completed_today: int
+    goal_met_today: bool
+    goal_days: int
+
+
+def summarize(row, today: date) -> ActivitySummary:
+    """Сводка по строке (first_day, last_day, active_bits, goal_bits, today_count)"""
+    if row is None:
+        return ActivitySummary(streak=0, active_days=0, completed_today=0, goal_met_today=False, goal_days=0)
+    is_today = row.last_day == today
+    # Серия жива, пока не пропущен целый день: вчерашняя активность её сохраняет
+    alive = row.last_day >= today - timedelta(days=1)
+    return ActivitySummary(
+        streak=len(row.active_bits) - len(row.active_bits.rstrip("1")) if alive else 0,
+        active_days=row.active_bits.count("1"),
+        completed_today=row.today_count if is_today else 0,
+        goal_met_today=is_today and row.goal_bits.endswith("1"),
+        goal_days=row.goal_bits.count("1"),
+    )
+
+
+def activity_count(events: Iterable[Event]) -> int:
+    """Число действий в событиях: завершённые блоки и ответы"""
+    count = 0
+    for event in events:
+        if isinstance(event, BlockCompleted):
+            count += len(event.block_ids)
+        elif isinstance(event, AnswerSubmitted):
+            count += 1
+    return count
+
+
+def _zeros(count):
+    return func.repeat("0", count, type_=String)
+
+
+def _bit(condition):
+    return case((condition, _ONE), else_=_ZERO)
+
+
+def _activity_columns():
+    # Биты отдаются строкой '0101...' одинаково для psycopg2 и asyncpg
+    return (
+        UserActivity.first_day,
+        UserActivity.last_day,
+        cast(UserActivity.active_bits, String).label("active_bits"),
+        cast(UserActivity.goal_bits, String).label("goal_bits"),
+        UserActivity.today_count,
+    )
+
+
+def _activity_statement(user_id: int, day: date, count: int):
+    """
+    UPSERT журнала за один день. День после last_day дописывает биты
+    (пропущенные дни — нули), тот же день увеличивает счётчик и может
+    выставить бит цели, более ранний день (офлайн-синхронизация) только
+    отмечает активность.
+    """
+    table = UserActivity.__table__
+    goal = select(func.coalesce(User.daily_goal, DEFAULT_DAILY_GOAL)).where(User.id == user_id).scalar_subquery()
+    day_ = literal(day, Date)
+
+    later = day_ > table.c.last_day
+    same = day_ == table.c.last_day
+    before_first = day_ < table.c.first_day
+    gap = day_ - table.c.last_day
+    lead = table.c.first_day - day_
+    position = day_ - table.c.first_day + 1
+    last_goal_bit = func.length(table.c.goal_bits)
+
+    stmt = pg_insert(UserActivity).values(
+        user_id=user_id,
+        first_day=day,
+        last_day=day,
+        active_bits=_ONE,
+        goal_bits=_bit(literal(count) >= goal),
+        today_count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserActivity.user_id],
+        set_={
+            "active_bits": case(
+                (later, table.c.active_bits.op("||")(cast(_zeros(gap - 1) + "1", _VARBIT))),
+                (same, table.c.active_bits),
+                (before_first, cast("1" + _zeros(lead - 1), _VARBIT).op("||")(table.c.active_bits)),
+                else_=func.substring(table.c.active_bits, 1, position - 1)
+                .op("||")(_ONE)
+                .op("||")(func.substring(table.c.active_bits, position + 1))
+            ),
+            "goal_bits": case(
+                (later, table.c.goal_bits.op("||")(
+                    cast(_zeros(gap - 1), _VARBIT).op("||")(_bit(literal(count) >= goal))
+                )),
+                (same, func.substring(table.c.goal_bits, 1, last_goal_bit - 1).op("||")(
+                    _bit(table.c.today_count + count >= goal)
+                )),
+                (before_first, cast(_zeros(lead), _VARBIT).op("||")(table.c.goal_bits)),
+                else_=table.c.goal_bits
+            ),
+            "today_count": case(
+                (later, count),
+                (same, table.c.today_count + count),
+                else_=table.c.today_count
+            ),
+            "first_day": func.least(table.c.first_day, day_),
+            "last_day": func.greatest(table.c.last_day, day_),
+        }
+    ).returning(*_activity_columns())
+    return stmt
+
+
+def _projection_statement(user_id: int, summary: ActivitySummary):
+    return update(User).where(User.id == user_id).values(
+        streak=summary.streak, completed_today=summary.completed_today
+    )
+
+
+def _streak_may_change(row, day: date, count: int) -> bool:
+    # Новый последний день или заполненный задним числом: серия могла измениться
+    return row.last_day > day or row.today_count == count
+
+
+def record_activity_days(db: Session, user_id: int, counts: Dict[date, int]) -> Optional[ActivitySummary]:
+    """
+    Записывает действия по дням (по одному UPSERT на день) и обновляет
+    users.streak/completed_today. При возможной смене серии обновляет
+    достижения. Транзакцию фиксирует вызывающий код.
+    """
+    # Серия и статистика пользователя меняются: его чтения после commit — с primary
+    mark_user_write(db, user_id)
+    row = None
+    streak_touched = False
+    for day, count in sorted(counts.items()):
+        if count <= 0:
+            continue
+        row = db.execute(_activity_statement(user_id, day, count)).one()
+        streak_touched = streak_touched or _streak_may_change(row, day, count)
+    if row is None:
+        return None
+
+    summary = summarize(row, datetime.utcnow().date())
+    db.execute(_projection_statement(user_id, summary))
+    if streak_touched:
+        record_event(db, StreakChanged(user_id=user_id, streak=summary.streak))
+    return summary
+
+
+async def record_activity_days_async(
+    db: AsyncSession, user_id: int, counts: Dict[date, int]
+) -> Optional[ActivitySummary]:
+    """Async-вариант record_activity_days"""
+    mark_user_write(db, user_id)
+    row = None
+    streak_touched = False
+    for day, count in sorted(counts.items()):
+        if count <= 0:
+            continue
+        row = (await db.execute(_activity_statement(user_id, day, count))).one()
+        streak_touched = streak_touched or _streak_may_change(row, day, count)
+    if row is None:
+        return None
+
+    summary = summarize(row, datetime.utcnow().date())
+    await db.execute(_projection_statement(user_id, summary))
+    if streak_touched:
+        await record_event_async(db, StreakChanged(user_id=user_id, streak=summary.streak))
+    return summary
+
+
+def record_activity(db: Session, user_id: int, events: Iterable[Event]) -> Optional[ActivitySummary]:
+    """Отмечает сегодняшнюю (UTC) активность по событиям записи"""
+    return record_activity_days(db, user_id, {datetime.utcnow().date(): activity_count(events)})
+
+
+async def record_activity_async(db: AsyncSession, user_id: int, events: Iterable[Event]) -> Optional[ActivitySummary]:
+    """Async-вариант record_activity"""
+    return await record_activity_days_async(db, user_id, {datetime.utcnow().date(): activity_count(events)})
+
+
+def get_activity_summary(db: Session, user_id: int) -> ActivitySummary:
+    row = db.execute(select(*_activity_columns()).where(UserActivity.user_id == user_id)).first()
+    return summarize(row, datetime.utcnow().date())
+
+
+def rollover(db: Session, today: Optional[date] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Ночной проход: обнуляет completed_today у всех, кто ещё не действовал
+    сегодня, и серию у пропустивших вчерашний день. Пользователи
+    обрабатываются диапазонами id по batch_size, каждый диапазон — два
+    UPDATE в отдельной транзакции. Возвращает число изменённых пользователей.
+    """
+    today = today or datetime.utcnow().date()
+    yesterday = today - timedelta(days=1)
+    batch_size = batch_size or settings.ACTIVITY_ROLLOVER_BATCH_SIZE
+    last_day = func.coalesce(
+        select(UserActivity.last_day).where(UserActivity.user_id == User.id).scalar_subquery(),
+        _NEVER
+    )
+    streak = func.coalesce(User.streak, 0)
+    completed_today = func.coalesce(User.completed_today, 0)
+
+    changed = 0
+    after_id = 0
+    while True:
+        batch = select(User.id).where(User.id > after_id).order_by(User.id).limit(batch_size).subquery()
+        low, high, count = db.execute(select(func.min(batch.c.id), func.max(batch.c.id), func.count())).one()
+        if not count:
+            return changed
+        in_batch = User.id.between(low, high)
+
+        changed += db.execute(
+            update(User)
+            .where(
+                in_batch,
+                or_(
+                    and_(streak != 0, last_day < yesterday),
+                    and_(completed_today != 0, last_day < today)
+                )
+            )
+            .values(
+                streak=case((last_day < yesterday, 0), else_=streak),
+                completed_today=case((last_day < today, 0), else_=completed_today)
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        # Счётчик серии для достижений следует за users.streak
+        user_streak = select(func.coalesce(User.streak, 0)).where(
+            User.id == UserAchievementCounters.user_id
+        ).scalar_subquery()
+        db.execute(
+            update(UserAchievementCounters)
+            .where(UserAchievementCounters.user_id.between(low, high), UserAchievementCounters.streak != user_streak)
+            .values(streak=user_streak)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        after_id = high
+
+
+class ActivityRollover:
+    """Фоновый поток, запускающий rollover сразу после полуночи UTC"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _seconds_until_midnight() -> float:
+        now = datetime.utcnow()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        return (midnight - now).total_seconds() + 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._seconds_until_midnight()):
+            db = SessionLocal()
+            try:
+                changed = rollover(db)
+                logger.info("Activity rollover updated %d users", changed)
+            except Exception:
+                logger.exception("Activity rollover failed")
+                db.rollback()
+            finally:
+                db.close()
+
+    def start(self) -> None:
+        if self._thread is None and self.enabled:
+            self._thread = threading.Thread(target=self._run, name="activity-rollover", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+activity_rollover = ActivityRollover(settings.ACTIVITY_ROLLOVER_ENABLED)
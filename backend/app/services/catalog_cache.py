@@ -0,0 +1,208 @@
+"""
+Read-through кэш каталога (категории, курсы, уроки, блоки).
+
+Хранит уже сериализованные JSON-ответы вместе с ETag. Согласованность между воркерами
+обеспечивает счётчик catalog_version в БД: он увеличивается при любой
+записи контента, а каждый воркер не чаще раз в
+CATALOG_VERSION_CHECK_SECONDS сверяет его и сбрасывает кэш при изменении.
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Category, Course, Lesson, Block, CatalogVersion
+from app.utils.compression import SUPPORTED_ENCODINGS, compress, negotiate_encoding, representation_etag
+from app.utils.lru_cache import LRUCache
+
+CATALOG_MODELS = (Category, Course, Lesson, Block)
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+@dataclass(frozen=True)
+class CompiledPayload:
+    """
+    Неизменяемый сериализованный ответ и его сильный ETag (хэш содержимого).
+    Сжатые варианты тела вычисляются один раз на кодировку и живут
+    вместе с записью кэша; у каждого свой сильный ETag ("<hash>-gzip").
+    """
+    body: bytes
+    etag: str
+    _encoded: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CompiledPayload":
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+
+def compile_payload(schema: Any, obj: Any) -> CompiledPayload:
+    """Валидирует ORM-объекты схемой ответа и компилирует в JSON с ETag"""
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    return CompiledPayload.from_body(adapter.dump_json(adapter.validate_python(obj, from_attributes=True)))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Подходит тег любого представления того же содержимого; If-None-Match
+    # сравнивается слабо: W/"x" совпадает с "x"
+    representations = {etag, *(representation_etag(etag, encoding) for encoding in SUPPORTED_ENCODINGS)}
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") in representations for tag in candidates)
+
+
+def payload_response(request: Request, payload: CompiledPayload) -> Response:
+    """
+    Отдаёт скомпилированный ответ или 304, если у клиента актуальная версия.
+    Крупные ответы отдаются заранее сжатыми (CompressionMiddleware их не трогает).
+    """
+    encoding = None
+    headers = {"Cache-Control": "no-cache"}
+    if settings.COMPRESSION_ENABLED and len(payload.body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        # Представление зависит от Accept-Encoding, даже если выбрано несжатое
+        headers["Vary"] = "Accept-Encoding"
+
+    headers["ETag"] = representation_etag(payload.etag, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+
+    if _etag_matches(request.headers.get("if-none-match"), payload.etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    body = payload.body if encoding is None else payload.encoded(encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class CatalogCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        version_check_seconds: float,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.version_check_seconds = version_check_seconds
+        self.version: Optional[int] = None
+        self.invalidations = 0
+        self._entries = LRUCache(max_entries, ttl_seconds)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _version_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.version_check_seconds
+
+    def _apply_version(self, version: Optional[int]) -> None:
+        version = version or 0
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version != self.version:
+                if self.version is not None:
+                    self.invalidations += 1
+                self.version = version
+                self._entries.clear()
+
+    def sync_version(self, db: Session) -> None:
+        if self._version_due():
+            self._apply_version(db.scalar(_version_statement()))
+
+    async def sync_version_async(self, db: AsyncSession) -> None:
+        if self._version_due():
+            self._apply_version(await db.scalar(_version_statement()))
+
+    def get_or_load(self, db: Session, key: Hashable, loader: Callable[[], CompiledPayload]) -> CompiledPayload:
+        """Возвращает закэшированный ответ или вызывает loader и кэширует результат"""
+        if not self.enabled:
+            return loader()
+        self.sync_version(db)
+        value = self._entries.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    async def get_or_load_async(self, db: AsyncSession, key: Hashable, loader) -> CompiledPayload:
+        """Async-вариант get_or_load; loader — корутинная функция"""
+        if not self.enabled:
+            return await loader()
+        await self.sync_version_async(db)
+        value = self._entries.get(key)
+        if value is None:
+            value = await loader()
+            self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Optional[CompiledPayload]) -> None:
+        if self.enabled and value is not None:
+            self._entries.set(key, value)
+
+    def invalidate(self) -> None:
+        """Сбрасывает локальный кэш (другие воркеры узнают о смене по версии)"""
+        with self._lock:
+            self._entries.clear()
+            self._checked_at = 0.0
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._entries.stats(),
+            "enabled": self.enabled,
+            "version": self.version,
+            "invalidations": self.invalidations,
+        }
+
+
+def _version_statement():
+    return select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+
+def _bump_statement():
+    stmt = pg_insert(CatalogVersion).values(id=1, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.id],
+        set_={"version": CatalogVersion.version + 1}
+    )
+
+
+catalog_cache = CatalogCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    version_check_seconds=settings.CATALOG_VERSION_CHECK_SECONDS,
+    enabled=settings.CATALOG_CACHE_ENABLED,
+)
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Увеличивает версию каталога; вызывать в транзакции, меняющей контент"""
+    db.execute(_bump_statement())
+    catalog_cache.invalidate()
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_catalog_change(session: Session, flush_context) -> None:
+    # Любая ORM-запись категорий/курсов/уроков/блоков инвалидирует кэш
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, CATALOG_MODELS) for obj in changed):
+        session.connection().execute(_bump_statement())
+        catalog_cache.invalidate()
@@ -1,38 +1,133 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List
-from app.models import Course, Lesson, Block, UserCourse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, select
+from typing import Optional, List, Dict, Tuple, Type
+from app.models import Course, Lesson, Block, UserCourse, UserProgress
+from app.schemas.course import CourseResponse, CourseSummary
+from app.services.catalog_cache import CompiledPayload
+from app.utils.lru_cache import LRUCache
 
+COURSE_FIELDS = tuple(CourseResponse.model_fields)
+SUMMARY_FIELDS = tuple(CourseSummary.model_fields)
 
-def get_course_progress(db: Session, user_id: int, course_id: str) -> float:
+# Сериализаторы для ?fields=: сочетаний полей много, храним последние
+_field_adapters = LRUCache(max_entries=64)
+
+
+def parse_course_fields(fields: Optional[str]) -> Tuple[str, ...]:
     """
-    Рассчитывает прогресс пользователя по курсу в процентах
+    Поля списка курсов из ?fields=title,level,... в порядке CourseResponse;
+    course_id включается всегда. Без параметра — поля CourseSummary, "*" —
+    все поля. Неизвестное поле — ValueError.
     """
-    # Получаем все уроки курса
-    lessons = db.query(Lesson).filter(Lesson.course_id == course_id).all()
+    if not fields:
+        return SUMMARY_FIELDS
+    if fields.strip() == "*":
+        return COURSE_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(COURSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown course fields: {', '.join(sorted(unknown))}")
+    requested.add("course_id")
+    selected = tuple(name for name in COURSE_FIELDS if name in requested)
+    # Тот же набор, что у сводки, — тот же ключ кэша и схема
+    return SUMMARY_FIELDS if set(selected) == set(SUMMARY_FIELDS) else selected
+
+
+def courses_list_statement(fields: Tuple[str, ...], category_id: Optional[str] = None):
+    """Выборка курсов для списка: загружаются только колонки запрошенных полей"""
+    columns = [getattr(Course, name) for name in fields if name in Course.__table__.c]
+    stmt = select(Course).options(load_only(*columns))
+    if "category" in fields:
+        stmt = stmt.options(selectinload(Course.category))
+    if category_id:
+        stmt = stmt.where(Course.category_id == category_id)
+    return stmt
+
+
+def _fields_schema(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    if fields == SUMMARY_FIELDS:
+        return CourseSummary
+    if fields == COURSE_FIELDS:
+        return CourseResponse
+    return create_model(
+        "CourseFields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (CourseResponse.model_fields[name].annotation, CourseResponse.model_fields[name]) for name in fields}
+    )
+
+
+def compile_courses(fields: Tuple[str, ...], courses: List[Course]) -> CompiledPayload:
+    """Сериализует список курсов только с полями fields (как compile_payload)"""
+    adapter = _field_adapters.get(fields)
+    if adapter is None:
+        adapter = TypeAdapter(List[_fields_schema(fields)])
+        _field_adapters.set(fields, adapter)
+    return CompiledPayload.from_body(adapter.dump_json(adapter.validate_python(courses, from_attributes=True)))
 
-    if not lessons:
-        return 0.0
 
-    total_blocks = 0
-    completed_blocks = 0
+def _courses_progress_statement(user_id: int, course_ids: Optional[List[str]]):
+    completed = func.count(UserProgress.block_id.distinct())
+    stmt = (
+        select(Lesson.course_id, func.count(Block.id.distinct()), completed)
+        .select_from(Block)
+        .join(Lesson, Lesson.id == Block.lesson_id)
+        .outerjoin(UserProgress, and_(
+            UserProgress.block_id == Block.id,
+            UserProgress.user_id == user_id
+        ))
+        .group_by(Lesson.course_id)
+    )
 
-    for lesson in lessons:
-        blocks = db.query(Block).filter(Block.lesson_id == lesson.id).all()
-        total_blocks += len(blocks)
+    if course_ids is None:
+        enrolled = select(UserCourse.course_id).where(UserCourse.user_id == user_id)
+        return stmt.where(Lesson.course_id.in_(enrolled))
+    return stmt.where(Lesson.course_id.in_(course_ids))
 
-        for block in blocks:
-            from app.models import UserProgress
-            progress = db.query(UserProgress).filter(
-                UserProgress.user_id == user_id,
-                UserProgress.block_id == block.id
-            ).first()
-            if progress:
-                completed_blocks += 1
 
-    if total_blocks == 0:
-        return 0.0
+def _progress_percentages(rows, course_ids: Optional[List[str]]) -> Dict[str, float]:
+    # Курсы без блоков в выборку не попадают, для них прогресс 0
+    result = {course_id: 0.0 for course_id in course_ids or []}
+    for course_id, total_blocks, completed_blocks in rows:
+        if total_blocks:
+            # Ограничиваем прогресс до 100%
+            result[course_id] = min((completed_blocks / total_blocks) * 100, 100.0)
+        else:
+            result[course_id] = 0.0
+    return result
 
-    progress = (completed_blocks / total_blocks) * 100
-    # Ограничиваем прогресс до 100%
-    return min(progress, 100.0)
 
+def get_courses_progress(
+    db: Session,
+    user_id: int,
+    course_ids: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """
+    Рассчитывает прогресс пользователя (в процентах) сразу по нескольким
+    курсам одним агрегирующим запросом. Без course_ids берутся курсы,
+    на которые записан пользователь.
+    """
+    if course_ids is not None and not course_ids:
+        return {}
+    rows = db.execute(_courses_progress_statement(user_id, course_ids)).all()
+    return _progress_percentages(rows, course_ids)
+
+
+async def get_courses_progress_async(
+    db: AsyncSession,
+    user_id: int,
+    course_ids: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """Async-вариант get_courses_progress"""
+    if course_ids is not None and not course_ids:
+        return {}
+    rows = (await db.execute(_courses_progress_statement(user_id, course_ids))).all()
+    return _progress_percentages(rows, course_ids)
+
+
+def get_course_progress(db: Session, user_id: int, course_id: str) -> float:
+    """
+    Рассчитывает прогресс пользователя по курсу в процентах
+    """
+    return get_courses_progress(db, user_id, [course_id])[course_id]
@@ -0,0 +1,49 @@
+"""
+Типизированные события записи, на которые реагируют подсистемы
+(достижения и т.д.) вместо полного пересчёта после каждого запроса.
+"""
+from dataclasses import dataclass
+from typing import ClassVar, Tuple
+
+
+@dataclass(frozen=True)
+class BlockCompleted:
+    """
+    Пользователь впервые завершил блоки одного урока. Если одним запросом
+    вставлены блоки нескольких уроков, batch_block_ids — все вставленные
+    блоки, а новизну урока и курса учитывает только первое событие пачки
+    по этому уроку/курсу (count_lesson/count_course).
+    """
+    name: ClassVar[str] = "block_completed"
+
+    user_id: int
+    lesson_id: str
+    course_id: str
+    block_ids: Tuple[str, ...]
+    batch_block_ids: Tuple[str, ...] = ()
+    count_lesson: bool = True
+    count_course: bool = True
+
+
+@dataclass(frozen=True)
+class AnswerSubmitted:
+    """Ответ на карточку тренировки"""
+    name: ClassVar[str] = "answer_submitted"
+
+    user_id: int
+    block_id: str
+    is_correct: bool
+    is_new_card: bool
+    previous_mistakes: int
+
+
+@dataclass(frozen=True)
+class StreakChanged:
+    """Изменилась длина серии дней подряд"""
+    name: ClassVar[str] = "streak_changed"
+
+    user_id: int
+    streak: int
+
+
+Event = BlockCompleted | AnswerSubmitted | StreakChanged
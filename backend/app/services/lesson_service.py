@@ -0,0 +1,49 @@
+from typing import Optional
+from sqlalchemy.orm import Session, selectinload
+from app.models import Lesson
+from app.schemas.lesson import LessonResponse
+from app.schemas.block import to_block_response
+from app.services.catalog_cache import catalog_cache, compile_payload, CompiledPayload
+
+
+def _lesson_key(lesson_id: str):
+    return ("lesson", lesson_id)
+
+
+def compile_lesson(lesson: Lesson) -> CompiledPayload:
+    """Компилирует урок с блоками в неизменяемый JSON с ETag"""
+    lesson_response = LessonResponse(
+        id=lesson.id,
+        course_id=lesson.course_id,
+        order=lesson.order,
+        title=lesson.title,
+        description=lesson.description,
+        blocks=[to_block_response(block) for block in lesson.blocks]
+    )
+    return compile_payload(LessonResponse, lesson_response)
+
+
+def get_lesson_payload(db: Session, lesson_id: str) -> Optional[CompiledPayload]:
+    """Скомпилированный урок из кэша каталога (None, если урока нет)"""
+    def load() -> Optional[CompiledPayload]:
+        lesson = (
+            db.query(Lesson)
+            .options(selectinload(Lesson.blocks))
+            .filter(Lesson.id == lesson_id)
+            .first()
+        )
+        return compile_lesson(lesson) if lesson else None
+
+    return catalog_cache.get_or_load(db, _lesson_key(lesson_id), load)
+
+
+def precompile_lessons(db: Session) -> int:
+    """
+    Компилирует все уроки двумя запросами и кладёт их в кэш каталога,
+    чтобы первые открытия уроков не платили за сериализацию
+    """
+    catalog_cache.sync_version(db)
+    lessons = db.query(Lesson).options(selectinload(Lesson.blocks)).all()
+    for lesson in lessons:
+        catalog_cache.put(_lesson_key(lesson.id), compile_lesson(lesson))
+    return len(lessons)
@@ -0,0 +1,126 @@
+"""
+Кэш проверенных субъектов (principal) для access-токенов.
+
+Ключ — jti токена, TTL записи не больше оставшегося времени жизни токена
+и AUTH_PRINCIPAL_CACHE_TTL_SECONDS. Смена пароля или деактивация
+увеличивают users.token_version: токены со старой версией (claim "ver")
+перестают приниматься. В текущем воркере это происходит сразу, в
+остальных — не позже чем через AUTH_PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User
+from app.utils.lru_cache import LRUCache
+
+# Изменение этих полей отзывает все токены пользователя
+REVOKING_FIELDS = ("hashed_password", "is_active")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Проверенный владелец access-токена"""
+    user_id: int
+    email: str
+    token_version: int
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        # user_id -> минимальная действующая token_version, известная этому воркеру
+        self._min_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.revocations = 0
+        self.stale_hits = 0
+
+    def get(self, payload: Dict[str, Any]) -> Optional[Principal]:
+        jti = payload.get("jti")
+        if not self.enabled or jti is None:
+            return None
+
+        principal = self._cache.get(jti)
+        if principal is None:
+            return None
+        if principal.token_version < self._min_versions.get(principal.user_id, 0):
+            self._cache.delete(jti)
+            self.stale_hits += 1
+            return None
+        return principal
+
+    def put(self, payload: Dict[str, Any], user: User) -> Principal:
+        principal = Principal(user_id=user.id, email=user.email, token_version=user.token_version)
+        jti = payload.get("jti")
+        remaining = payload.get("exp", 0) - time.time()
+        if self.enabled and jti is not None and remaining > 0:
+            self._cache.set(jti, principal, ttl_seconds=min(self.ttl_seconds, remaining))
+        return principal
+
+    def revoke_user(self, user_id: int, token_version: int) -> None:
+        """Отклонять закэшированные токены пользователя с версией ниже token_version"""
+        with self._lock:
+            if token_version > self._min_versions.get(user_id, 0):
+                self._min_versions[user_id] = token_version
+                self.revocations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        # Отозванные записи находятся в LRU, но для вызывающего это промах
+        hits = stats["hits"] - self.stale_hits
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "enabled": self.enabled,
+            "revoked_users": len(self._min_versions),
+            "revocations": self.revocations,
+            "stale_hits": self.stale_hits,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    enabled=settings.AUTH_PRINCIPAL_CACHE_ENABLED,
+)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_token_version(session: Session, flush_context, instances) -> None:
+    # Смена пароля или деактивация отзывают все выданные токены пользователя
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in REVOKING_FIELDS):
+            obj.token_version = (obj.token_version or 0) + 1
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_revocations(session: Session, flush_context) -> None:
+    # Отзыв применяется только после commit: откат не должен отзывать токены
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.token_version.history.has_changes():
+            revoked = session.info.setdefault("revoked_principals", {})
+            revoked[obj.id] = max(obj.token_version, revoked.get(obj.id, 0))
+
+
+@event.listens_for(Session, "after_commit")
+def _revoke_cached_principals(session: Session) -> None:
+    for user_id, token_version in session.info.pop("revoked_principals", {}).items():
+        principal_cache.revoke_user(user_id, token_version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revocations(session: Session) -> None:
+    session.info.pop("revoked_principals", None)
@@ -0,0 +1,112 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models import UserProgress, Block, Lesson
+from app.services.events import BlockCompleted
+
+
+def _complete_block_statement(user_id: int, block_id: str, lesson_id: str, course_id: str):
+    return pg_insert(UserProgress).values(
+        user_id=user_id,
+        block_id=block_id,
+        lesson_id=lesson_id,
+        course_id=course_id,
+        completed_at=datetime.utcnow()
+    ).on_conflict_do_nothing(
+        constraint="uq_user_progress_user_block"
+    ).returning(UserProgress.block_id)
+
+
+def _complete_lessons_statement(user_id: int, lesson_ids: List[str]):
+    """
+    INSERT ... SELECT по всем блокам уроков; уже отмеченные блоки
+    пропускаются уникальным ограничением (user_id, block_id).
+    """
+    source = (
+        select(
+            literal(user_id),
+            Block.id,
+            Block.lesson_id,
+            Lesson.course_id,
+            literal(datetime.utcnow())
+        )
+        .join(Lesson, Lesson.id == Block.lesson_id)
+        .where(Block.lesson_id.in_(lesson_ids))
+    )
+    return pg_insert(UserProgress).from_select(
+        ["user_id", "block_id", "lesson_id", "course_id", "completed_at"], source
+    ).on_conflict_do_nothing(
+        constraint="uq_user_progress_user_block"
+    ).returning(UserProgress.block_id, UserProgress.lesson_id, UserProgress.course_id)
+
+
+def completion_events(user_id: int, rows) -> List[BlockCompleted]:
+    """
+    Группирует строки, вставленные одним запросом, в события BlockCompleted
+    по урокам. Новизна урока/курса проверяется по прогрессу до вставки
+    (без всех блоков пачки) и один раз на урок/курс.
+    """
+    by_lesson: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+    for block_id, lesson_id, course_id in rows:
+        by_lesson[(lesson_id, course_id)].append(block_id)
+    batch = tuple(block_id for block_ids in by_lesson.values() for block_id in block_ids)
+
+    events = []
+    lessons, courses = set(), set()
+    for (lesson_id, course_id), block_ids in by_lesson.items():
+        events.append(BlockCompleted(
+            user_id=user_id,
+            lesson_id=lesson_id,
+            course_id=course_id,
+            block_ids=tuple(block_ids),
+            batch_block_ids=batch,
+            count_lesson=lesson_id not in lessons,
+            count_course=course_id not in courses
+        ))
+        lessons.add(lesson_id)
+        courses.add(course_id)
+    return events
+
+
+def complete_block(db: Session, user_id: int, block_id: str, lesson_id: str, course_id: str) -> List[BlockCompleted]:
+    """
+    Отмечает блок выполненным одним INSERT ... ON CONFLICT DO NOTHING.
+    Возвращает событие, если блок отмечен впервые (иначе пустой список).
+    """
+    inserted = db.execute(_complete_block_statement(user_id, block_id, lesson_id, course_id)).first()
+    if inserted is None:
+        return []
+    return [BlockCompleted(user_id=user_id, lesson_id=lesson_id, course_id=course_id, block_ids=(block_id,))]
+
+
+def complete_lessons(db: Session, user_id: int, lesson_ids: List[str]) -> List[BlockCompleted]:
+    """
+    Отмечает все блоки уроков выполненными одним запросом.
+    Возвращает события только по впервые отмеченным блокам.
+    """
+    if not lesson_ids:
+        return []
+    rows = db.execute(_complete_lessons_statement(user_id, lesson_ids)).all()
+    return completion_events(user_id, rows)
+
+
+async def complete_block_async(
+    db: AsyncSession, user_id: int, block_id: str, lesson_id: str, course_id: str
+) -> List[BlockCompleted]:
+    """Async-вариант complete_block"""
+    inserted = (await db.execute(_complete_block_statement(user_id, block_id, lesson_id, course_id))).first()
+    if inserted is None:
+        return []
+    return [BlockCompleted(user_id=user_id, lesson_id=lesson_id, course_id=course_id, block_ids=(block_id,))]
+
+
+async def complete_lessons_async(db: AsyncSession, user_id: int, lesson_ids: List[str]) -> List[BlockCompleted]:
+    """Async-вариант complete_lessons"""
+    if not lesson_ids:
+        return []
+    rows = (await db.execute(_complete_lessons_statement(user_id, lesson_ids))).all()
+    return completion_events(user_id, rows)
@@ -0,0 +1,159 @@
+"""
+Хранилище refresh-токенов.
+
+В БД лежит только SHA-256 токена (32 байта) — поиск идёт по
+фиксированному ключу, а не по строке JWT. Токены, полученные ротацией
+одного входа, образуют семейство: повторное предъявление уже
+использованного токена отзывает всё семейство одним UPDATE.
+Просроченные и давно отозванные строки удаляются фоновой очисткой пачками.
+"""
+import hashlib
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import RefreshToken
+from app.utils.jwt import create_refresh_token
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenReused(Exception):
+    """Предъявлен уже отозванный токен: семейство отозвано целиком"""
+
+
+def hash_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def issue_refresh_token(db: Session, user_id: int, claims: Dict, family_id: Optional[str] = None) -> str:
+    """
+    Выпускает refresh-токен и сохраняет его хэш. Без family_id
+    начинается новое семейство (вход/регистрация). Транзакцию
+    фиксирует вызывающий код.
+    """
+    token = create_refresh_token(data=claims)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        is_revoked=False
+    ))
+    return token
+
+
+def consume_refresh_token(db: Session, token: str, user_id: int) -> Optional[str]:
+    """
+    Атомарно отзывает действующий токен и возвращает id его семейства.
+    Один UPDATE ... RETURNING: два параллельных запроса с одним токеном
+    не могут оба пройти. None — токен не найден или просрочен.
+    Повторное использование отозванного токена отзывает семейство и
+    поднимает RefreshTokenReused.
+    """
+    now = datetime.now(timezone.utc)
+    token_hash = hash_token(token)
+
+    family_id = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.user_id == user_id,
+            RefreshToken.is_revoked == False,
+            RefreshToken.expires_at > now
+        )
+        .values(is_revoked=True, revoked_at=now)
+        .returning(RefreshToken.family_id)
+    ).scalar()
+    if family_id is not None:
+        return family_id
+
+    reused_family = db.execute(
+        select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.user_id == user_id,
+            RefreshToken.is_revoked == True
+        )
+    ).scalar()
+    if reused_family is not None:
+        revoke_family(db, reused_family)
+        # Отзыв должен сохраниться, хотя запрос завершится ошибкой
+        db.commit()
+        raise RefreshTokenReused()
+    return None
+
+
+def revoke_family(db: Session, family_id: str) -> int:
+    """Отзывает все действующие токены семейства одним запросом"""
+    return db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.is_revoked == False)
+        .values(is_revoked=True, revoked_at=datetime.now(timezone.utc))
+    ).rowcount
+
+
+def prune_refresh_tokens(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Удаляет просроченные токены и токены, отозванные раньше окна
+    обнаружения повторного использования. Каждая пачка — отдельная
+    короткая транзакция; SKIP LOCKED позволяет нескольким воркерам
+    чистить таблицу одновременно. Возвращает число удалённых строк.
+    """
+    batch_size = batch_size or settings.REFRESH_TOKEN_PRUNE_BATCH_SIZE
+    now = datetime.now(timezone.utc)
+    revoked_before = now - timedelta(hours=settings.REFRESH_TOKEN_REVOKED_RETENTION_HOURS)
+
+    batch = (
+        select(RefreshToken.id)
+        .where(or_(RefreshToken.expires_at < now, RefreshToken.revoked_at < revoked_before))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+    total = 0
+    while True:
+        deleted = db.execute(delete(RefreshToken).where(RefreshToken.id.in_(batch.scalar_subquery()))).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+class RefreshTokenPruner:
+    """Фоновый поток, периодически вызывающий prune_refresh_tokens"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            db = SessionLocal()
+            try:
+                deleted = prune_refresh_tokens(db)
+                if deleted:
+                    logger.info("Pruned %d refresh tokens", deleted)
+            except Exception:
+                logger.exception("Refresh token pruning failed")
+                db.rollback()
+            finally:
+                db.close()
+
+    def start(self) -> None:
+        if self._thread is None and self.interval_seconds > 0:
+            self._thread = threading.Thread(target=self._run, name="refresh-token-pruner", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+refresh_token_pruner = RefreshTokenPruner(settings.REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS)
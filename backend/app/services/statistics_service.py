@@ -0,0 +1,246 @@
+"""
+Денормализованная статистика пользователя (user_statistics).
+
+Записи прогресса и ответов обновляют счётчики одним UPSERT в своей же
+транзакции, поэтому /user/statistics читает одну строку независимо от
+объёма истории. rebuild_statistics пересобирает счётчики из
+user_progress и repetition_data пачками пользователей (сверка после
+массовой загрузки или сбоев).
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence
+from sqlalchemy import Date, Float, and_, case, cast, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models import Block, RepetitionData, User, UserProgress, UserStatistics
+from app.services.events import AnswerSubmitted, BlockCompleted, Event
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _lesson_completed(event: BlockCompleted):
+    """
+    1, если после вставки блоков события урок пройден целиком. Блоки
+    события только что вставлены, значит раньше урок пройден не был.
+    """
+    done = select(func.count(UserProgress.id)).where(
+        UserProgress.user_id == event.user_id,
+        UserProgress.lesson_id == event.lesson_id
+    ).scalar_subquery()
+    size = select(func.count(Block.id)).where(Block.lesson_id == event.lesson_id).scalar_subquery()
+    return case((done >= size, 1), else_=0)
+
+
+def _statistics_increments(events: Iterable[Event]) -> Dict[str, object]:
+    """Суммарные приращения счётчиков по событиям; могут быть SQL-выражениями"""
+    increments: Dict[str, object] = {}
+
+    def add(field: str, delta) -> None:
+        if isinstance(delta, int) and delta == 0:
+            return
+        increments[field] = increments[field] + delta if field in increments else delta
+
+    for event in events:
+        if isinstance(event, BlockCompleted):
+            # Урок, повторённый в пачке, засчитывается один раз
+            if event.count_lesson:
+                add("total_lessons", _lesson_completed(event))
+        elif isinstance(event, AnswerSubmitted):
+            add("total_cards_reviewed", int(event.is_new_card))
+            add("answers_correct", int(event.is_correct))
+            add("answers_wrong", int(not event.is_correct))
+    return increments
+
+
+def _accuracy(correct, wrong):
+    return func.coalesce(100.0 * correct / func.nullif(correct + wrong, 0), 0.0)
+
+
+def _statistics_statement(user_id: int, increments: Dict[str, object], active_days: Sequence[date]):
+    """
+    Один UPSERT строки статистики. Новый день активности — дата позже
+    last_active_on (ответы офлайн-синхронизации могут принести несколько дат).
+    """
+    table = UserStatistics.__table__
+    days = sorted(set(active_days))
+    answers = {field: increments.get(field, 0) for field in ("answers_correct", "answers_wrong")}
+
+    stmt = pg_insert(UserStatistics).values(
+        user_id=user_id,
+        **increments,
+        average_accuracy=_accuracy(cast(answers["answers_correct"], Float), answers["answers_wrong"]),
+        days_learning=len(days),
+        last_active_on=days[-1] if days else None
+    )
+
+    set_ = {field: table.c[field] + stmt.excluded[field] for field in increments}
+    if days:
+        set_["days_learning"] = table.c.days_learning + sum(
+            case((or_(table.c.last_active_on.is_(None), table.c.last_active_on < day), 1), else_=0)
+            for day in days
+        )
+        set_["last_active_on"] = func.greatest(table.c.last_active_on, stmt.excluded.last_active_on)
+    if any(answers.values()):
+        set_["average_accuracy"] = _accuracy(
+            cast(table.c.answers_correct + stmt.excluded.answers_correct, Float),
+            table.c.answers_wrong + stmt.excluded.answers_wrong
+        )
+    set_["updated_at"] = func.now()
+
+    return stmt.on_conflict_do_update(index_elements=[UserStatistics.user_id], set_=set_)
+
+
+def record_statistics(
+    db: Session,
+    user_id: int,
+    events: Iterable[Event],
+    active_days: Optional[Sequence[date]] = None
+) -> None:
+    """
+    Обновляет статистику по событиям записи одним запросом. active_days —
+    даты активности (по умолчанию сегодня по UTC). Транзакцию фиксирует
+    вызывающий код.
+    """
+    increments = _statistics_increments(events)
+    if not increments:
+        return
+    db.execute(_statistics_statement(user_id, increments, active_days or [datetime.utcnow().date()]))
+
+
+async def record_statistics_async(
+    db: AsyncSession,
+    user_id: int,
+    events: Iterable[Event],
+    active_days: Optional[Sequence[date]] = None
+) -> None:
+    """Async-вариант record_statistics"""
+    increments = _statistics_increments(events)
+    if not increments:
+        return
+    await db.execute(_statistics_statement(user_id, increments, active_days or [datetime.utcnow().date()]))
+
+
+def _rebuild_source(user_filter):
+    """
+    Счётчики, заново посчитанные из исходных таблиц, по пользователям
+    user_filter. Ошибочные ответы точны (mistakes не сбрасывается);
+    верные ответы и дни активности — нижние оценки: repetition_data
+    хранит только последнее повторение.
+    """
+    done = (
+        select(UserProgress.user_id, UserProgress.lesson_id, func.count().label("done"))
+        .where(user_filter(UserProgress.user_id))
+        .group_by(UserProgress.user_id, UserProgress.lesson_id)
+        .subquery()
+    )
+    sizes = select(Block.lesson_id, func.count().label("size")).group_by(Block.lesson_id).subquery()
+    lessons = (
+        select(done.c.user_id, func.count().label("lessons"))
+        .join_from(done, sizes, sizes.c.lesson_id == done.c.lesson_id)
+        .where(done.c.done >= sizes.c.size)
+        .group_by(done.c.user_id)
+        .subquery()
+    )
+
+    cards = (
+        select(
+            RepetitionData.user_id,
+            func.count().label("cards"),
+            func.count().filter(func.coalesce(RepetitionData.needs_review, False) == False).label("correct"),
+            func.sum(func.coalesce(RepetitionData.mistakes, 0)).label("wrong")
+        )
+        .where(user_filter(RepetitionData.user_id))
+        .group_by(RepetitionData.user_id)
+        .subquery()
+    )
+
+    activity = union_all(
+        select(UserProgress.user_id, cast(UserProgress.completed_at, Date).label("day"))
+        .where(user_filter(UserProgress.user_id)),
+        select(RepetitionData.user_id, cast(RepetitionData.last_review, Date))
+        .where(user_filter(RepetitionData.user_id), RepetitionData.last_review.isnot(None))
+    ).subquery()
+    days = (
+        select(
+            activity.c.user_id,
+            func.count(activity.c.day.distinct()).label("days"),
+            func.max(activity.c.day).label("last_day")
+        )
+        .group_by(activity.c.user_id)
+        .subquery()
+    )
+
+    correct = func.coalesce(cards.c.correct, 0)
+    wrong = func.coalesce(cards.c.wrong, 0)
+    return (
+        select(
+            User.id,
+            func.coalesce(lessons.c.lessons, 0),
+            func.coalesce(cards.c.cards, 0),
+            correct,
+            wrong,
+            _accuracy(cast(correct, Float), wrong),
+            func.coalesce(days.c.days, 0),
+            days.c.last_day
+        )
+        .outerjoin(lessons, lessons.c.user_id == User.id)
+        .outerjoin(cards, cards.c.user_id == User.id)
+        .outerjoin(days, days.c.user_id == User.id)
+        .where(user_filter(User.id))
+    )
+
+
+def _rebuild_statement(user_filter):
+    table = UserStatistics.__table__
+    stmt = pg_insert(UserStatistics).from_select(
+        [
+            "user_id", "total_lessons", "total_cards_reviewed", "answers_correct", "answers_wrong",
+            "average_accuracy", "days_learning", "last_active_on"
+        ],
+        _rebuild_source(user_filter)
+    )
+    # Невосстановимые счётчики не уменьшаются: инкрементальные значения точнее
+    correct = func.greatest(table.c.answers_correct, stmt.excluded.answers_correct)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStatistics.user_id],
+        set_={
+            "total_lessons": stmt.excluded.total_lessons,
+            "total_cards_reviewed": stmt.excluded.total_cards_reviewed,
+            "answers_wrong": stmt.excluded.answers_wrong,
+            "answers_correct": correct,
+            "average_accuracy": _accuracy(cast(correct, Float), stmt.excluded.answers_wrong),
+            "days_learning": func.greatest(table.c.days_learning, stmt.excluded.days_learning),
+            "last_active_on": func.greatest(table.c.last_active_on, stmt.excluded.last_active_on),
+            "updated_at": func.now(),
+        }
+    )
+
+
+def rebuild_statistics(db: Session, user_ids: Optional[Sequence[int]] = None) -> None:
+    """
+    Пересобирает статистику указанных пользователей одним INSERT ... SELECT.
+    Транзакцию фиксирует вызывающий код.
+    """
+    if user_ids is None:
+        db.execute(_rebuild_statement(lambda user_id: literal(True)))
+    elif user_ids:
+        db.execute(_rebuild_statement(lambda user_id: user_id.in_(list(user_ids))))
+
+
+def rebuild_all_statistics(db: Session, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """
+    Сверка всех пользователей пачками по диапазонам id: каждая пачка —
+    отдельная короткая транзакция. Возвращает число обработанных пользователей.
+    """
+    total = 0
+    after_id = 0
+    while True:
+        batch = select(User.id).where(User.id > after_id).order_by(User.id).limit(batch_size).subquery()
+        low, high, count = db.execute(select(func.min(batch.c.id), func.max(batch.c.id), func.count())).one()
+        if not count:
+            return total
+        db.execute(_rebuild_statement(lambda user_id: and_(user_id >= low, user_id <= high)))
+        db.commit()
+        total += count
+        after_id = high
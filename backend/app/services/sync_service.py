@@ -0,0 +1,161 @@
+"""
+Применение пачки офлайн-событий клиента одной транзакцией.
+
+Отметки блоков пишутся одним INSERT ... ON CONFLICT DO NOTHING, ответы
+на карточки воспроизводятся по SM-2 в порядке клиентских временных меток
+и записываются одним UPSERT. Достижения пересчитываются, а статистика
+обновляется один раз в конце.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.database import mark_user_write
+from app.models import UserProgress, RepetitionData
+from app.services.events import AnswerSubmitted, BlockCompleted
+from app.schemas.sync import SyncBlockCompleted, SyncTrainingAnswer, SyncCardState
+from app.services.achievement_service import check_and_unlock_achievements
+from app.services.activity_service import record_activity_days
+from app.services.progress_service import completion_events
+from app.services.statistics_service import record_statistics
+from app.services.training_service import apply_answer, due_queue_statement, resolve_schedulers
+
+REPETITION_FIELDS = (
+    "user_id", "block_id", "lesson_id", "course_id",
+    "last_review", "next_review", "interval", "ease_factor", "needs_review", "mistakes",
+    "stability", "difficulty",
+)
+
+
+def _to_server_time(timestamp: datetime, now: datetime) -> datetime:
+    """Приводит клиентское время к naive UTC и не пускает его в будущее"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(timestamp, now)
+
+
+def _store_completions(
+    db: Session, user_id: int, events: List[SyncBlockCompleted], now: datetime
+) -> List[BlockCompleted]:
+    if not events:
+        return []
+    # Для повторно присланного блока берём самое раннее время выполнения
+    rows: Dict[str, dict] = {}
+    for event in events:
+        rows.setdefault(event.block_id, {
+            "user_id": user_id,
+            "block_id": event.block_id,
+            "lesson_id": event.lesson_id,
+            "course_id": event.course_id,
+            "completed_at": _to_server_time(event.client_timestamp, now),
+        })
+    inserted = db.execute(
+        pg_insert(UserProgress)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(constraint="uq_user_progress_user_block")
+        .returning(UserProgress.block_id, UserProgress.lesson_id, UserProgress.course_id)
+    ).all()
+    return completion_events(user_id, inserted)
+
+
+def _replay_answers(
+    db: Session, user_id: int, events: List[SyncTrainingAnswer], now: datetime
+) -> Tuple[List[RepetitionData], List[AnswerSubmitted]]:
+    if not events:
+        return [], []
+
+    block_ids = {event.block_id for event in events}
+    existing = db.execute(
+        select(*(RepetitionData.__table__.c[field] for field in REPETITION_FIELDS))
+        .where(RepetitionData.user_id == user_id, RepetitionData.block_id.in_(block_ids))
+        .with_for_update()
+    ).mappings().all()
+
+    # Отвязанные от сессии объекты: изменения уходят одним UPSERT, а не flush'ем
+    cards: Dict[str, RepetitionData] = {row["block_id"]: RepetitionData(**row) for row in existing}
+    schedulers = resolve_schedulers(db, user_id, {event.course_id for event in events})
+    answered: List[AnswerSubmitted] = []
+    for event in events:
+        cards[event.block_id], submitted = apply_answer(
+            cards.get(event.block_id),
+            user_id,
+            event.block_id,
+            event.lesson_id,
+            event.course_id,
+            event.is_correct,
+            answered_at=_to_server_time(event.client_timestamp, now),
+            scheduler=schedulers[event.course_id]
+        )
+        answered.append(submitted)
+
+    stmt = pg_insert(RepetitionData).values([
+        {field: getattr(card, field) for field in REPETITION_FIELDS}
+        for card in cards.values()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_repetition_data_user_block",
+        set_={
+            field: stmt.excluded[field]
+            for field in REPETITION_FIELDS[4:]
+        }
+    )
+    db.execute(stmt)
+    db.execute(due_queue_statement(cards.values()))
+    return list(cards.values()), answered
+
+
+def apply_sync_batch(
+    db: Session,
+    user_id: int,
+    events: List[SyncBlockCompleted | SyncTrainingAnswer]
+) -> Tuple[List[str], List[SyncCardState], List[str]]:
+    """
+    Применяет события в порядке клиентских временных меток и фиксирует
+    транзакцию. Возвращает (id отмеченных блоков, состояние затронутых
+    карточек, только что разблокированные достижения).
+    """
+    now = datetime.utcnow()
+    ordered = sorted(events, key=lambda event: _to_server_time(event.client_timestamp, now))
+
+    completions = [event for event in ordered if isinstance(event, SyncBlockCompleted)]
+    answers = [event for event in ordered if isinstance(event, SyncTrainingAnswer)]
+
+    completed = _store_completions(db, user_id, completions, now)
+    cards, answered = _replay_answers(db, user_id, answers, now)
+
+    # Журнал активности — по дням клиентских меток: ответы и впервые отмеченные блоки
+    new_blocks = {block_id for event in completed for block_id in event.block_ids}
+    activity = Counter()
+    for event in ordered:
+        if isinstance(event, SyncBlockCompleted):
+            if event.block_id not in new_blocks:
+                continue
+            new_blocks.discard(event.block_id)
+        activity[_to_server_time(event.client_timestamp, now).date()] += 1
+    record_activity_days(db, user_id, activity)
+
+    # Достижения и статистика обновляются один раз на всю пачку
+    unlocked = check_and_unlock_achievements(db, user_id)
+    record_statistics(
+        db, user_id, [*completed, *answered],
+        active_days=[_to_server_time(event.client_timestamp, now).date() for event in ordered]
+    )
+    mark_user_write(db, user_id)
+    db.commit()
+
+    card_states = [
+        SyncCardState(
+            block_id=card.block_id,
+            last_review=card.last_review,
+            next_review=card.next_review,
+            interval=card.interval,
+            ease_factor=card.ease_factor,
+            needs_review=card.needs_review,
+            mistakes=card.mistakes
+        )
+        for card in cards
+    ]
+    completed_block_ids = list(dict.fromkeys(event.block_id for event in completions))
+    return completed_block_ids, card_states, unlocked
@@ -1,9 +1,93 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List
-from app.models import Block, RepetitionData
-from app.utils.spaced_repetition import calculate_next_review
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, literal_column, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.database import mark_user_write
+from app.models import Block, Course, RepetitionData, User, UserDueCard
+from app.utils.lru_cache import LRUCache
+from app.utils.schedulers import CardState, Scheduler, get_scheduler
+from app.services.achievement_service import record_event, record_event_async
+from app.services.activity_service import record_activity, record_activity_async
+from app.services.statistics_service import record_statistics, record_statistics_async
+from app.services.events import AnswerSubmitted
+
+
+# Сколько карточек берём из каждой группы приоритета
+NEEDS_REVIEW_LIMIT = 5
+DUE_REVIEW_LIMIT = 5
+NEW_CARDS_LIMIT = 2
+
+# Выбранный алгоритм планирования по (user_id, course_id)
+_scheduler_cache = LRUCache(max_entries=10000, ttl_seconds=60)
+
+# Приоритеты очереди user_due_cards
+DUE_PRIORITY_NEEDS_REVIEW = 0
+DUE_PRIORITY_SCHEDULED = 1
+
+
+def _training_candidates(user_id: int, now: datetime):
+    """
+    Собирает id блоков-кандидатов всех трёх приоритетов одним UNION ALL.
+    Повторения берутся из очереди user_due_cards (range scan по индексу
+    очереди), новые карточки — через anti-join (NOT EXISTS), без выгрузки
+    всех block_id пользователя в Python.
+    """
+    needs_review = (
+        select(UserDueCard.block_id, literal_column("1").label("priority"))
+        .where(
+            UserDueCard.user_id == user_id,
+            UserDueCard.priority == DUE_PRIORITY_NEEDS_REVIEW
+        )
+        .order_by(UserDueCard.due_at)
+        .limit(NEEDS_REVIEW_LIMIT)
+        .subquery()
+    )
+
+    # Самые просроченные первыми
+    due_review = (
+        select(UserDueCard.block_id, literal_column("2").label("priority"))
+        .where(
+            UserDueCard.user_id == user_id,
+            UserDueCard.priority == DUE_PRIORITY_SCHEDULED,
+            UserDueCard.due_at <= now
+        )
+        .order_by(UserDueCard.due_at)
+        .limit(DUE_REVIEW_LIMIT)
+        .subquery()
+    )
+
+    already_seen = (
+        select(RepetitionData.id)
+        .where(
+            RepetitionData.user_id == user_id,
+            RepetitionData.block_id == Block.id
+        )
+        .exists()
+    )
+    new_cards = (
+        select(Block.id.label("block_id"), literal_column("3").label("priority"))
+        .where(~already_seen)
+        .limit(NEW_CARDS_LIMIT)
+        .subquery()
+    )
+
+    return union_all(
+        select(needs_review.c.block_id, needs_review.c.priority),
+        select(due_review.c.block_id, due_review.c.priority),
+        select(new_cards.c.block_id, new_cards.c.priority),
+    ).subquery()
+
+
+def _training_cards_statement(user_id: int, limit: int):
+    candidates = _training_candidates(user_id, datetime.utcnow())
+    return (
+        select(Block)
+        .join(candidates, candidates.c.block_id == Block.id)
+        .order_by(candidates.c.priority)
+        .limit(limit)
+    )
 
 
 def get_cards_for_training(db: Session, user_id: int, limit: int = 10) -> List[Block]:
@@ -12,73 +96,180 @@ def get_cards_for_training(db: Session, user_id: int, limit: int = 10) -> List[B
     1. needs_review = true
     2. наступило время повторения
     3. новые карточки
+
+    Все три группы выбираются одним запросом вместе с полными строками Block.
     """
-    now = datetime.utcnow()
-    cards: List[Block] = []
-    
-    # Приоритет 1: needs_review = true
-    needs_review_data = db.query(RepetitionData).filter(
-        and_(
-            RepetitionData.user_id == user_id,
-            RepetitionData.needs_review == True
+    return list(db.scalars(_training_cards_statement(user_id, limit)))
+
+
+async def get_cards_for_training_async(db: AsyncSession, user_id: int, limit: int = 10) -> List[Block]:
+    """Async-вариант get_cards_for_training"""
+    return list(await db.scalars(_training_cards_statement(user_id, limit)))
+
+
+def _due_counts_statement(user_id: int, now: datetime):
+    # Граница «сегодня» — начало следующих суток (UTC), «неделя» — ещё 6 суток
+    end_of_today = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    end_of_week = end_of_today + timedelta(days=6)
+    is_due_today = or_(UserDueCard.priority == DUE_PRIORITY_NEEDS_REVIEW, UserDueCard.due_at < end_of_today)
+    return (
+        select(
+            func.count().filter(is_due_today).label("due_today"),
+            func.count().label("due_this_week")
         )
-    ).limit(5).all()
-    
-    needs_review_blocks = [
-        db.query(Block).filter(Block.id == rd.block_id).first()
-        for rd in needs_review_data
-        if db.query(Block).filter(Block.id == rd.block_id).first()
-    ]
-    cards.extend(needs_review_blocks)
-    
-    # Приоритет 2: наступило время повторения
-    due_review_data = db.query(RepetitionData).filter(
+        .where(
+            UserDueCard.user_id == user_id,
+            or_(UserDueCard.priority == DUE_PRIORITY_NEEDS_REVIEW, UserDueCard.due_at < end_of_week)
+        )
+    )
+
+
+def get_due_counts(db: Session, user_id: int) -> Tuple[int, int]:
+    """
+    Сколько карточек нужно повторить сегодня и в ближайшую неделю
+    (для счётчика-бейджа). Один агрегат по индексу очереди.
+    """
+    row = db.execute(_due_counts_statement(user_id, datetime.utcnow())).one()
+    return row.due_today, row.due_this_week
+
+
+async def get_due_counts_async(db: AsyncSession, user_id: int) -> Tuple[int, int]:
+    """Async-вариант get_due_counts"""
+    row = (await db.execute(_due_counts_statement(user_id, datetime.utcnow()))).one()
+    return row.due_today, row.due_this_week
+
+
+def _due_entry(repetition_data: RepetitionData) -> Dict[str, object]:
+    return {
+        "user_id": repetition_data.user_id,
+        "block_id": repetition_data.block_id,
+        "priority": DUE_PRIORITY_NEEDS_REVIEW if repetition_data.needs_review else DUE_PRIORITY_SCHEDULED,
+        "due_at": repetition_data.next_review or repetition_data.last_review or datetime.utcnow(),
+    }
+
+
+def due_queue_statement(cards: Iterable[RepetitionData]):
+    """UPSERT позиций карточек в очереди повторения одним запросом"""
+    stmt = pg_insert(UserDueCard).values([_due_entry(card) for card in cards])
+    return stmt.on_conflict_do_update(
+        constraint="uq_user_due_cards_user_block",
+        set_={"priority": stmt.excluded.priority, "due_at": stmt.excluded.due_at}
+    )
+
+
+def rebuild_due_queue(db: Session, user_id: Optional[int] = None) -> None:
+    """
+    Пересобирает очередь из repetition_data (всю или одного пользователя)
+    одним INSERT ... SELECT. Нужна после массовой загрузки repetition_data
+    в обход submit_answer. Транзакцию фиксирует вызывающий код.
+    """
+    source = select(
+        RepetitionData.user_id,
+        RepetitionData.block_id,
+        case(
+            (RepetitionData.needs_review == True, DUE_PRIORITY_NEEDS_REVIEW),
+            else_=DUE_PRIORITY_SCHEDULED
+        ),
+        func.coalesce(RepetitionData.next_review, func.now())
+    )
+    if user_id is not None:
+        source = source.where(RepetitionData.user_id == user_id)
+
+    stmt = pg_insert(UserDueCard).from_select(["user_id", "block_id", "priority", "due_at"], source)
+    db.execute(stmt.on_conflict_do_update(
+        constraint="uq_user_due_cards_user_block",
+        set_={"priority": stmt.excluded.priority, "due_at": stmt.excluded.due_at}
+    ))
+
+
+def _repetition_data_statement(user_id: int, block_id: str):
+    return select(RepetitionData).where(
         and_(
             RepetitionData.user_id == user_id,
-            RepetitionData.needs_review == False,
-            RepetitionData.next_review <= now
+            RepetitionData.block_id == block_id
         )
-    ).limit(5).all()
-    
-    due_review_blocks = [
-        db.query(Block).filter(Block.id == rd.block_id).first()
-        for rd in due_review_data
-        if db.query(Block).filter(Block.id == rd.block_id).first()
-    ]
-    cards.extend(due_review_blocks)
-    
-    # Приоритет 3: новые карточки (нет в repetition_data)
-    existing_block_ids = {
-        rd.block_id for rd in db.query(RepetitionData).filter(
-            RepetitionData.user_id == user_id
-        ).all()
-    }
-    
-    new_blocks = db.query(Block).filter(
-        ~Block.id.in_(existing_block_ids)
-    ).limit(2).all()
-    cards.extend(new_blocks)
-    
-    return cards[:limit]
+    )
 
 
-def submit_answer(
-    db: Session,
+def _scheduler_statement(user_id: int, course_id: str):
+    course_scheduler = select(Course.scheduler).where(Course.course_id == course_id).scalar_subquery()
+    return select(User.scheduler, course_scheduler).where(User.id == user_id)
+
+
+def _pick_scheduler(row) -> Scheduler:
+    # Настройка пользователя важнее настройки курса
+    user_choice, course_choice = row if row else (None, None)
+    return get_scheduler(user_choice or course_choice)
+
+
+def resolve_scheduler(db: Session, user_id: int, course_id: str) -> Scheduler:
+    """Алгоритм для карточки: пользователь > курс > SCHEDULER_DEFAULT (кэшируется на минуту)"""
+    key = (user_id, course_id)
+    scheduler = _scheduler_cache.get(key)
+    if scheduler is None:
+        scheduler = _pick_scheduler(db.execute(_scheduler_statement(user_id, course_id)).first())
+        _scheduler_cache.set(key, scheduler)
+    return scheduler
+
+
+def resolve_schedulers(db: Session, user_id: int, course_ids: Iterable[str]) -> Dict[str, Scheduler]:
+    """resolve_scheduler для набора курсов: промахи кэша — одним запросом"""
+    schedulers: Dict[str, Scheduler] = {}
+    missing = set()
+    for course_id in set(course_ids):
+        scheduler = _scheduler_cache.get((user_id, course_id))
+        if scheduler is None:
+            missing.add(course_id)
+        else:
+            schedulers[course_id] = scheduler
+    if not missing:
+        return schedulers
+
+    # Строка пользователя есть всегда; курсы, которых нет в БД, получают его выбор
+    rows = db.execute(
+        select(Course.course_id, User.scheduler, Course.scheduler)
+        .select_from(User)
+        .outerjoin(Course, Course.course_id.in_(missing))
+        .where(User.id == user_id)
+    ).all()
+    found = {course_id: (user_choice, course_choice) for course_id, user_choice, course_choice in rows if course_id}
+    user_choice = rows[0][1] if rows else None
+    for course_id in missing:
+        scheduler = _pick_scheduler(found.get(course_id, (user_choice, None)))
+        _scheduler_cache.set((user_id, course_id), scheduler)
+        schedulers[course_id] = scheduler
+    return schedulers
+
+
+async def resolve_scheduler_async(db: AsyncSession, user_id: int, course_id: str) -> Scheduler:
+    """Async-вариант resolve_scheduler"""
+    key = (user_id, course_id)
+    scheduler = _scheduler_cache.get(key)
+    if scheduler is None:
+        scheduler = _pick_scheduler((await db.execute(_scheduler_statement(user_id, course_id))).first())
+        _scheduler_cache.set(key, scheduler)
+    return scheduler
+
+
+def apply_answer(
+    repetition_data: Optional[RepetitionData],
     user_id: int,
     block_id: str,
     lesson_id: str,
     course_id: str,
-    is_correct: bool
-) -> RepetitionData:
+    is_correct: bool,
+    answered_at: Optional[datetime] = None,
+    scheduler: Optional[Scheduler] = None
+) -> Tuple[RepetitionData, AnswerSubmitted]:
     """
-    Обрабатывает ответ пользователя и обновляет данные spaced repetition
+    Пересчитывает расписание карточки по ответу. Возвращает (новую или
+    изменённую) запись и событие для подсистемы достижений.
+    scheduler — алгоритм планирования (по умолчанию SCHEDULER_DEFAULT).
     """
-    repetition_data = db.query(RepetitionData).filter(
-        and_(
-            RepetitionData.user_id == user_id,
-            RepetitionData.block_id == block_id
-        )
-    ).first()
+    answered_at = answered_at or datetime.utcnow()
+    scheduler = scheduler or get_scheduler()
+    is_new_card = repetition_data is None
+    previous_mistakes = repetition_data.mistakes if repetition_data else 0
     
     if not repetition_data:
         repetition_data = RepetitionData(
@@ -91,21 +282,27 @@ def submit_answer(
             needs_review=False,
             mistakes=0
         )
-        db.add(repetition_data)
     
     # Рассчитываем следующее повторение
-    next_review, new_interval, new_ease_factor = calculate_next_review(
-        repetition_data.last_review,
-        repetition_data.next_review,
-        repetition_data.interval,
-        repetition_data.ease_factor,
-        is_correct
+    state = scheduler.review(
+        CardState(
+            last_review=repetition_data.last_review,
+            next_review=repetition_data.next_review,
+            interval=repetition_data.interval,
+            ease_factor=repetition_data.ease_factor,
+            stability=repetition_data.stability,
+            difficulty=repetition_data.difficulty
+        ),
+        is_correct,
+        answered_at
     )
     
-    repetition_data.last_review = datetime.utcnow()
-    repetition_data.next_review = next_review
-    repetition_data.interval = new_interval
-    repetition_data.ease_factor = new_ease_factor
+    repetition_data.last_review = answered_at
+    repetition_data.next_review = state.next_review
+    repetition_data.interval = state.interval
+    repetition_data.ease_factor = state.ease_factor
+    repetition_data.stability = state.stability
+    repetition_data.difficulty = state.difficulty
     repetition_data.needs_review = not is_correct
     
     if not is_correct:
@@ -113,8 +310,73 @@ def submit_answer(
     else:
         repetition_data.needs_review = False
     
+    event = AnswerSubmitted(
+        user_id=user_id,
+        block_id=block_id,
+        is_correct=is_correct,
+        is_new_card=is_new_card,
+        previous_mistakes=previous_mistakes or 0
+    )
+    return repetition_data, event
+
+
+def submit_answer(
+    db: Session,
+    user_id: int,
+    block_id: str,
+    lesson_id: str,
+    course_id: str,
+    is_correct: bool
+) -> RepetitionData:
+    """
+    Обрабатывает ответ пользователя и обновляет данные spaced repetition
+    """
+    repetition_data = db.scalars(_repetition_data_statement(user_id, block_id)).first()
+    repetition_data, event = apply_answer(
+        repetition_data, user_id, block_id, lesson_id, course_id, is_correct,
+        scheduler=resolve_scheduler(db, user_id, course_id)
+    )
+    db.add(repetition_data)
+    
+    # Очередь повторения, достижения, статистика и журнал активности обновляются в той же транзакции
+    db.execute(due_queue_statement([repetition_data]))
+    record_event(db, event)
+    record_statistics(db, user_id, [event])
+    record_activity(db, user_id, [event])
+    
+    # Чтения пользователя после commit — с primary
+    mark_user_write(db, user_id)
     db.commit()
     db.refresh(repetition_data)
     
     return repetition_data
 
+
+async def submit_answer_async(
+    db: AsyncSession,
+    user_id: int,
+    block_id: str,
+    lesson_id: str,
+    course_id: str,
+    is_correct: bool
+) -> RepetitionData:
+    """Async-вариант submit_answer"""
+    repetition_data = (await db.scalars(_repetition_data_statement(user_id, block_id))).first()
+    repetition_data, event = apply_answer(
+        repetition_data, user_id, block_id, lesson_id, course_id, is_correct,
+        scheduler=await resolve_scheduler_async(db, user_id, course_id)
+    )
+    db.add(repetition_data)
+    
+    # Очередь повторения, достижения, статистика и журнал активности обновляются в той же транзакции
+    await db.execute(due_queue_statement([repetition_data]))
+    await record_event_async(db, event)
+    await record_statistics_async(db, user_id, [event])
+    await record_activity_async(db, user_id, [event])
+    
+    # Чтения пользователя после commit — с primary
+    mark_user_write(db, user_id)
+    await db.commit()
+    await db.refresh(repetition_data)
+    
+    return repetition_data
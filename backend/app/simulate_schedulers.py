@@ -0,0 +1,144 @@
+"""
+Офлайн-симулятор алгоритмов планирования на реальных данных repetition_data.
+
+    python -m app.simulate_schedulers --days 90 [--user-id 1] [--schedulers sm2 fsrs]
+
+Текущее состояние карточек берётся из БД, дальше каждый алгоритм
+проигрывает одинаковые --days дней: в день t повторяются карточки с
+next_review <= t. Успех ответа определяется «истинной» моделью памяти
+(FSRS с параметрами по умолчанию) с одинаковым зерном ГСЧ для всех
+алгоритмов. Печатается JSON: повторений всего, в среднем и в пике за
+день, доля успешных ответов и ряд нагрузки по дням. Меньше повторений
+при той же доле успешных ответов — меньше запросов и записей в БД.
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import RepetitionData
+from app.reschedule import _to_datetime64
+from app.utils.schedulers import SCHEDULERS, FSRS_DECAY, FSRS_FACTOR, FSRSScheduler
+
+CHUNK_SIZE = 50_000
+
+
+def load_cards(db: Session, user_id: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Колонки repetition_data в виде массивов (читается чанками по id)"""
+    columns = {name: [] for name in (
+        "last_review", "next_review", "interval", "ease_factor", "stability", "difficulty", "mistakes"
+    )}
+    after_id = 0
+    while True:
+        stmt = (
+            select(
+                RepetitionData.id,
+                *(getattr(RepetitionData, name) for name in columns)
+            )
+            .where(RepetitionData.id > after_id)
+            .order_by(RepetitionData.id)
+            .limit(CHUNK_SIZE)
+        )
+        if user_id is not None:
+            stmt = stmt.where(RepetitionData.user_id == user_id)
+        rows = db.execute(stmt).all()
+        if not rows:
+            break
+        after_id = rows[-1][0]
+        for row in rows:
+            for name, value in zip(columns, row[1:]):
+                columns[name].append(value)
+
+    return {
+        "last_review": _to_datetime64(columns["last_review"]),
+        "next_review": _to_datetime64(columns["next_review"]),
+        "interval": np.array([value or 1 for value in columns["interval"]], dtype=np.int64),
+        "ease_factor": np.array([value or np.nan for value in columns["ease_factor"]], dtype=np.float64),
+        "stability": np.array([value or np.nan for value in columns["stability"]], dtype=np.float64),
+        "difficulty": np.array([value or np.nan for value in columns["difficulty"]], dtype=np.float64),
+        "mistakes": np.array([value or 0 for value in columns["mistakes"]], dtype=np.int64),
+    }
+
+
+def _apply(columns: Dict[str, np.ndarray], mask: np.ndarray, updated: Dict[str, np.ndarray]) -> None:
+    for name, values in updated.items():
+        if name in columns:
+            columns[name][mask] = values
+
+
+def simulate(cards: Dict[str, np.ndarray], scheduler_name: str, days: int, start: datetime, seed: int) -> Dict:
+    scheduler = SCHEDULERS[scheduler_name]
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(start, "us")
+
+    state = {name: values.copy() for name, values in cards.items()}
+    # «Истинная» память: стабильность — по FSRS-состоянию или интервалу,
+    # сложность растёт с числом ошибок
+    truth_model = FSRSScheduler()
+    truth = {
+        "last_review": cards["last_review"].copy(),
+        "interval": cards["interval"].copy(),
+        "stability": np.where(np.isnan(cards["stability"]), np.maximum(cards["interval"], 1.0), cards["stability"]),
+        "difficulty": np.where(
+            np.isnan(cards["difficulty"]), np.clip(5.0 + cards["mistakes"], 1.0, 10.0), cards["difficulty"]
+        ),
+    }
+
+    per_day: List[int] = []
+    successes = 0
+    for day in range(days):
+        now = start + np.timedelta64(day, "D")
+        due = np.isnat(state["next_review"]) | (state["next_review"] <= now)
+        count = int(due.sum())
+        per_day.append(count)
+        if not count:
+            continue
+
+        last = truth["last_review"][due]
+        elapsed = np.where(np.isnat(last), 0.0, (now - np.where(np.isnat(last), now, last)) / np.timedelta64(1, "D"))
+        recall_probability = (1 + FSRS_FACTOR * elapsed / truth["stability"][due]) ** FSRS_DECAY
+        recalled = rng.random(count) < recall_probability
+        successes += int(recalled.sum())
+
+        _apply(truth, due, truth_model.review_batch({name: values[due] for name, values in truth.items()}, recalled, now))
+        _apply(state, due, scheduler.review_batch({name: values[due] for name, values in state.items()}, recalled, now))
+
+    total = sum(per_day)
+    return {
+        "reviews_total": total,
+        "reviews_per_day_mean": round(total / days, 2) if days else 0,
+        "reviews_per_day_peak": max(per_day) if per_day else 0,
+        "recall_rate": round(successes / total, 4) if total else None,
+        "reviews_per_day": per_day,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--schedulers", nargs="+", default=list(SCHEDULERS), choices=list(SCHEDULERS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        cards = load_cards(db, args.user_id)
+    finally:
+        db.close()
+
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    results = {
+        name: simulate(cards, name, args.days, start, args.seed)
+        for name in args.schedulers
+    }
+    print(json.dumps({"cards": len(cards["interval"]), "days": args.days, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Допуск к пулу соединений БД с приоритетами и сбросом нагрузки.
+
+Пул (pool_size + max_overflow соединений) закрыт «воротами» AdmissionGate
+с тем же числом мест. Запрос ждёт соединение не дольше бюджета своего
+маршрута, освободившееся место получает ожидающий с наивысшим приоритетом
+(critical → normal → low), а при длинной очереди запрос сразу получает
+PoolSaturated — API отвечает 503 с Retry-After вместо 30-секундного
+ожидания pool_timeout.
+
+Класс и бюджет определяются по шаблону маршрута на момент получения
+соединения (маршрут к этому времени уже выбран роутером). Выражения вне
+HTTP-запроса (фоновые потоки, CLI) ждут до pool_timeout и не сбрасываются.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import Pool
+from sqlalchemy.util import await_only
+
+from app.config import settings
+
+PRIORITIES = ("critical", "normal", "low")
+DEFAULT_PRIORITY = "normal"
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("admission_scope", default=None)
+
+
+class PoolSaturated(sa_exc.TimeoutError):
+    """Соединение не выдано: очередь переполнена или истёк бюджет ожидания"""
+
+    def __init__(self, pool: str, priority: str, reason: str, retry_after: int):
+        super().__init__(f"Database pool '{pool}' saturated ({reason}, priority {priority})")
+        self.pool = pool
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Ticket:
+    priority: str
+    budget: float
+    # Запросы API при переполнении очереди отклоняются сразу
+    sheddable: bool = True
+
+
+def _route_key(scope: dict) -> Optional[str]:
+    path = getattr(scope.get("route"), "path", None)
+    return f"{scope['method']} {path}" if path else None
+
+
+def current_ticket() -> Ticket:
+    """Класс и бюджет ожидания для текущего запроса"""
+    scope = _request_scope.get()
+    if scope is None:
+        return Ticket(priority=DEFAULT_PRIORITY, budget=settings.DB_POOL_TIMEOUT, sheddable=False)
+    route = _route_key(scope)
+    priority = settings.DB_ADMISSION_ROUTE_PRIORITIES.get(route, DEFAULT_PRIORITY)
+    budget_ms = settings.DB_ADMISSION_ROUTE_BUDGETS_MS.get(route, settings.DB_ADMISSION_BUDGETS_MS[priority])
+    return Ticket(priority=priority, budget=budget_ms / 1000)
+
+
+def begin_request(scope: dict) -> Token:
+    return _request_scope.set(scope)
+
+
+def end_request(token: Token) -> None:
+    _request_scope.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "granted", "cancelled", "event", "future", "loop")
+
+    def __init__(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.granted = False
+        self.cancelled = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+class AdmissionGate:
+    """
+    Счётный семафор на capacity мест с приоритетной очередью ожидающих.
+    Освобождённое место передаётся ожидающему напрямую, поэтому новый
+    запрос не обгоняет очередь. Работает и из потоков, и из цикла asyncio.
+    """
+
+    def __init__(self, name: str, capacity: int, queue_limits: Dict[str, int], enabled: bool = True):
+        self.name = name
+        self.capacity = capacity
+        self.queue_limits = queue_limits
+        self.enabled = enabled
+        self._free = capacity
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.granted = {priority: 0 for priority in PRIORITIES}
+        self.queued = {priority: 0 for priority in PRIORITIES}
+        self.shed = {(priority, reason): 0 for priority in PRIORITIES for reason in ("queue", "budget")}
+
+    def _enter(self, ticket: Ticket, loop=None) -> Optional[_Waiter]:
+        """Занимает место (None) или ставит в очередь (_Waiter); при переполнении — PoolSaturated"""
+        with self._lock:
+            if self._free > 0 and self.waiting == 0:
+                self._free -= 1
+                self.granted[ticket.priority] += 1
+                return None
+            if ticket.sheddable and self.waiting >= self.queue_limits[ticket.priority]:
+                self.shed[(ticket.priority, "queue")] += 1
+                raise PoolSaturated(self.name, ticket.priority, "queue", settings.DB_ADMISSION_RETRY_AFTER_SECONDS)
+            waiter = _Waiter(ticket.priority, loop)
+            heapq.heappush(self._heap, (PRIORITIES.index(ticket.priority), next(self._sequence), waiter))
+            self.waiting += 1
+            self.queued[ticket.priority] += 1
+            return waiter
+
+    def _leave_queue(self, waiter: _Waiter) -> bool:
+        """Снимает ожидающего с очереди; False — место ему уже передано"""
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.cancelled = True
+            self.waiting -= 1
+            return True
+
+    def _timed_out(self, ticket: Ticket, waiter: _Waiter) -> None:
+        if not self._leave_queue(waiter):
+            # Место пришло одновременно с таймаутом: забираем его
+            return
+        with self._lock:
+            self.shed[(ticket.priority, "budget")] += 1
+        raise PoolSaturated(self.name, ticket.priority, "budget", settings.DB_ADMISSION_RETRY_AFTER_SECONDS)
+
+    def acquire(self, ticket: Ticket) -> None:
+        if not self.enabled:
+            return
+        waiter = self._enter(ticket)
+        if waiter is not None and not waiter.event.wait(ticket.budget):
+            self._timed_out(ticket, waiter)
+
+    async def acquire_async(self, ticket: Ticket) -> None:
+        if not self.enabled:
+            return
+        waiter = self._enter(ticket, asyncio.get_running_loop())
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), ticket.budget)
+        except asyncio.TimeoutError:
+            self._timed_out(ticket, waiter)
+        except asyncio.CancelledError:
+            # Клиент ушёл: полученное место нужно вернуть
+            if not self._leave_queue(waiter):
+                self.release()
+            raise
+
+    def release(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self.waiting -= 1
+                self.granted[waiter.priority] += 1
+                waiter.wake()
+                return
+            self._free += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "in_use": self.capacity - self._free,
+                "waiting": self.waiting,
+                "granted": dict(self.granted),
+                "queued": dict(self.queued),
+                "shed": {f"{priority}:{reason}": count for (priority, reason), count in self.shed.items()},
+            }
+
+
+admission_gates: Dict[str, AdmissionGate] = {}
+
+
+def guarded_pool(name: str, base: Type[Pool], capacity: int, is_async: bool = False) -> Type[Pool]:
+    """
+    Подкласс пула, выдающий соединения через AdmissionGate. Место
+    освобождается при возврате соединения (в т.ч. detach) и при ошибке
+    открытия нового соединения.
+    """
+    gate = admission_gates.setdefault(name, AdmissionGate(
+        name,
+        capacity=capacity,
+        queue_limits=settings.DB_ADMISSION_QUEUE_LIMITS,
+        enabled=settings.DB_ADMISSION_ENABLED,
+    ))
+
+    class GuardedPool(base):
+        def _do_get(self):
+            ticket = current_ticket()
+            if is_async:
+                # Вызывается из greenlet async-драйвера: ждём в цикле событий
+                await_only(gate.acquire_async(ticket))
+            else:
+                gate.acquire(ticket)
+            try:
+                return super()._do_get()
+            except BaseException:
+                gate.release()
+                raise
+
+        def _do_return_conn(self, record):
+            try:
+                super()._do_return_conn(record)
+            finally:
+                gate.release()
+
+    GuardedPool.__name__ = f"Guarded{base.__name__}"
+    return GuardedPool
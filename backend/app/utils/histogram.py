@@ -0,0 +1,51 @@
+import bisect
+from typing import Dict, List, Sequence
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными верхними границами корзин (как у Prometheus:
+    значение попадает в первую корзину, граница которой не меньше значения;
+    последняя корзина — +Inf). Не потокобезопасна: блокирует владелец.
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[int]:
+        """Накопленные счётчики по корзинам (le=bound), последний — +Inf"""
+        result, total = [], 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает q-квантиль"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in zip(self.bounds, self.cumulative()):
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        buckets = {str(bound): total for bound, total in zip(self.bounds, self.cumulative())}
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
@@ -0,0 +1,210 @@
+"""
+Метрики процесса в текстовом формате Prometheus (GET /metrics).
+
+- http_request_duration_seconds — гистограмма задержек по маршруту
+  (шаблон пути), методу и статусу; http_requests_in_flight — запросы в работе;
+- db_pool_* — состояние пулов SQLAlchemy и время ожидания соединения
+  (класс пула из pool_class замеряет получение соединения);
+- threadpool_* — занятость пула потоков anyio, в котором выполняются
+  синхронные эндпоинты и зависимости.
+
+Формат пишется вручную: prometheus_client для этого не нужен.
+"""
+import copy
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple, Type
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import Pool
+
+from app.utils.histogram import Histogram
+
+LATENCY_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BOUNDS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, str(status))
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BOUNDS)
+            histogram.observe(seconds)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            lines = _gauge("http_requests_in_flight", "Requests being processed", self.in_flight)
+            lines += _histograms(
+                "http_request_duration_seconds",
+                "Request latency until the last body chunk",
+                (({"method": method, "route": route, "status": status}, histogram)
+                 for (method, route, status), histogram in sorted(self._latency.items()))
+            )
+        return lines
+
+
+class PoolMetrics:
+    """Ожидание соединений одного пула (заполняется классом из pool_class)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait = Histogram(POOL_WAIT_BOUNDS)
+        self.timeouts = 0
+        self.waiting = 0
+
+    def begin_wait(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def end_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.wait.observe(seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> "PoolMetrics":
+        """Согласованная копия для отрисовки"""
+        with self._lock:
+            snapshot = PoolMetrics()
+            snapshot.wait = copy.deepcopy(self.wait)
+            snapshot.timeouts = self.timeouts
+            snapshot.waiting = self.waiting
+            return snapshot
+
+
+request_metrics = RequestMetrics()
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def pool_class(name: str, base: Type[Pool]) -> Type[Pool]:
+    """
+    Подкласс пула, замеряющий время получения соединения (ожидание в
+    очереди и открытие нового). Передаётся в create_engine(poolclass=...);
+    пересоздание пула (dispose) сохраняет класс и его метрики.
+    """
+    metrics = pool_metrics.setdefault(name, PoolMetrics())
+
+    class TimedPool(base):
+        def _do_get(self):
+            metrics.begin_wait()
+            started = time.perf_counter()
+            timed_out = False
+            try:
+                return super()._do_get()
+            except sa_exc.TimeoutError:
+                timed_out = True
+                raise
+            finally:
+                metrics.end_wait(time.perf_counter() - started, timed_out)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def render_pools(pools: Dict[str, Pool], limits: Dict[str, Tuple[int, int]]) -> List[str]:
+    """Пулы по имени; limits — настроенные (pool_size, max_overflow)"""
+    waits = {name: pool_metrics[name].snapshot() for name in pools}
+    gauges = {
+        "db_pool_size": ("Configured pool_size", lambda name, pool: limits[name][0]),
+        "db_pool_max_overflow": ("Configured max_overflow", lambda name, pool: limits[name][1]),
+        "db_pool_checked_out": ("Connections in use", lambda name, pool: pool.checkedout()),
+        "db_pool_checked_in": ("Idle connections in the pool", lambda name, pool: pool.checkedin()),
+        # overflow() отрицателен, пока пул не заполнен до pool_size
+        "db_pool_overflow": ("Overflow connections open", lambda name, pool: max(pool.overflow(), 0)),
+        "db_pool_waiting": ("Threads waiting for a connection", lambda name, pool: waits[name].waiting),
+    }
+    lines: List[str] = []
+    for metric, (help_text, value) in gauges.items():
+        lines += _header(metric, help_text, "gauge")
+        lines += [f"{metric}{_labels({'pool': name})} {value(name, pool)}" for name, pool in pools.items()]
+
+    lines += _header("db_pool_timeouts_total", "Connection checkouts that timed out or were shed", "counter")
+    lines += [f"db_pool_timeouts_total{_labels({'pool': name})} {waits[name].timeouts}" for name in pools]
+    lines += _histograms(
+        "db_pool_wait_seconds",
+        "Time to obtain a connection from the pool",
+        (({"pool": name}, waits[name].wait) for name in pools)
+    )
+    return lines
+
+
+def render_admission(gates: Dict[str, Dict]) -> List[str]:
+    """Счётчики допуска к пулам (AdmissionGate.stats по имени пула)"""
+    lines = _header("db_admission_waiting", "Requests queued for a pool slot", "gauge")
+    lines += [f"db_admission_waiting{_labels({'pool': name})} {stats['waiting']}" for name, stats in gates.items()]
+    for metric, key, help_text in (
+        ("db_admission_granted_total", "granted", "Pool slots granted"),
+        ("db_admission_queued_total", "queued", "Checkouts that had to queue"),
+    ):
+        lines += _header(metric, help_text, "counter")
+        lines += [
+            f"{metric}{_labels({'pool': name, 'priority': priority})} {count}"
+            for name, stats in gates.items() for priority, count in stats[key].items()
+        ]
+    lines += _header("db_admission_shed_total", "Checkouts rejected with 503 (queue full or budget spent)", "counter")
+    for name, stats in gates.items():
+        for key, count in stats["shed"].items():
+            priority, reason = key.split(":")
+            lines.append(f"db_admission_shed_total{_labels({'pool': name, 'priority': priority, 'reason': reason})} {count}")
+    return lines
+
+
+def render_threadpool(total: float, borrowed: int, waiting: int) -> List[str]:
+    lines = _gauge("threadpool_threads_total", "Worker thread limit for sync endpoints", total)
+    lines += _gauge("threadpool_threads_busy", "Worker threads in use", borrowed)
+    lines += _gauge("threadpool_tasks_waiting", "Calls queued for a free worker thread", waiting)
+    return lines
+
+
+# --- формат экспозиции ---
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _header(name: str, help_text: str, kind: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _gauge(name: str, help_text: str, value: float) -> List[str]:
+    return _header(name, help_text, "gauge") + [f"{name} {_number(value)}"]
+
+
+def _histograms(name: str, help_text: str, series: Iterable[Tuple[Dict[str, str], Histogram]]) -> List[str]:
+    lines = _header(name, help_text, "histogram")
+    for labels, histogram in series:
+        for bound, total in zip(histogram.bounds + (float("inf"),), histogram.cumulative()):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {total}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+    return lines
+
+
+def render(lines: Iterable[str]) -> str:
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,20 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+import anyio.to_thread
 from passlib.context import CryptContext
+from app.config import settings
 
 # Create password context with bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a lower cost factor than PASSWORD_BCRYPT_ROUNDS are reported by
+# verify_and_update so they can be upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 
 def hash_password(password: str) -> str:
@@ -14,5 +27,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a new hash if the stored one is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so CPU-bound hashing does not
+    occupy the request threadpool or hold the GIL. Calls are awaitable:
+    the event loop waits on the pool future without blocking a thread.
+
+    At most max_pending operations may be queued or running; beyond that
+    calls fail immediately with PasswordHasherBusy instead of waiting.
+    The pool is created lazily in the process that first uses it.
+    """
+
+    def __init__(self, workers: int, max_pending: int, enabled: bool = True):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a multi-threaded server process is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def _run(self, fn: Callable, *args):
+        if not self.enabled:
+            return await anyio.to_thread.run_sync(fn, *args)
+
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    enabled=settings.PASSWORD_HASH_POOL_ENABLED,
+)
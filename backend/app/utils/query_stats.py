@@ -0,0 +1,236 @@
+"""
+SQL-инструментирование по запросам API.
+
+Слушатели событий engine считают для текущего HTTP-запроса (contextvar,
+его задаёт QueryTimingMiddleware) число SQL-выражений, время в БД и число
+возвращённых строк. По завершении запроса счётчики сливаются в агрегаты:
+гистограммы по маршрутам и статистику по тексту выражений (вызовы, время,
+максимум повторов за один запрос — признак N+1). Выражения вне HTTP-запроса
+(фоновые потоки, CLI) попадают в маршрут "-".
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.utils.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+DB_MS_BOUNDS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_COUNT_BOUNDS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+NO_ROUTE = "-"
+SORT_KEYS = ("total_ms", "calls", "max_ms", "max_per_request")
+
+# Списки плейсхолдеров (раскрытые IN, многострочные VALUES) сворачиваются,
+# чтобы один и тот же запрос с разным числом параметров считался одним
+_PLACEHOLDER_LIST = re.compile(r"(\$\d+|%\(\w+\)s)(\s*,\s*(\$\d+|%\(\w+\)s))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("?, ...", _WHITESPACE.sub(" ", statement).strip())
+
+
+@dataclass
+class RequestQueries:
+    """Счётчики SQL одного HTTP-запроса"""
+    count: int = 0
+    db_ms: float = 0.0
+    rows: int = 0
+    statements: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class StatementStats:
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    max_per_request: int = 0
+    # Маршрут, где выражение повторилось больше всего раз за запрос
+    route: str = NO_ROUTE
+
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    rows: int = 0
+    max_queries: int = 0
+    db_ms: Histogram = field(default_factory=lambda: Histogram(DB_MS_BOUNDS))
+    queries: Histogram = field(default_factory=lambda: Histogram(QUERY_COUNT_BOUNDS))
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+class QueryStats:
+    def __init__(self, max_statements: int, slow_ms: float, repeat_warn: int, enabled: bool = True):
+        self.enabled = enabled
+        self.max_statements = max_statements
+        self.slow_ms = slow_ms
+        self.repeat_warn = repeat_warn
+        self._routes: Dict[str, RouteStats] = {}
+        self._statements: Dict[str, StatementStats] = {}
+        self._normalized: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.dropped_statements = 0
+        self.slow_statements = 0
+
+    # --- события engine ---
+
+    def instrument(self, engine: Engine) -> None:
+        """Подключает слушатели к sync engine (для async — к async_engine.sync_engine)"""
+        if not self.enabled:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        # Выражения одного соединения идут последовательно: стек не нужен,
+        # а упавшее выражение просто перезапишется следующим
+        conn.info["query_started"] = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_started"]) * 1000
+        rowcount = cursor.rowcount if cursor.description is not None else 0
+        rows = max(rowcount or 0, 0)
+        key = self._statement_key(statement)
+
+        current = _current.get()
+        if current is not None:
+            current.count += 1
+            current.db_ms += elapsed_ms
+            current.rows += rows
+            current.statements[key] += 1
+
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= self.max_statements:
+                    self.dropped_statements += 1
+                else:
+                    stats = self._statements[key] = StatementStats()
+            if stats is not None:
+                stats.calls += 1
+                stats.total_ms += elapsed_ms
+                stats.max_ms = max(stats.max_ms, elapsed_ms)
+                stats.rows += rows
+                if current is None:
+                    stats.max_per_request = max(stats.max_per_request, 1)
+
+        if elapsed_ms >= self.slow_ms:
+            self.slow_statements += 1
+            logger.warning("Slow SQL (%.1f ms, %d rows): %s", elapsed_ms, rows, key[:500])
+
+    def _statement_key(self, statement: str) -> str:
+        # Тексты выражений берутся из кэша компиляции, так что повторяются
+        key = self._normalized.get(statement)
+        if key is None:
+            key = normalize_statement(statement)
+            if len(self._normalized) < self.max_statements * 2:
+                self._normalized[statement] = key
+        return key
+
+    # --- границы HTTP-запроса ---
+
+    def begin_request(self) -> Token:
+        return _current.set(RequestQueries())
+
+    @staticmethod
+    def current() -> Optional[RequestQueries]:
+        return _current.get()
+
+    def end_request(self, token: Token, route: str) -> Optional[RequestQueries]:
+        """Сливает счётчики запроса в агрегаты маршрута route"""
+        queries = _current.get()
+        _current.reset(token)
+        if queries is None:
+            return None
+
+        suspects = [(key, calls) for key, calls in queries.statements.items() if calls >= self.repeat_warn]
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.requests += 1
+            stats.rows += queries.rows
+            stats.max_queries = max(stats.max_queries, queries.count)
+            stats.db_ms.observe(queries.db_ms)
+            stats.queries.observe(queries.count)
+            for key, calls in queries.statements.items():
+                statement = self._statements.get(key)
+                if statement is not None and calls > statement.max_per_request:
+                    statement.max_per_request = calls
+                    statement.route = route
+
+        for key, calls in suspects:
+            logger.warning("Possible N+1 on %s: statement repeated %d times: %s", route, calls, key[:500])
+        return queries
+
+    # --- отчёты ---
+
+    def routes(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                route: {
+                    "requests": stats.requests,
+                    "rows": stats.rows,
+                    "max_queries": stats.max_queries,
+                    "queries": stats.queries.snapshot(),
+                    "db_ms": stats.db_ms.snapshot(),
+                }
+                for route, stats in sorted(self._routes.items())
+            }
+
+    def top_statements(self, limit: int = 20, sort: str = "total_ms") -> List[Dict]:
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {SORT_KEYS}")
+        with self._lock:
+            items = sorted(self._statements.items(), key=lambda item: getattr(item[1], sort), reverse=True)[:limit]
+            return [
+                {
+                    "statement": key,
+                    "calls": stats.calls,
+                    "total_ms": round(stats.total_ms, 3),
+                    "mean_ms": round(stats.total_ms / stats.calls, 3),
+                    "max_ms": round(stats.max_ms, 3),
+                    "rows": stats.rows,
+                    "max_per_request": stats.max_per_request,
+                    "route": stats.route,
+                }
+                for key, stats in items
+            ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "tracked_statements": len(self._statements),
+                "dropped_statements": self.dropped_statements,
+                "slow_statements": self.slow_statements,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._statements.clear()
+            self.dropped_statements = 0
+            self.slow_statements = 0
+
+
+query_stats = QueryStats(
+    max_statements=settings.QUERY_STATS_MAX_STATEMENTS,
+    slow_ms=settings.QUERY_STATS_SLOW_MS,
+    repeat_warn=settings.QUERY_STATS_REPEAT_WARN,
+    enabled=settings.QUERY_STATS_ENABLED,
+)
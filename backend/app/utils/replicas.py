@@ -0,0 +1,174 @@
+"""
+Реплики для чтения: выбор по кругу среди здоровых, проверка здоровья и
+отставания, закрепление пользователя за primary после записи.
+
+Реплика считается здоровой, если отвечает на запрос проверки и (для
+PostgreSQL) отстаёт от primary не больше REPLICA_MAX_LAG_SECONDS. Ошибка
+соединения при чтении тоже снимает реплику до следующей проверки. Без
+здоровых реплик чтения идут на primary.
+
+Read-your-writes: сессия, изменившая данные пользователя, помечает его
+(mark_user_write); после commit его чтения REPLICA_READ_YOUR_WRITES_SECONDS
+идут на primary. Закрепление живёт в памяти воркера — окно должно быть
+больше допустимого отставания реплик.
+"""
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Не реплика или весь полученный WAL применён — отставания нет (иначе при
+# простое primary время последней транзакции давало бы ложное отставание)
+_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+_PING_QUERY = text("SELECT 1")
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    # sync_engine async-движка той же реплики (DB_ASYNC)
+    async_engine: Optional[Engine] = None
+    healthy: bool = True
+    lag_seconds: float = 0.0
+    checked_at: float = 0.0
+    failures: int = 0
+    reads: int = 0
+
+
+class ReplicaSet:
+    def __init__(self, replicas: List[Replica], max_lag_seconds: float, read_your_writes_seconds: float):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._cycle = itertools.count()
+        self._lock = threading.Lock()
+        # user_id -> monotonic-время, до которого чтения идут на primary
+        self._pins: Dict[int, float] = {}
+        self.primary_reads = 0
+
+    # --- выбор реплики ---
+
+    def pick(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """Следующая здоровая реплика по кругу; None — читать с primary"""
+        with self._lock:
+            if user_id is not None and self._pinned(user_id):
+                self.primary_reads += 1
+                return None
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if not healthy:
+                self.primary_reads += 1
+                return None
+            replica = healthy[next(self._cycle) % len(healthy)]
+            replica.reads += 1
+            return replica
+
+    def mark_failed(self, replica: Replica, error: Exception) -> None:
+        with self._lock:
+            if replica.healthy:
+                logger.warning("Replica %s marked unhealthy: %s", replica.name, error)
+            replica.healthy = False
+            replica.failures += 1
+
+    # --- read-your-writes ---
+
+    def _pinned(self, user_id: int) -> bool:
+        until = self._pins.get(user_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._pins[user_id]
+            return False
+        return True
+
+    def pin(self, user_ids) -> None:
+        if not self.replicas:
+            return
+        until = time.monotonic() + self.read_your_writes_seconds
+        with self._lock:
+            for user_id in user_ids:
+                self._pins[user_id] = until
+
+    # --- проверка здоровья ---
+
+    def _probe(self, replica: Replica) -> float:
+        with replica.engine.connect() as connection:
+            if replica.engine.dialect.name != "postgresql":
+                connection.execute(_PING_QUERY)
+                return 0.0
+            return float(connection.execute(_LAG_QUERY).scalar() or 0.0)
+
+    def check(self) -> None:
+        """Проверяет все реплики: доступность и отставание"""
+        for replica in self.replicas:
+            try:
+                lag = self._probe(replica)
+                error = None
+            except Exception as e:
+                lag, error = 0.0, e
+            with self._lock:
+                was_healthy = replica.healthy
+                replica.checked_at = time.time()
+                replica.lag_seconds = lag
+                replica.healthy = error is None and lag <= self.max_lag_seconds
+                if error is not None:
+                    replica.failures += 1
+            if was_healthy and not replica.healthy:
+                logger.warning("Replica %s unhealthy (lag %.1fs): %s", replica.name, lag, error)
+            elif replica.healthy and not was_healthy:
+                logger.info("Replica %s is healthy again", replica.name)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "primary_reads": self.primary_reads,
+                "pinned_users": len(self._pins),
+                "replicas": {
+                    replica.name: {
+                        "healthy": replica.healthy,
+                        "lag_seconds": round(replica.lag_seconds, 3),
+                        "reads": replica.reads,
+                        "failures": replica.failures,
+                        "checked_at": replica.checked_at,
+                    }
+                    for replica in self.replicas
+                },
+            }
+
+
+class ReplicaHealthChecker:
+    """Фоновый поток, периодически вызывающий ReplicaSet.check"""
+
+    def __init__(self, replica_set: ReplicaSet, interval_seconds: float):
+        self.replica_set = replica_set
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.replica_set.check()
+            except Exception:
+                logger.exception("Replica health check failed")
+
+    def start(self) -> None:
+        if self._thread is None and self.replica_set.replicas and self.interval_seconds > 0:
+            self.replica_set.check()
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,221 @@
+"""
+Алгоритмы планирования повторений за общим интерфейсом.
+
+- "sm2"  — текущий алгоритм (calculate_next_review), интервалы 1/7/16/35 дней;
+- "fsrs" — модель памяти в духе FSRS-4.5: стабильность S и сложность D
+  карточки, интервал выбирается так, чтобы вероятность вспомнить к
+  моменту повторения была не ниже DESIRED_RETENTION.
+
+У каждого алгоритма есть скалярный review() для обработки ответа и
+пакетный review_batch() (NumPy) для симуляции и массового пересчёта.
+NumPy импортируется только в пакетных методах.
+"""
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.config import settings
+from app.utils.spaced_repetition import calculate_next_review
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    aware -> naive UTC. Колонки timestamptz приходят из драйвера aware, а
+    моменты ответов (datetime.utcnow()) — naive; вычитать их можно только
+    в одном соглашении.
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _datetime64(values) -> "np.ndarray":
+    """Массив (или скаляр) datetime -> datetime64[us] в naive UTC, None -> NaT"""
+    import numpy as np
+
+    array = np.asarray(values)
+    if array.dtype == object:
+        array = np.array([_utc_naive(value) for value in array.ravel()], dtype="datetime64[us]").reshape(array.shape)
+    return array.astype("datetime64[us]")
+
+
+@dataclass(frozen=True)
+class CardState:
+    """Состояние карточки в терминах колонок repetition_data"""
+    last_review: Optional[datetime] = None
+    next_review: Optional[datetime] = None
+    interval: int = 1
+    ease_factor: float = 2.5
+    stability: Optional[float] = None
+    difficulty: Optional[float] = None
+
+
+class Scheduler(ABC):
+    """Интерфейс алгоритма планирования"""
+    name: str = ""
+
+    @abstractmethod
+    def review(self, state: CardState, is_correct: bool, now: datetime) -> CardState:
+        """Новое состояние карточки после ответа в момент now"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def review_batch(self, columns: Dict[str, "np.ndarray"], is_correct, now) -> Dict[str, "np.ndarray"]:
+        """
+        Пакетный review(): columns — массивы last_review (datetime64, NaT),
+        interval, ease_factor, stability и difficulty (float64, NaN).
+        Возвращает массивы тех же колонок плюс next_review.
+        """
+        raise NotImplementedError
+
+
+class SM2Scheduler(Scheduler):
+    name = "sm2"
+
+    def review(self, state: CardState, is_correct: bool, now: datetime) -> CardState:
+        next_review, interval, ease_factor = calculate_next_review(
+            state.last_review, state.next_review, state.interval, state.ease_factor, is_correct, now=now
+        )
+        return replace(state, last_review=now, next_review=next_review, interval=interval, ease_factor=ease_factor)
+
+    def review_batch(self, columns, is_correct, now):
+        import numpy as np
+        from app.utils.spaced_repetition_batch import calculate_next_review_batch
+
+        now = _datetime64(now)
+        next_review, interval, ease_factor = calculate_next_review_batch(
+            _datetime64(columns["last_review"]), columns["interval"], columns["ease_factor"], is_correct, now
+        )
+        now = np.broadcast_to(now, interval.shape)
+        return {**columns, "last_review": now, "next_review": next_review,
+                "interval": interval, "ease_factor": ease_factor}
+
+
+# Параметры FSRS-4.5 по умолчанию (оценки: 1 — Again, 3 — Good)
+FSRS_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)
+FSRS_DECAY = -0.5
+FSRS_FACTOR = 0.9 ** (1 / FSRS_DECAY) - 1  # 19/81: R(t = S) = 0.9
+GRADE_AGAIN = 1
+GRADE_GOOD = 3
+
+
+class FSRSScheduler(Scheduler):
+    """
+    Упрощённая FSRS-4.5 с двумя оценками (верно / ошибка). Карточки без
+    stability (новые или ранее планировавшиеся SM-2) стартуют со
+    стабильностью, равной текущему интервалу.
+    """
+    name = "fsrs"
+
+    def __init__(self, desired_retention: float = 0.9, max_interval: int = 365, weights=FSRS_WEIGHTS):
+        self.desired_retention = desired_retention
+        self.max_interval = max_interval
+        self.w = weights
+
+    # --- формулы модели (скаляры) ---
+
+    def retrievability(self, elapsed_days: float, stability: float) -> float:
+        return (1 + FSRS_FACTOR * elapsed_days / stability) ** FSRS_DECAY
+
+    def _initial_difficulty(self, grade: int) -> float:
+        return self.w[4] - (grade - 3) * self.w[5]
+
+    def _next_difficulty(self, difficulty: float, grade: int) -> float:
+        updated = difficulty - self.w[6] * (grade - 3)
+        # Возврат к среднему: сложность не уходит к краям навсегда
+        reverted = self.w[7] * self._initial_difficulty(GRADE_GOOD) + (1 - self.w[7]) * updated
+        return min(max(reverted, 1.0), 10.0)
+
+    def _next_stability(self, difficulty: float, stability: float, r: float, is_correct: bool) -> float:
+        w = self.w
+        if is_correct:
+            return stability * (
+                math.exp(w[8]) * (11 - difficulty) * stability ** -w[9] * (math.exp(w[10] * (1 - r)) - 1) + 1
+            )
+        return w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1) * math.exp(w[14] * (1 - r))
+
+    def _interval(self, stability: float) -> int:
+        days = stability / FSRS_FACTOR * (self.desired_retention ** (1 / FSRS_DECAY) - 1)
+        return min(max(int(round(days)), 1), self.max_interval)
+
+    def review(self, state: CardState, is_correct: bool, now: datetime) -> CardState:
+        grade = GRADE_GOOD if is_correct else GRADE_AGAIN
+
+        if state.last_review is None:
+            stability = self.w[grade - 1]
+            difficulty = min(max(self._initial_difficulty(grade), 1.0), 10.0)
+        else:
+            stability = state.stability or float(max(state.interval or 1, 1))
+            difficulty = state.difficulty or self._initial_difficulty(GRADE_GOOD)
+            elapsed = max((_utc_naive(now) - _utc_naive(state.last_review)).total_seconds() / 86400, 0.0)
+            r = self.retrievability(elapsed, stability)
+            stability = self._next_stability(difficulty, stability, r, is_correct)
+            difficulty = self._next_difficulty(difficulty, grade)
+
+        interval = self._interval(stability)
+        return replace(
+            state,
+            last_review=now,
+            next_review=now + timedelta(days=interval),
+            interval=interval,
+            stability=stability,
+            difficulty=difficulty
+        )
+
+    def review_batch(self, columns, is_correct, now):
+        import numpy as np
+
+        w = self.w
+        is_correct = np.asarray(is_correct, dtype=bool)
+        grade = np.where(is_correct, GRADE_GOOD, GRADE_AGAIN)
+        last_review = _datetime64(columns["last_review"])
+        now = _datetime64(now)
+        first = np.isnat(last_review)
+
+        initial_d = lambda g: w[4] - (g - 3) * w[5]
+        stability = np.where(
+            np.isnan(columns["stability"]) | (columns["stability"] == 0),
+            np.maximum(np.asarray(columns["interval"], dtype=np.float64), 1.0),
+            columns["stability"]
+        )
+        difficulty = np.where(
+            np.isnan(columns["difficulty"]) | (columns["difficulty"] == 0),
+            initial_d(GRADE_GOOD),
+            columns["difficulty"]
+        )
+
+        elapsed = np.where(first, 0.0, (now - np.where(first, now, last_review)) / np.timedelta64(1, "D"))
+        r = (1 + FSRS_FACTOR * np.maximum(elapsed, 0.0) / stability) ** FSRS_DECAY
+        recalled = stability * (
+            np.exp(w[8]) * (11 - difficulty) * stability ** -w[9] * (np.exp(w[10] * (1 - r)) - 1) + 1
+        )
+        forgotten = w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1) * np.exp(w[14] * (1 - r))
+        reverted = w[7] * initial_d(GRADE_GOOD) + (1 - w[7]) * (difficulty - w[6] * (grade - 3))
+
+        stability = np.where(first, np.take(w, grade - 1), np.where(is_correct, recalled, forgotten))
+        difficulty = np.clip(np.where(first, initial_d(grade), reverted), 1.0, 10.0)
+
+        days = stability / FSRS_FACTOR * (self.desired_retention ** (1 / FSRS_DECAY) - 1)
+        interval = np.clip(np.round(days), 1, self.max_interval).astype(np.int64)
+        return {**columns, "last_review": np.broadcast_to(now, interval.shape),
+                "next_review": now + interval * np.timedelta64(1, "D"),
+                "interval": interval, "stability": stability, "difficulty": difficulty}
+
+
+SCHEDULERS: Dict[str, Scheduler] = {
+    SM2Scheduler.name: SM2Scheduler(),
+    FSRSScheduler.name: FSRSScheduler(desired_retention=settings.FSRS_DESIRED_RETENTION),
+}
+
+
+def get_scheduler(name: Optional[str] = None) -> Scheduler:
+    """Алгоритм по имени; пустое или неизвестное имя — SCHEDULER_DEFAULT"""
+    return SCHEDULERS.get(name or "") or SCHEDULERS.get(settings.SCHEDULER_DEFAULT) or SCHEDULERS[SM2Scheduler.name]
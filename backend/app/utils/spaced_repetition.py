@@ -1,40 +1,49 @@
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
 
+# Допустимые интервалы повторения (дни); рассчитанный интервал
+# округляется до ближайшего, при равенстве — до меньшего
+REVIEW_INTERVALS = (1, 7, 16, 35)
+DEFAULT_EASE_FACTOR = 2.5
+MIN_EASE_FACTOR = 1.3
+EASE_STEP_CORRECT = 0.1
+EASE_STEP_WRONG = 0.2
+
 
 def calculate_next_review(
     last_review: Optional[datetime],
     next_review: Optional[datetime],
     interval: int,
     ease_factor: float,
-    is_correct: bool
+    is_correct: bool,
+    now: Optional[datetime] = None
 ) -> Tuple[datetime, int, float]:
     """
     Рассчитывает следующее повторение на основе алгоритма spaced repetition.
     Интервалы: 1, 7, 16, 35 дней
+    now — момент ответа (по умолчанию текущее время; задаётся при воспроизведении истории)
     """
-    now = datetime.utcnow()
+    now = now or datetime.utcnow()
     
     if not last_review:
         # Первое повторение
         new_interval = 1
-        new_ease_factor = 2.5
+        new_ease_factor = DEFAULT_EASE_FACTOR
     else:
         new_interval = interval
-        new_ease_factor = ease_factor or 2.5
+        new_ease_factor = ease_factor or DEFAULT_EASE_FACTOR
         
         if is_correct:
             # Увеличиваем интервал
             new_interval = int(new_interval * new_ease_factor)
-            new_ease_factor = min(new_ease_factor + 0.1, 2.5)
+            new_ease_factor = min(new_ease_factor + EASE_STEP_CORRECT, DEFAULT_EASE_FACTOR)
         else:
             # Уменьшаем интервал при ошибке
             new_interval = max(1, int(new_interval / 2))
-            new_ease_factor = max(1.3, new_ease_factor - 0.2)
+            new_ease_factor = max(MIN_EASE_FACTOR, new_ease_factor - EASE_STEP_WRONG)
     
     # Ограничиваем интервалы: 1, 7, 16, 35 дней
-    intervals = [1, 7, 16, 35]
-    closest_interval = min(intervals, key=lambda x: abs(x - new_interval))
+    closest_interval = min(REVIEW_INTERVALS, key=lambda x: abs(x - new_interval))
     new_interval = closest_interval
     
     next_review_date = now + timedelta(days=new_interval)
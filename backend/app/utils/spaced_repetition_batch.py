@@ -0,0 +1,79 @@
+"""
+Векторизованный (NumPy) вариант calculate_next_review для пакетного
+пересчёта расписаний: импорт истории, смена параметров алгоритма.
+
+Работает с колонками-массивами вместо объектов. Результат побитово
+совпадает со скалярной функцией: те же операции float64, то же усечение
+int() и та же привязка к REVIEW_INTERVALS с выбором меньшего при равенстве
+(проверка — tests/test_spaced_repetition_batch.py).
+"""
+from datetime import datetime
+from typing import Tuple, Union
+
+import numpy as np
+
+from app.utils.spaced_repetition import (
+    REVIEW_INTERVALS, DEFAULT_EASE_FACTOR, MIN_EASE_FACTOR, EASE_STEP_CORRECT, EASE_STEP_WRONG
+)
+
+_INTERVALS = np.array(REVIEW_INTERVALS, dtype=np.int64)
+_DAY = np.timedelta64(1, "D")
+
+
+def snap_intervals(intervals: np.ndarray) -> np.ndarray:
+    """Ближайший допустимый интервал; argmin берёт первый минимум, как min() в скалярной версии"""
+    distance = np.abs(_INTERVALS[np.newaxis, :] - intervals[:, np.newaxis])
+    return _INTERVALS[np.argmin(distance, axis=1)]
+
+
+def calculate_next_review_batch(
+    last_review: np.ndarray,
+    interval: np.ndarray,
+    ease_factor: np.ndarray,
+    is_correct: np.ndarray,
+    now: Union[np.ndarray, np.datetime64, datetime]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Пакетный calculate_next_review.
+
+    last_review — datetime64 (NaT вместо None), interval — целые,
+    ease_factor — float64 (NaN вместо None), is_correct — bool,
+    now — момент ответа: скаляр или массив datetime64.
+    Возвращает (next_review datetime64[us], interval int64, ease_factor float64).
+    """
+    interval = np.asarray(interval, dtype=np.int64)
+    ease = np.asarray(ease_factor, dtype=np.float64)
+    is_correct = np.asarray(is_correct, dtype=bool)
+    first_review = np.isnat(np.asarray(last_review, dtype="datetime64[us]"))
+
+    # ease_factor or 2.5: None и 0 заменяются значением по умолчанию
+    ease = np.where(np.isnan(ease) | (ease == 0), DEFAULT_EASE_FACTOR, ease)
+
+    # int() усекает к нулю, как np.trunc; при ошибке — деление пополам
+    grown = np.trunc(interval * ease).astype(np.int64)
+    shrunk = np.maximum(1, np.trunc(interval / 2).astype(np.int64))
+    new_interval = np.where(is_correct, grown, shrunk)
+    new_ease = np.where(
+        is_correct,
+        np.minimum(ease + EASE_STEP_CORRECT, DEFAULT_EASE_FACTOR),
+        np.maximum(MIN_EASE_FACTOR, ease - EASE_STEP_WRONG)
+    )
+
+    # Первое повторение: интервал 1, коэффициент по умолчанию
+    new_interval = snap_intervals(np.where(first_review, 1, new_interval))
+    new_ease = np.where(first_review, DEFAULT_EASE_FACTOR, new_ease)
+
+    now = np.asarray(now, dtype="datetime64[us]")
+    next_review = now + new_interval * _DAY
+    return next_review, new_interval, new_ease
+
+
+def snap_schedule(last_review: np.ndarray, interval: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Переносит сохранённые расписания на текущую сетку REVIEW_INTERVALS:
+    интервал округляется до допустимого, next_review = last_review + интервал.
+    Для строк без last_review next_review остаётся NaT.
+    """
+    new_interval = snap_intervals(np.asarray(interval, dtype=np.int64))
+    next_review = np.asarray(last_review, dtype="datetime64[us]") + new_interval * _DAY
+    return next_review, new_interval
@@ -0,0 +1,5 @@
+"""
+Бенчмарки горячих путей backend. Запуск из каталога backend/:
+
+    python -m benchmarks.training_cards
+"""
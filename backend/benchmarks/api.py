@@ -0,0 +1,137 @@
+"""
+Нагрузочный бенчмарк горячих эндпоинтов API.
+
+Заполняет базу синтетическими данными (app.seed_data.seed_synthetic),
+затем для каждого эндпоинта:
+  - считает SQL-выражения на запрос (in-process, через TestClient);
+  - гоняет конкурентных клиентов против uvicorn и меряет rps и p50/p95/p99.
+Результат печатается в JSON для сравнения между коммитами.
+
+    python -m benchmarks.api --users 1000 --repetition-rows 10000 --concurrency 50 --duration 20
+    python -m benchmarks.api --skip-seed --endpoints training_cards auth_login
+"""
+import argparse
+import asyncio
+import random
+from typing import Callable, Dict
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.seed_data import (
+    SYNTHETIC_PASSWORD,
+    seed_achievements, seed_default_user, seed_synthetic,
+    synthetic_block_id, synthetic_course_id, synthetic_lesson_id, synthetic_user_email,
+)
+from benchmarks.common import QueryCounter, report
+from benchmarks.load import BenchRequest, run_load, running_server
+
+
+def scenarios(args) -> Dict[str, Callable[[int], BenchRequest]]:
+    """Генераторы запросов по эндпоинтам; i — порядковый номер запроса"""
+
+    def block(i: int):
+        rng = random.Random(i)
+        c = rng.randrange(args.courses)
+        l = rng.randrange(args.lessons_per_course)
+        b = rng.randrange(args.blocks_per_lesson)
+        return synthetic_block_id(c, l, b), synthetic_lesson_id(c, l), synthetic_course_id(c)
+
+    def block_payload(i: int, **extra):
+        block_id, lesson_id, course_id = block(i)
+        return {"block_id": block_id, "lesson_id": lesson_id, "course_id": course_id, **extra}
+
+    return {
+        "training_cards": lambda i: BenchRequest("GET", "/api/training/cards"),
+        "training_submit": lambda i: BenchRequest(
+            "POST", "/api/training/submit", json=block_payload(i, is_correct=i % 5 != 0)
+        ),
+        "progress_block": lambda i: BenchRequest("POST", "/api/progress/block", json=block_payload(i)),
+        "lesson": lambda i: BenchRequest("GET", "/api/lessons/" + block(i)[1]),
+        "achievements": lambda i: BenchRequest("GET", "/api/achievements"),
+        "auth_login": lambda i: BenchRequest("POST", "/api/auth/login", json={
+            "email": synthetic_user_email(i % args.users),
+            "password": SYNTHETIC_PASSWORD,
+        }),
+    }
+
+
+def statements_per_request(make_request: Callable[[int], BenchRequest], samples: int) -> float:
+    """Среднее число SQL-выражений на запрос, замеренное в текущем процессе"""
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.request(**_request_kwargs(make_request(0)))
+        with QueryCounter() as counter:
+            for i in range(1, samples + 1):
+                client.request(**_request_kwargs(make_request(i)))
+    return round(counter.count / samples, 2)
+
+
+def _request_kwargs(request: BenchRequest) -> dict:
+    return {"method": request.method, "url": request.path, "json": request.json, "headers": request.headers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--lessons-per-course", type=int, default=10)
+    parser.add_argument("--blocks-per-lesson", type=int, default=10)
+    parser.add_argument("--repetition-rows", type=int, default=1000)
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже загруженные данные")
+    parser.add_argument("--endpoints", nargs="+", default=None, help="подмножество сценариев")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--statement-samples", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        db = SessionLocal()
+        try:
+            seed_achievements(db)
+            seed_default_user(db)
+            seed_synthetic(
+                db,
+                users=args.users,
+                courses=args.courses,
+                lessons_per_course=args.lessons_per_course,
+                blocks_per_lesson=args.blocks_per_lesson,
+                repetition_rows=args.repetition_rows
+            )
+        finally:
+            db.close()
+
+    selected = {
+        name: make_request for name, make_request in scenarios(args).items()
+        if args.endpoints is None or name in args.endpoints
+    }
+
+    results = {
+        name: {"statements_per_request": statements_per_request(make_request, args.statement_samples)}
+        for name, make_request in selected.items()
+    }
+    with running_server(args.port, workers=args.workers) as base_url:
+        for name, make_request in selected.items():
+            results[name].update(asyncio.run(
+                run_load(base_url, make_request, concurrency=args.concurrency, duration=args.duration)
+            ))
+
+    report({
+        "benchmark": "api",
+        "scale": {
+            "users": args.users,
+            "courses": args.courses,
+            "blocks": args.courses * args.lessons_per_course * args.blocks_per_lesson,
+            "repetition_rows_per_user": args.repetition_rows,
+        },
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Общие утилиты бенчмарков: счётчик SQL-запросов, замер задержек и
+генерация синтетических данных.
+"""
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, insert, delete
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import Category, Course, Lesson, Block, User, RepetitionData, UserDueCard
+from app.services.catalog_cache import bump_catalog_version
+from app.services.training_service import rebuild_due_queue
+
+BENCH_CATEGORY_ID = "bench"
+BENCH_COURSE_ID = "BENCH-001"
+BLOCKS_PER_LESSON = 100
+
+
+class QueryCounter:
+    """Считает SQL-выражения, выполненные через engine внутри блока with"""
+
+    def __init__(self, bind=engine):
+        self.bind = bind
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.bind, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._on_execute)
+        return False
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Перцентиль по отсортированной выборке (nearest-rank)"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(fn: Callable[[], object], repeat: int = 50, warmup: int = 5) -> Dict[str, float]:
+    """Вызывает fn repeat раз и возвращает задержки (мс) и число запросов на вызов"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    with QueryCounter() as counter:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "queries_per_call": counter.count / repeat,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+def ensure_bench_catalog(db: Session, total_blocks: int) -> List[str]:
+    """Создаёт синтетический курс не менее чем с total_blocks практическими блоками"""
+    if not db.query(Category).filter(Category.id == BENCH_CATEGORY_ID).first():
+        db.add(Category(id=BENCH_CATEGORY_ID, name="Benchmark", icon="⏱"))
+    if not db.query(Course).filter(Course.course_id == BENCH_COURSE_ID).first():
+        db.add(Course(
+            course_id=BENCH_COURSE_ID,
+            title="Benchmark course",
+            category_id=BENCH_CATEGORY_ID,
+            subcategory="Benchmark",
+            level="Легкий",
+            difficulty_score=1,
+            estimated_duration_weeks=1,
+            estimated_duration_hours=1,
+            total_lessons=0,
+            total_practice_tasks=0,
+            author="benchmarks",
+            short_description="Synthetic benchmark data",
+            full_description="Synthetic benchmark data",
+            cover_image_url="https://example.com/covers/bench.jpg"
+        ))
+    db.commit()
+
+    existing = db.query(Block.id).join(Lesson).filter(Lesson.course_id == BENCH_COURSE_ID).count()
+    lessons_needed = -(-total_blocks // BLOCKS_PER_LESSON)
+    lessons_existing = existing // BLOCKS_PER_LESSON
+
+    for lesson_index in range(lessons_existing, lessons_needed):
+        lesson_id = f"bench-lesson-{lesson_index}"
+        db.execute(insert(Lesson), [{
+            "id": lesson_id,
+            "course_id": BENCH_COURSE_ID,
+            "order": lesson_index,
+            "title": f"Benchmark lesson {lesson_index}",
+            "description": "Synthetic lesson",
+        }])
+        db.execute(insert(Block), [
+            {
+                "id": f"{lesson_id}-block-{order}",
+                "lesson_id": lesson_id,
+                "type": "practice",
+                "subtype": "multiple_choice",
+                "order": order,
+                "title": f"Question {order}",
+                "question": "2 + 2 = ?",
+                "options": ["3", "4", "5"],
+                "hints": [],
+                "correct_answer": "4",
+            }
+            for order in range(BLOCKS_PER_LESSON)
+        ])
+    # Core-вставки не проходят через ORM-хук инвалидации каталога
+    bump_catalog_version(db)
+    db.commit()
+
+    return [
+        f"bench-lesson-{index // BLOCKS_PER_LESSON}-block-{index % BLOCKS_PER_LESSON}"
+        for index in range(total_blocks)
+    ]
+
+
+def create_bench_user(db: Session, suffix: str) -> int:
+    """Создаёт (или находит) пользователя для бенчмарка и возвращает его id"""
+    email = f"bench-{suffix}@example.com"
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        user = User(email=email, hashed_password="!", name=f"Bench {suffix}")
+        db.add(user)
+        db.commit()
+    return user.id
+
+
+def seed_repetition_rows(db: Session, user_id: int, block_ids: List[str], batch_size: int = 5000) -> None:
+    """
+    Заполняет repetition_data пользователя: ~1% карточек с ошибками,
+    ~20% просроченных, остальные запланированы на будущее.
+    """
+    db.execute(delete(RepetitionData).where(RepetitionData.user_id == user_id))
+    now = datetime.utcnow()
+
+    rows = []
+    for index, block_id in enumerate(block_ids):
+        lesson_id = block_id.rsplit("-block-", 1)[0]
+        overdue = index % 5 == 0
+        rows.append({
+            "user_id": user_id,
+            "block_id": block_id,
+            "lesson_id": lesson_id,
+            "course_id": BENCH_COURSE_ID,
+            "last_review": now - timedelta(days=7),
+            "next_review": now - timedelta(hours=index % 48) if overdue else now + timedelta(days=1 + index % 30),
+            "interval": 7,
+            "ease_factor": 2.5,
+            "needs_review": index % 100 == 0,
+            "mistakes": 1 if index % 100 == 0 else 0,
+        })
+        if len(rows) >= batch_size:
+            db.execute(insert(RepetitionData), rows)
+            rows = []
+    if rows:
+        db.execute(insert(RepetitionData), rows)
+    db.execute(delete(UserDueCard).where(UserDueCard.user_id == user_id))
+    rebuild_due_queue(db, user_id)
+    db.commit()
+
+
+def report(results: Dict) -> None:
+    """Печатает результаты в JSON для сравнения между коммитами"""
+    print(json.dumps(results, ensure_ascii=False, indent=2))
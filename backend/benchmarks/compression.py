@@ -0,0 +1,109 @@
+"""
+Размер ответов на проводе и CPU сериализации/сжатия по эндпоинтам.
+
+Для каждого эндпоинта (in-process, TestClient):
+  - байты на проводе без сжатия, с gzip и с brotli;
+  - CPU на сериализацию тела: json.dumps (прежний JSONResponse) и orjson.dumps;
+  - CPU на сжатие тела gzip/brotli с текущими настройками.
+
+    python -m benchmarks.compression --repeat 200
+    python -m benchmarks.compression --skip-seed --endpoints courses lesson
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict
+
+import orjson
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.seed_data import seed_achievements, seed_default_user, seed_synthetic, synthetic_lesson_id
+from app.utils.compression import SUPPORTED_ENCODINGS, compress
+from benchmarks.common import report
+
+ENDPOINTS: Dict[str, str] = {
+    "courses": "/api/courses",
+    "lesson": "/api/lessons/" + synthetic_lesson_id(0, 0),
+    "training_cards": "/api/training/cards",
+    "achievements": "/api/achievements",
+    "user_statistics": "/api/user/statistics",
+}
+
+
+def _cpu_us(fn: Callable[[], object], repeat: int) -> float:
+    """Среднее процессорное время вызова, мкс"""
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return round((time.process_time() - started) / repeat * 1e6, 1)
+
+
+def measure(client: TestClient, path: str, repeat: int) -> Dict:
+    identity = client.get(path, headers={"Accept-Encoding": "identity"})
+    body = identity.content
+    content = json.loads(body)
+
+    wire = {"identity": identity.num_bytes_downloaded}
+    for encoding in SUPPORTED_ENCODINGS:
+        wire[encoding] = client.get(path, headers={"Accept-Encoding": encoding}).num_bytes_downloaded
+
+    return {
+        "status": identity.status_code,
+        "bytes": wire,
+        "serialize_us": {
+            # Так рендерил starlette JSONResponse
+            "json": _cpu_us(lambda: json.dumps(
+                content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+            ).encode("utf-8"), repeat),
+            "orjson": _cpu_us(lambda: orjson.dumps(content), repeat),
+        },
+        "compress_us": {
+            encoding: _cpu_us(lambda: compress(body, encoding), repeat)
+            for encoding in SUPPORTED_ENCODINGS
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--lessons-per-course", type=int, default=10)
+    parser.add_argument("--blocks-per-lesson", type=int, default=10)
+    parser.add_argument("--repetition-rows", type=int, default=1000)
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже загруженные данные")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        db = SessionLocal()
+        try:
+            seed_achievements(db)
+            seed_default_user(db)
+            seed_synthetic(
+                db,
+                users=1,
+                courses=args.courses,
+                lessons_per_course=args.lessons_per_course,
+                blocks_per_lesson=args.blocks_per_lesson,
+                repetition_rows=args.repetition_rows
+            )
+        finally:
+            db.close()
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        results = {name: measure(client, ENDPOINTS[name], args.repeat) for name in args.endpoints}
+
+    report({
+        "benchmark": "compression",
+        "encodings": list(SUPPORTED_ENCODINGS),
+        "repeat": args.repeat,
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Список курсов: полные строки против проекции (CourseSummary и ?fields=).
+
+Для каждого варианта списка:
+  - средняя ширина строки в PostgreSQL (pg_column_size выбранных колонок);
+  - время запроса с загрузкой ORM-объектов и число SQL-выражений;
+  - CPU на сериализацию (валидация схемой + JSON) и размер тела ответа.
+
+Вариант full — прежний /courses (все колонки, CourseResponse), summary —
+/courses по умолчанию, grid — ?fields= только для сетки каталога.
+Курсы создаются с описаниями реалистичного размера (как у TM-INTER-002).
+
+    python -m benchmarks.course_list --courses 200 --repeat 100
+"""
+import argparse
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import SessionLocal
+from app.models import Category, Course
+from app.services.catalog_cache import bump_catalog_version
+from app.services.course_service import compile_courses, courses_list_statement, parse_course_fields
+from benchmarks.common import measure, report
+
+CATEGORY_ID = "bench-course-list"
+
+VARIANTS: Dict[str, Optional[str]] = {
+    "full": "*",
+    "summary": None,
+    "grid": "title,cover_image_url,level",
+}
+
+
+def ensure_courses(db, courses: int, description_chars: int) -> None:
+    """Создаёт courses курсов с тяжёлыми полями описания (идемпотентно)"""
+    db.execute(pg_insert(Category).values(id=CATEGORY_ID, name="Benchmark: course list", icon="⏱").on_conflict_do_nothing())
+    paragraph = "Курс основан на нейробиологии, психологии и проверенных методологиях. "
+    description = (paragraph * (description_chars // len(paragraph) + 1))[:description_chars]
+    db.execute(pg_insert(Course).values([
+        {
+            "course_id": f"BENCH-LIST-{index:05d}",
+            "title": f"Курс для бенчмарка списка {index}",
+            "category_id": CATEGORY_ID,
+            "subcategory": "Benchmark",
+            "level": "Средний",
+            "difficulty_score": 5,
+            "estimated_duration_weeks": 4,
+            "estimated_duration_hours": 20,
+            "total_lessons": 5,
+            "total_practice_tasks": 40,
+            "tags": [f"тег-{tag}" for tag in range(8)],
+            "author": "benchmarks",
+            "target_audience": ["руководители", "креативные специалисты", "фрилансеры", "исследователи"],
+            "short_description": "Системный подход к продуктивности",
+            "full_description": description,
+            "learning_outcomes": [f"Результат обучения {outcome}: {paragraph}" for outcome in range(6)],
+            "prerequisites": ["Базовые знания тайм-менеджмента", "Опыт планирования задач"],
+            "cover_image_url": f"https://example.com/covers/bench-list-{index}.jpg",
+        }
+        for index in range(courses)
+    ]).on_conflict_do_nothing())
+    bump_catalog_version(db)
+    db.commit()
+
+
+def _cpu_us(fn: Callable[[], object], repeat: int) -> float:
+    """Среднее процессорное время вызова, мкс"""
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return round((time.process_time() - started) / repeat * 1e6, 1)
+
+
+def measure_variant(db, fields: Optional[str], repeat: int) -> Dict:
+    selected = parse_course_fields(fields)
+    stmt = courses_list_statement(selected, CATEGORY_ID)
+    columns = [Course.__table__.c[name] for name in selected if name in Course.__table__.c]
+    row_bytes = db.scalar(
+        select(func.avg(func.pg_column_size(func.row(*columns)))).where(Course.category_id == CATEGORY_ID)
+    )
+
+    def load():
+        # Без identity map: каждый вызов заново строит объекты из строк
+        db.expunge_all()
+        return db.scalars(stmt).all()
+
+    courses = load()
+    body = compile_courses(selected, courses).body
+    return {
+        "fields": list(selected),
+        "columns": len(columns),
+        "avg_row_bytes": round(float(row_bytes or 0), 1),
+        "query": measure(load, repeat=repeat),
+        "serialize_us": _cpu_us(lambda: compile_courses(selected, courses), repeat),
+        "body_bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=200)
+    parser.add_argument("--description-chars", type=int, default=2000)
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже загруженные данные")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.skip_seed:
+            ensure_courses(db, args.courses, args.description_chars)
+        results = {name: measure_variant(db, fields, args.repeat) for name, fields in VARIANTS.items()}
+    finally:
+        db.close()
+
+    report({
+        "benchmark": "course_list",
+        "courses": args.courses,
+        "repeat": args.repeat,
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
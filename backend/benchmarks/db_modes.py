@@ -0,0 +1,54 @@
+"""
+Сравнение синхронного (psycopg2 + threadpool) и асинхронного (asyncpg)
+режимов БД: requests/sec и p99 при 200+ конкурентных клиентах.
+Сервер поднимается дважды, с DB_ASYNC=false и DB_ASYNC=true.
+
+    python -m benchmarks.db_modes --concurrency 200 400 --duration 30
+"""
+import argparse
+import asyncio
+import random
+
+from benchmarks.common import report
+from benchmarks.load import BenchRequest, run_load, running_server
+
+# Практические блоки из app/seed_data.py
+SUBMIT_BLOCKS = [
+    ("block_1_2", "lesson_1", "TM-INTER-002"),
+    ("block_1_3", "lesson_1", "TM-INTER-002"),
+]
+
+
+def scenarios():
+    return {
+        "training_cards": lambda i: BenchRequest("GET", "/api/training/cards"),
+        "courses_progress": lambda i: BenchRequest("GET", "/api/courses/progress"),
+        "training_submit": lambda i: BenchRequest("POST", "/api/training/submit", json={
+            "block_id": SUBMIT_BLOCKS[i % len(SUBMIT_BLOCKS)][0],
+            "lesson_id": SUBMIT_BLOCKS[i % len(SUBMIT_BLOCKS)][1],
+            "course_id": SUBMIT_BLOCKS[i % len(SUBMIT_BLOCKS)][2],
+            "is_correct": random.random() < 0.8,
+        }),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[200])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, env in (("sync", {"DB_ASYNC": "false"}), ("async", {"DB_ASYNC": "true"})):
+        with running_server(args.port, env) as base_url:
+            for name, make_request in scenarios().items():
+                for concurrency in args.concurrency:
+                    stats = asyncio.run(run_load(base_url, make_request, concurrency, args.duration))
+                    results.setdefault(name, {}).setdefault(str(concurrency), {})[mode] = stats
+
+    report({"benchmark": "db_modes", "results": results})
+
+
+if __name__ == "__main__":
+    main()
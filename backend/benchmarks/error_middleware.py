@@ -0,0 +1,158 @@
+"""
+Накладные расходы GlobalErrorHandler на запрос: чистый ASGI против
+прежней реализации на BaseHTTPMiddleware.
+
+Приложение-заглушка без БД вызывается напрямую через ASGI (без HTTP и
+TestClient), поэтому разница задержек — это стоимость самого middleware.
+Дополнительно проверяется, что обе реализации одинаково отображают ошибки
+SQLAlchemy в статусы и что потоковый ответ доходит частями.
+
+    python -m benchmarks.error_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.error_handler import GlobalErrorHandler
+from benchmarks.common import percentile, report
+
+STREAM_CHUNKS = 5
+ERRORS = {
+    "operational": OperationalError("SELECT 1", {}, Exception("connection refused")),
+    "integrity": IntegrityError("INSERT", {}, Exception("duplicate key")),
+    "sqlalchemy": SQLAlchemyError("boom"),
+    "unhandled": RuntimeError("boom"),
+}
+
+
+class LegacyGlobalErrorHandler(BaseHTTPMiddleware):
+    """Прежняя реализация (BaseHTTPMiddleware) с тем же отображением ошибок"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._handler = GlobalErrorHandler(app)
+
+    async def dispatch(self, request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as e:
+            return await self._handler.handle_exception(e)
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/error/{kind}")
+    async def error(kind: str):
+        raise ERRORS[kind]
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(STREAM_CHUNKS):
+                yield f"chunk-{index}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def call(app, path: str) -> Tuple[int, List[bytes]]:
+    """Один запрос через ASGI; возвращает статус и части тела"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = 0
+    chunks: List[bytes] = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Клиент не отключается: ждём, пока ожидающую задачу не отменят
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"])
+
+    await app(scope, receive, send)
+    return status, chunks
+
+
+async def latency(app, path: str, requests: int, warmup: int = 200) -> Dict[str, float]:
+    for _ in range(warmup):
+        await call(app, path)
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await call(app, path)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(percentile(samples, 50), 1),
+        "p99_us": round(percentile(samples, 99), 1),
+    }
+
+
+async def run(requests: int) -> Dict:
+    apps = {
+        "none": build_app(None),
+        "base_http": build_app(LegacyGlobalErrorHandler),
+        "pure_asgi": build_app(GlobalErrorHandler),
+    }
+    results = {}
+    for name, app in apps.items():
+        entry = {"ping": await latency(app, "/ping", requests)}
+        # Без обработчика исключение уходит наружу из приложения
+        if name != "none":
+            entry["error"] = await latency(app, "/error/integrity", requests // 10)
+            entry["status"] = {kind: (await call(app, f"/error/{kind}"))[0] for kind in ERRORS}
+        status, chunks = await call(app, "/stream")
+        entry["stream"] = {"status": status, "chunks": len(chunks)}
+        results[name] = entry
+
+    overhead = {
+        name: round(results[name]["ping"]["mean_us"] - results["none"]["ping"]["mean_us"], 1)
+        for name in ("base_http", "pure_asgi")
+    }
+    return {
+        "results": results,
+        "overhead_mean_us": overhead,
+        "same_mapping": results["base_http"]["status"] == results["pure_asgi"]["status"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    # Обработчик логирует каждую ошибку; в замере это только шум
+    logging.disable(logging.CRITICAL)
+
+    report({"benchmark": "error_middleware", "requests": args.requests, **asyncio.run(run(args.requests))})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Проверка планов горячих запросов: EXPLAIN каждого выражения из сервисов
+должен использовать индекс, заведённый под его форму (миграции 007 и 010).
+
+Последовательное сканирование отключается (enable_seqscan = off), чтобы
+проверка не зависела от объёма данных: на маленькой таблице планировщик
+честно выбирает seq scan, а здесь важно, что подходящий индекс вообще есть.
+Код возврата 1, если хотя бы один запрос не попал в ожидаемый индекс.
+Те же запросы на пустых таблицах проверяет tests/test_explain_indexes.py.
+
+    python -m benchmarks.explain_indexes --size 20000
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from typing import Iterator, Set
+
+from sqlalchemy import exists, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Achievement, Block, Lesson, UserAchievement, UserCourse, UserProgress
+from app.services.course_service import _courses_progress_statement
+from app.services.training_service import _training_candidates, _due_counts_statement, _repetition_data_statement
+from benchmarks.common import BENCH_COURSE_ID, ensure_bench_catalog, create_bench_user, seed_repetition_rows, report
+
+
+def _index_names(plan: dict) -> Iterator[str]:
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from _index_names(child)
+
+
+def explain_indexes(db: Session, stmt) -> Set[str]:
+    """Имена индексов, которые использует план выражения"""
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return set(_index_names(plan[0]["Plan"]))
+
+
+def hot_queries(user_id: int, block_id: str, lesson_id: str):
+    """(название, выражение, ожидаемый индекс) для горячих путей сервисов"""
+    candidates = _training_candidates(user_id, datetime.utcnow())
+    return [
+        ("training_candidates", select(candidates), "ix_user_due_cards_queue"),
+        ("due_counts", _due_counts_statement(user_id, datetime.utcnow()), "ix_user_due_cards_queue"),
+        ("training_submit_lookup", _repetition_data_statement(user_id, block_id), "uq_repetition_data_user_block"),
+        ("courses_progress", _courses_progress_statement(user_id, None), "uq_user_courses_user_course"),
+        ("lesson_started", select(exists().where(
+            UserProgress.user_id == user_id,
+            UserProgress.lesson_id == lesson_id
+        )), "ix_user_progress_user_lesson"),
+        ("course_started", select(exists().where(
+            UserProgress.user_id == user_id,
+            UserProgress.course_id == BENCH_COURSE_ID
+        )), "ix_user_progress_user_course"),
+        ("user_achievements", select(UserAchievement, Achievement)
+            .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+            .where(UserAchievement.user_id == user_id), "uq_user_achievements_user_achievement"),
+        ("enrollment_lookup", select(UserCourse).where(
+            UserCourse.user_id == user_id,
+            UserCourse.course_id == BENCH_COURSE_ID
+        ), "uq_user_courses_user_course"),
+        ("course_lessons", select(Lesson).where(Lesson.course_id == BENCH_COURSE_ID).order_by(Lesson.order),
+            "ix_lessons_course_id_order"),
+        ("lesson_blocks", select(Block).where(Block.lesson_id == lesson_id).order_by(Block.order),
+            "ix_blocks_lesson_id_order"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20_000, help="строк repetition_data у пользователя")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    results = {}
+    try:
+        block_ids = ensure_bench_catalog(db, args.size + 100)
+        user_id = create_bench_user(db, "explain")
+        seed_repetition_rows(db, user_id, block_ids[:args.size])
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+        block_id = block_ids[0]
+        lesson_id = block_id.rsplit("-block-", 1)[0]
+
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, stmt, expected in hot_queries(user_id, block_id, lesson_id):
+            used = explain_indexes(db, stmt)
+            results[name] = {"expected": expected, "used": sorted(used), "ok": expected in used}
+        db.rollback()
+    finally:
+        db.close()
+
+    report({"benchmark": "explain_indexes", "results": results})
+    if not all(result["ok"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Генератор HTTP-нагрузки для бенчмарков: N конкурентных клиентов
+в течение заданного времени, задержки и пропускная способность.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class BenchRequest:
+    method: str
+    path: str
+    json: Optional[dict] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+async def run_load(
+    base_url: str,
+    make_request: Callable[[int], BenchRequest],
+    concurrency: int = 200,
+    duration: float = 20.0,
+    warmup: float = 2.0,
+) -> Dict[str, float]:
+    """
+    Запускает concurrency клиентов, каждый шлёт запросы без пауз.
+    make_request(i) получает порядковый номер запроса клиента.
+    Первые warmup секунд в статистику не попадают.
+    """
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        started = time.perf_counter()
+        measure_from = started + warmup
+        deadline = measure_from + duration
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            sequence = 0
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                request = make_request(worker_id * 1_000_000 + sequence)
+                sequence += 1
+                try:
+                    response = await client.request(
+                        request.method, request.path, json=request.json, headers=request.headers
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = None
+                finished = time.perf_counter()
+                if now < measure_from:
+                    continue
+                if status is None:
+                    errors += 1
+                    continue
+                statuses[status] = statuses.get(status, 0) + 1
+                latencies.append((finished - now) * 1000)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(total / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2) if total else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if total else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if total else None,
+    }
+
+
+@contextmanager
+def running_server(port: int, env: Optional[Dict[str, str]] = None, workers: int = 1):
+    """Поднимает uvicorn с приложением в отдельном процессе на время блока with"""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        else:
+            raise RuntimeError("Server did not start")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
@@ -0,0 +1,61 @@
+"""
+Задержка /training/cards во время «шторма» логинов.
+
+Сначала меряется /training/cards без фоновой нагрузки, затем одновременно
+с потоком POST /auth/login. Сервер поднимается с пулом хэширования
+паролей и без него (PASSWORD_HASH_POOL_ENABLED=false), чтобы было видно,
+что с пулом задержка карточек остаётся ровной, а лишние логины получают 503.
+
+    python -m benchmarks.login_storm --login-concurrency 100 --cards-concurrency 10
+"""
+import argparse
+import asyncio
+
+from app.database import SessionLocal
+from app.seed_data import SYNTHETIC_PASSWORD, seed_achievements, seed_default_user, seed_synthetic, synthetic_user_email
+from benchmarks.common import report
+from benchmarks.load import BenchRequest, run_load, running_server
+
+
+async def storm(base_url: str, args) -> dict:
+    cards = lambda i: BenchRequest("GET", "/api/training/cards")
+    login = lambda i: BenchRequest("POST", "/api/auth/login", json={
+        "email": synthetic_user_email(i % args.users),
+        "password": SYNTHETIC_PASSWORD,
+    })
+
+    baseline = await run_load(base_url, cards, concurrency=args.cards_concurrency, duration=args.duration)
+    during, logins = await asyncio.gather(
+        run_load(base_url, cards, concurrency=args.cards_concurrency, duration=args.duration),
+        run_load(base_url, login, concurrency=args.login_concurrency, duration=args.duration),
+    )
+    return {"training_cards_baseline": baseline, "training_cards_during_storm": during, "auth_login": logins}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--cards-concurrency", type=int, default=10)
+    parser.add_argument("--login-concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed_achievements(db)
+        seed_default_user(db)
+        seed_synthetic(db, users=args.users)
+    finally:
+        db.close()
+
+    results = {}
+    for mode, enabled in (("inline", "false"), ("pool", "true")):
+        with running_server(args.port, env={"PASSWORD_HASH_POOL_ENABLED": enabled}) as base_url:
+            results[mode] = asyncio.run(storm(base_url, args))
+
+    report({"benchmark": "login_storm", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Перегрузка пула соединений: хвост задержек с допуском (DB_ADMISSION_ENABLED)
+и без него.
+
+Сервер поднимается с маленьким пулом (--pool-size, --max-overflow), и на
+него одновременно идут три класса запросов, суммарно намного больше
+соединений пула:
+  critical — POST /training/submit, normal — GET /training/cards,
+  low — GET /achievements.
+Без допуска все стоят в общей очереди пула (до DB_POOL_TIMEOUT). С допуском
+critical обслуживаются первыми, а low/normal сверх очереди или бюджета
+сразу получают 503 — p99 успешных запросов остаётся ограниченным.
+
+    python -m benchmarks.pool_admission --pool-size 2 --max-overflow 0 --duration 15
+"""
+import argparse
+import asyncio
+
+from app.database import SessionLocal
+from app.seed_data import seed_achievements, seed_default_user, seed_synthetic
+from benchmarks.api import scenarios
+from benchmarks.common import report
+from benchmarks.load import run_load, running_server
+
+CLASSES = {
+    "critical": "training_submit",
+    "normal": "training_cards",
+    "low": "achievements",
+}
+
+
+async def overload(base_url: str, args) -> dict:
+    requests = scenarios(args)
+    concurrency = {"critical": args.critical_concurrency, "normal": args.normal_concurrency, "low": args.low_concurrency}
+    results = await asyncio.gather(*(
+        run_load(base_url, requests[scenario], concurrency=concurrency[priority], duration=args.duration)
+        for priority, scenario in CLASSES.items()
+    ))
+    return dict(zip(CLASSES, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--lessons-per-course", type=int, default=10)
+    parser.add_argument("--blocks-per-lesson", type=int, default=10)
+    parser.add_argument("--repetition-rows", type=int, default=1000)
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже загруженные данные")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--critical-concurrency", type=int, default=20)
+    parser.add_argument("--normal-concurrency", type=int, default=40)
+    parser.add_argument("--low-concurrency", type=int, default=80)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        db = SessionLocal()
+        try:
+            seed_achievements(db)
+            seed_default_user(db)
+            seed_synthetic(
+                db,
+                users=args.users,
+                courses=args.courses,
+                lessons_per_course=args.lessons_per_course,
+                blocks_per_lesson=args.blocks_per_lesson,
+                repetition_rows=args.repetition_rows
+            )
+        finally:
+            db.close()
+
+    env = {"DB_POOL_SIZE": str(args.pool_size), "DB_MAX_OVERFLOW": str(args.max_overflow)}
+    results = {}
+    for mode, enabled in (("no_admission", "false"), ("admission", "true")):
+        with running_server(args.port, env={**env, "DB_ADMISSION_ENABLED": enabled}) as base_url:
+            results[mode] = asyncio.run(overload(base_url, args))
+
+    report({
+        "benchmark": "pool_admission",
+        "pool": {"size": args.pool_size, "max_overflow": args.max_overflow},
+        "concurrency": {
+            "critical": args.critical_concurrency,
+            "normal": args.normal_concurrency,
+            "low": args.low_concurrency,
+        },
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Пропускная способность POST /auth/refresh при большом числе исторических
+строк в refresh_tokens (по умолчанию 10M).
+
+История генерируется на стороне PostgreSQL (generate_series): половина
+строк просрочена, четверть отозвана. Каждый клиент один раз входит и
+затем в цикле ротирует свой refresh-токен. С --prune дополнительно
+замеряется время фоновой очистки.
+
+    python -m benchmarks.refresh_tokens --rows 10000000 --concurrency 50 --duration 20
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import func, select, text
+
+from app.database import SessionLocal
+from app.models import RefreshToken
+from app.seed_data import SYNTHETIC_PASSWORD, seed_default_user, seed_synthetic, synthetic_user_email
+from app.services.refresh_token_service import prune_refresh_tokens
+from benchmarks.common import percentile, report
+from benchmarks.load import running_server
+
+HISTORY_FAMILY_PREFIX = "bench"
+
+
+def seed_history(rows: int, batch_size: int = 1_000_000) -> None:
+    """Догружает исторические строки до rows штук"""
+    db = SessionLocal()
+    try:
+        existing = db.scalar(
+            select(func.count()).select_from(RefreshToken)
+            .where(RefreshToken.family_id.startswith(HISTORY_FAMILY_PREFIX))
+        )
+        for start in range(existing, rows, batch_size):
+            db.execute(text("""
+                INSERT INTO refresh_tokens (user_id, token_hash, family_id, expires_at, created_at, is_revoked, revoked_at)
+                SELECT 1,
+                       sha256(convert_to('bench-history-' || i, 'UTF8')),
+                       :prefix || (i / 4),
+                       now() + CASE WHEN i % 2 = 0 THEN interval '-1 day' ELSE interval '29 days' END,
+                       now() - interval '1 day',
+                       i % 4 = 1,
+                       CASE WHEN i % 4 = 1 THEN now() - interval '2 days' END
+                FROM generate_series(:start, :stop - 1) AS i
+                ON CONFLICT DO NOTHING
+            """), {"prefix": HISTORY_FAMILY_PREFIX, "start": start, "stop": min(start + batch_size, rows)})
+            db.commit()
+        db.execute(text("ANALYZE refresh_tokens"))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def refresh_load(base_url: str, users: int, concurrency: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    failures = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        async def worker(worker_id: int):
+            nonlocal failures
+            response = await client.post("/api/auth/login", json={
+                "email": synthetic_user_email(worker_id % users),
+                "password": SYNTHETIC_PASSWORD,
+            })
+            token = response.json()["refresh_token"]
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post("/api/auth/refresh", json={"refresh_token": token})
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    failures += 1
+                    return
+                token = response.json()["refresh_token"]
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--prune", action="store_true", help="замерить очистку после нагрузки")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed_default_user(db)
+        seed_synthetic(db, users=args.concurrency, repetition_rows=0)
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    seed_history(args.rows)
+    results = {"rows": args.rows, "seed_seconds": round(time.perf_counter() - started, 1)}
+
+    with running_server(args.port) as base_url:
+        results["refresh"] = asyncio.run(refresh_load(base_url, args.concurrency, args.concurrency, args.duration))
+
+    if args.prune:
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            results["pruned_rows"] = prune_refresh_tokens(db)
+            results["prune_seconds"] = round(time.perf_counter() - started, 1)
+        finally:
+            db.close()
+
+    report({"benchmark": "refresh_tokens", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Бенчмарк выбора карточек для /training/cards.
+
+Сравнивает прежнюю реализацию (запрос Block на каждую строку RepetitionData
+и NOT IN по всем просмотренным блокам) с текущей set-based выборкой
+при 10k и 100k строк repetition_data у одного пользователя.
+
+    python -m benchmarks.training_cards --sizes 10000 100000
+"""
+import argparse
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Block, RepetitionData
+from app.services.training_service import get_cards_for_training
+from benchmarks.common import (
+    measure, ensure_bench_catalog, create_bench_user, seed_repetition_rows, report
+)
+
+
+def legacy_get_cards_for_training(db: Session, user_id: int, limit: int = 10) -> List[Block]:
+    """Реализация до перехода на set-based выборку (для сравнения)"""
+    now = datetime.utcnow()
+    cards: List[Block] = []
+
+    needs_review_data = db.query(RepetitionData).filter(
+        and_(RepetitionData.user_id == user_id, RepetitionData.needs_review == True)
+    ).limit(5).all()
+    cards.extend(
+        db.query(Block).filter(Block.id == rd.block_id).first()
+        for rd in needs_review_data
+        if db.query(Block).filter(Block.id == rd.block_id).first()
+    )
+
+    due_review_data = db.query(RepetitionData).filter(
+        and_(
+            RepetitionData.user_id == user_id,
+            RepetitionData.needs_review == False,
+            RepetitionData.next_review <= now
+        )
+    ).limit(5).all()
+    cards.extend(
+        db.query(Block).filter(Block.id == rd.block_id).first()
+        for rd in due_review_data
+        if db.query(Block).filter(Block.id == rd.block_id).first()
+    )
+
+    existing_block_ids = {
+        rd.block_id for rd in db.query(RepetitionData).filter(RepetitionData.user_id == user_id).all()
+    }
+    cards.extend(db.query(Block).filter(~Block.id.in_(existing_block_ids)).limit(2).all())
+
+    return cards[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    results = {}
+    try:
+        # Запас блоков, чтобы у пользователя оставались «новые» карточки
+        block_ids = ensure_bench_catalog(db, max(args.sizes) + 100)
+
+        for size in args.sizes:
+            user_id = create_bench_user(db, f"training-{size}")
+            seed_repetition_rows(db, user_id, block_ids[:size])
+
+            results[str(size)] = {
+                "legacy": measure(lambda: (legacy_get_cards_for_training(db, user_id), db.expire_all()), repeat=args.repeat),
+                "set_based": measure(lambda: (get_cards_for_training(db, user_id), db.expire_all()), repeat=args.repeat),
+            }
+    finally:
+        db.close()
+
+    report({"benchmark": "training_cards", "results": results})
+
+
+if __name__ == "__main__":
+    main()
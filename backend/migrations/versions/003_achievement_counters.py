@@ -0,0 +1,70 @@
+"""achievement counters
+
+Revision ID: 003_achievement_counters
+Revises: 002_add_authentication
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_achievement_counters'
+down_revision: Union[str, None] = '002_add_authentication'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create user_achievement_counters table
+    op.create_table(
+        'user_achievement_counters',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('blocks_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lessons_started', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('courses_started', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cards_reviewed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cards_clean', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_achievement_counters_id'), 'user_achievement_counters', ['id'], unique=False)
+
+    # Backfill counters from existing history
+    op.execute("""
+        INSERT INTO user_achievement_counters
+            (user_id, blocks_completed, lessons_started, courses_started, cards_reviewed, cards_clean, streak)
+        SELECT
+            u.id,
+            (SELECT count(*) FROM user_progress p WHERE p.user_id = u.id),
+            (SELECT count(DISTINCT p.lesson_id) FROM user_progress p WHERE p.user_id = u.id),
+            (SELECT count(DISTINCT p.course_id) FROM user_progress p WHERE p.user_id = u.id),
+            (SELECT count(*) FROM repetition_data r WHERE r.user_id = u.id),
+            (SELECT count(*) FROM repetition_data r WHERE r.user_id = u.id AND r.mistakes = 0),
+            coalesce(u.streak, 0)
+        FROM users u
+    """)
+
+    # Remove duplicate user achievements before adding the unique constraint
+    op.execute("""
+        DELETE FROM user_achievements a
+        USING user_achievements b
+        WHERE a.user_id = b.user_id
+          AND a.achievement_id = b.achievement_id
+          AND a.id > b.id
+    """)
+    op.create_unique_constraint(
+        'uq_user_achievements_user_achievement', 'user_achievements', ['user_id', 'achievement_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_user_achievements_user_achievement', 'user_achievements', type_='unique')
+    op.drop_index(op.f('ix_user_achievement_counters_id'), table_name='user_achievement_counters')
+    op.drop_table('user_achievement_counters')
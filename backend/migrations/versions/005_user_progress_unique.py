@@ -0,0 +1,35 @@
+"""user progress unique (user_id, block_id)
+
+Revision ID: 005_user_progress_unique
+Revises: 004_catalog_version
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_user_progress_unique'
+down_revision: Union[str, None] = '004_catalog_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the earliest completion of each block before adding the constraint
+    op.execute("""
+        DELETE FROM user_progress a
+        USING user_progress b
+        WHERE a.user_id = b.user_id
+          AND a.block_id = b.block_id
+          AND a.id > b.id
+    """)
+    op.create_unique_constraint(
+        'uq_user_progress_user_block', 'user_progress', ['user_id', 'block_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_user_progress_user_block', 'user_progress', type_='unique')
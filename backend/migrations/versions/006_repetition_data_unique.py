@@ -0,0 +1,41 @@
+"""repetition data unique (user_id, block_id)
+
+Revision ID: 006_repetition_data_unique
+Revises: 005_user_progress_unique
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_repetition_data_unique'
+down_revision: Union[str, None] = '005_user_progress_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the most recently reviewed row of each card before adding the constraint
+    op.execute("""
+        DELETE FROM repetition_data
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, block_id
+                    ORDER BY last_review DESC NULLS LAST, id DESC
+                ) AS position
+                FROM repetition_data
+            ) ranked
+            WHERE ranked.position > 1
+        )
+    """)
+    op.create_unique_constraint(
+        'uq_repetition_data_user_block', 'repetition_data', ['user_id', 'block_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_repetition_data_user_block', 'repetition_data', type_='unique')
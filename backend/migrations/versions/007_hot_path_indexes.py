@@ -0,0 +1,57 @@
+"""indexes for per-user hot paths
+
+Revision ID: 007_hot_path_indexes
+Revises: 006_repetition_data_unique
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_hot_path_indexes'
+down_revision: Union[str, None] = '006_repetition_data_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the earliest enrollment before adding the constraint
+    op.execute("""
+        DELETE FROM user_courses a
+        USING user_courses b
+        WHERE a.user_id = b.user_id
+          AND a.course_id = b.course_id
+          AND a.id > b.id
+    """)
+    op.create_unique_constraint(
+        'uq_user_courses_user_course', 'user_courses', ['user_id', 'course_id']
+    )
+
+    op.create_index('ix_user_progress_user_lesson', 'user_progress', ['user_id', 'lesson_id'])
+    op.create_index('ix_user_progress_user_course', 'user_progress', ['user_id', 'course_id'])
+
+    op.create_index(
+        'ix_repetition_data_user_due', 'repetition_data', ['user_id', 'next_review'],
+        postgresql_where=sa.text('needs_review = false')
+    )
+    op.create_index(
+        'ix_repetition_data_user_needs_review', 'repetition_data', ['user_id'],
+        postgresql_where=sa.text('needs_review = true')
+    )
+
+    op.create_index('ix_lessons_course_id_order', 'lessons', ['course_id', 'order'])
+    op.create_index('ix_blocks_lesson_id_order', 'blocks', ['lesson_id', 'order'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_blocks_lesson_id_order', table_name='blocks')
+    op.drop_index('ix_lessons_course_id_order', table_name='lessons')
+    op.drop_index('ix_repetition_data_user_needs_review', table_name='repetition_data')
+    op.drop_index('ix_repetition_data_user_due', table_name='repetition_data')
+    op.drop_index('ix_user_progress_user_course', table_name='user_progress')
+    op.drop_index('ix_user_progress_user_lesson', table_name='user_progress')
+    op.drop_constraint('uq_user_courses_user_course', 'user_courses', type_='unique')
@@ -0,0 +1,63 @@
+"""refresh-токены: хэши вместо токенов, семейства ротации, индексы очистки
+
+Revision ID: 009_refresh_token_hashes
+Revises: 008_user_token_version
+Create Date: 2026-10-18 12:00:00.000000
+
+Откат удаляет все refresh-токены: после upgrade в таблице хранится только
+SHA-256, исходный токен из него не восстановить, а колонка token обязательна
+и уникальна. Все пользователи будут разлогинены (access-токены действуют до
+истечения срока) и должны войти заново.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_refresh_token_hashes'
+down_revision: Union[str, None] = '008_user_token_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.LargeBinary(32), nullable=True))
+    op.add_column('refresh_tokens', sa.Column('family_id', sa.String(32), nullable=True))
+    op.add_column('refresh_tokens', sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Выданные токены продолжают работать: хэшируются на месте, каждый — своё семейство
+    op.execute("""
+        UPDATE refresh_tokens
+        SET token_hash = sha256(convert_to(token, 'UTF8')),
+            family_id = md5(id::text || random()::text),
+            revoked_at = CASE WHEN is_revoked THEN now() END
+    """)
+    op.alter_column('refresh_tokens', 'token_hash', nullable=False)
+    op.alter_column('refresh_tokens', 'family_id', nullable=False)
+
+    op.drop_index('ix_refresh_tokens_token', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token')
+
+    op.create_index('ix_refresh_tokens_token_hash', 'refresh_tokens', ['token_hash'], unique=True)
+    op.create_index('ix_refresh_tokens_family_id', 'refresh_tokens', ['family_id'])
+    op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'])
+    op.create_index(
+        'ix_refresh_tokens_revoked_at', 'refresh_tokens', ['revoked_at'],
+        postgresql_where=sa.text('revoked_at IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    # Токены не восстановить из хэшей: сохранённые сессии удаляются (см. docstring)
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_index('ix_refresh_tokens_revoked_at', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_family_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_token_hash', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'revoked_at')
+    op.drop_column('refresh_tokens', 'family_id')
+    op.drop_column('refresh_tokens', 'token_hash')
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(), nullable=False))
+    op.create_index('ix_refresh_tokens_token', 'refresh_tokens', ['token'], unique=True)
@@ -0,0 +1,61 @@
+"""materialized per-user due card queue
+
+Revision ID: 010_user_due_cards
+Revises: 009_refresh_token_hashes
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_user_due_cards'
+down_revision: Union[str, None] = '009_refresh_token_hashes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_due_cards',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('block_id', sa.String(), nullable=False),
+        sa.Column('priority', sa.SmallInteger(), nullable=False),
+        sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['block_id'], ['blocks.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'block_id', name='uq_user_due_cards_user_block')
+    )
+    op.create_index('ix_user_due_cards_queue', 'user_due_cards', ['user_id', 'priority', 'due_at'])
+
+    # Fill the queue from the existing schedule
+    op.execute("""
+        INSERT INTO user_due_cards (user_id, block_id, priority, due_at)
+        SELECT user_id, block_id,
+               CASE WHEN needs_review THEN 0 ELSE 1 END,
+               coalesce(next_review, now())
+        FROM repetition_data
+    """)
+
+    # Training candidates are read from the queue now; the partial indexes
+    # only slowed down every repetition_data write
+    op.drop_index('ix_repetition_data_user_needs_review', table_name='repetition_data')
+    op.drop_index('ix_repetition_data_user_due', table_name='repetition_data')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_repetition_data_user_due', 'repetition_data', ['user_id', 'next_review'],
+        postgresql_where=sa.text('needs_review = false')
+    )
+    op.create_index(
+        'ix_repetition_data_user_needs_review', 'repetition_data', ['user_id'],
+        postgresql_where=sa.text('needs_review = true')
+    )
+    op.drop_index('ix_user_due_cards_queue', table_name='user_due_cards')
+    op.drop_table('user_due_cards')
@@ -0,0 +1,32 @@
+"""pluggable schedulers: FSRS state and per-course/per-user selection
+
+Revision ID: 011_schedulers
+Revises: 010_user_due_cards
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_schedulers'
+down_revision: Union[str, None] = '010_user_due_cards'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('repetition_data', sa.Column('stability', sa.Float(), nullable=True))
+    op.add_column('repetition_data', sa.Column('difficulty', sa.Float(), nullable=True))
+    op.add_column('courses', sa.Column('scheduler', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('scheduler', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'scheduler')
+    op.drop_column('courses', 'scheduler')
+    op.drop_column('repetition_data', 'difficulty')
+    op.drop_column('repetition_data', 'stability')
@@ -0,0 +1,81 @@
+"""incremental user statistics counters
+
+Revision ID: 012_user_statistics_counters
+Revises: 011_schedulers
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_user_statistics_counters'
+down_revision: Union[str, None] = '011_schedulers'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('total_lessons', 'average_accuracy', 'days_learning', 'total_cards_reviewed')
+
+
+def upgrade() -> None:
+    op.add_column('user_statistics', sa.Column('answers_correct', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_statistics', sa.Column('answers_wrong', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_statistics', sa.Column('last_active_on', sa.Date(), nullable=True))
+
+    # Existing rows were filled with constants: rebuild everything from the source tables.
+    # Wrong answers are exact (mistakes is never reset); correct answers and active days
+    # are lower bounds, since repetition_data keeps only the latest review.
+    op.execute("DELETE FROM user_statistics")
+    op.execute("""
+        INSERT INTO user_statistics (
+            user_id, total_lessons, total_cards_reviewed, answers_correct, answers_wrong,
+            average_accuracy, days_learning, last_active_on
+        )
+        SELECT u.id,
+               coalesce(l.lessons, 0),
+               coalesce(c.cards, 0),
+               coalesce(c.correct, 0),
+               coalesce(c.wrong, 0),
+               coalesce(100.0 * c.correct / nullif(c.correct + c.wrong, 0), 0),
+               coalesce(d.days, 0),
+               d.last_day
+        FROM users u
+        LEFT JOIN (
+            SELECT p.user_id, count(*) AS lessons
+            FROM (SELECT user_id, lesson_id, count(*) AS done FROM user_progress GROUP BY user_id, lesson_id) p
+            JOIN (SELECT lesson_id, count(*) AS size FROM blocks GROUP BY lesson_id) b ON b.lesson_id = p.lesson_id
+            WHERE p.done >= b.size
+            GROUP BY p.user_id
+        ) l ON l.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id,
+                   count(*) AS cards,
+                   count(*) FILTER (WHERE NOT coalesce(needs_review, false)) AS correct,
+                   sum(coalesce(mistakes, 0)) AS wrong
+            FROM repetition_data
+            GROUP BY user_id
+        ) c ON c.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, count(DISTINCT day) AS days, max(day) AS last_day
+            FROM (
+                SELECT user_id, completed_at::date AS day FROM user_progress
+                UNION ALL
+                SELECT user_id, last_review::date FROM repetition_data WHERE last_review IS NOT NULL
+            ) activity
+            GROUP BY user_id
+        ) d ON d.user_id = u.id
+    """)
+
+    for column in COUNTERS:
+        op.alter_column('user_statistics', column, server_default='0', nullable=False)
+
+
+def downgrade() -> None:
+    for column in COUNTERS:
+        op.alter_column('user_statistics', column, server_default=None, nullable=True)
+    op.drop_column('user_statistics', 'last_active_on')
+    op.drop_column('user_statistics', 'answers_wrong')
+    op.drop_column('user_statistics', 'answers_correct')
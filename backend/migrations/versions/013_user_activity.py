@@ -0,0 +1,80 @@
+"""daily activity bitmap
+
+Revision ID: 013_user_activity
+Revises: 012_user_statistics_counters
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013_user_activity'
+down_revision: Union[str, None] = '012_user_statistics_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_activity',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('first_day', sa.Date(), nullable=False),
+        sa.Column('last_day', sa.Date(), nullable=False),
+        sa.Column('active_bits', postgresql.BIT(varying=True), nullable=False),
+        sa.Column('goal_bits', postgresql.BIT(varying=True), nullable=False),
+        sa.Column('today_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Rebuild activity days from completions and latest reviews (goal history is unknown)
+    op.execute("""
+        WITH days AS (
+            SELECT user_id, completed_at::date AS day FROM user_progress
+            UNION
+            SELECT user_id, last_review::date FROM repetition_data WHERE last_review IS NOT NULL
+        ), bounds AS (
+            SELECT user_id, min(day) AS first_day, max(day) AS last_day FROM days GROUP BY user_id
+        )
+        INSERT INTO user_activity (user_id, first_day, last_day, active_bits, goal_bits, today_count)
+        SELECT b.user_id, b.first_day, b.last_day,
+               (
+                   SELECT string_agg(CASE WHEN d.day IS NULL THEN '0' ELSE '1' END, '' ORDER BY s.day)
+                   FROM generate_series(b.first_day, b.last_day, interval '1 day') AS s(day)
+                   LEFT JOIN days d ON d.user_id = b.user_id AND d.day = s.day::date
+               )::varbit,
+               repeat('0', b.last_day - b.first_day + 1)::varbit,
+               0
+        FROM bounds b
+    """)
+
+    # users.streak / completed_today become projections of the log
+    op.execute("""
+        UPDATE users u
+        SET streak = CASE
+                WHEN a.last_day >= current_date - 1
+                THEN length(a.active_bits::text) - length(rtrim(a.active_bits::text, '1'))
+                ELSE 0
+            END,
+            completed_today = 0
+        FROM user_activity a
+        WHERE a.user_id = u.id
+    """)
+    op.execute("""
+        UPDATE users SET streak = 0, completed_today = 0
+        WHERE id NOT IN (SELECT user_id FROM user_activity)
+    """)
+    op.execute("""
+        UPDATE user_achievement_counters c SET streak = coalesce(u.streak, 0)
+        FROM users u
+        WHERE u.id = c.user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_activity')
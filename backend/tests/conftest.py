@@ -0,0 +1,31 @@
+"""
+Общие фикстуры. db — сессия PostgreSQL из TEST_DATABASE_URL: таблицы
+создаются через create_all, всё, что сделал тест, откатывается. Без
+переменной тесты с этой фикстурой пропускаются.
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+
+
+@pytest.fixture
+def db():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
@@ -0,0 +1,55 @@
+"""
+ETag ответов кэша каталога: у несжатого и у каждого сжатого представления
+свой сильный валидатор, If-None-Match принимает тег любого из них.
+"""
+import pytest
+from starlette.requests import Request
+
+from app.config import settings
+from app.services.catalog_cache import CompiledPayload, payload_response
+from app.utils.compression import SUPPORTED_ENCODINGS, representation_etag
+
+PAYLOAD = CompiledPayload.from_body(b'{"title": "' + b"x" * (settings.COMPRESSION_MIN_SIZE * 2) + b'"}')
+
+
+def _request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture(autouse=True)
+def compression_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_ENABLED", True)
+
+
+@pytest.mark.parametrize("encoding", SUPPORTED_ENCODINGS)
+def test_compressed_representation_has_strong_etag(encoding):
+    response = payload_response(_request(accept_encoding=encoding), PAYLOAD)
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["etag"] == f'{PAYLOAD.etag[:-1]}-{encoding}"'
+    assert not response.headers["etag"].startswith("W/")
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_identity_representation_keeps_content_etag():
+    response = payload_response(_request(), PAYLOAD)
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == PAYLOAD.etag
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+@pytest.mark.parametrize("cached", [None, *SUPPORTED_ENCODINGS])
+def test_if_none_match_accepts_any_representation(cached):
+    tag = representation_etag(PAYLOAD.etag, cached)
+    response = payload_response(_request(accept_encoding="gzip", if_none_match=f'"other", {tag}'), PAYLOAD)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == representation_etag(PAYLOAD.etag, "gzip")
+
+
+def test_if_none_match_rejects_other_content():
+    response = payload_response(_request(if_none_match='"other-gzip"'), PAYLOAD)
+
+    assert response.status_code == 200
@@ -0,0 +1,28 @@
+"""
+Горячие запросы сервисов (очередь повторений, поиск карточки, прогресс по
+урокам и курсам, достижения, уроки и блоки) используют индексы из миграций
+007 и 010: EXPLAIN каждого выражения должен содержать ожидаемый индекс.
+
+Последовательное сканирование отключается (enable_seqscan = off), чтобы
+план не зависел от объёма данных в пустых тестовых таблицах. Идёт против
+PostgreSQL из TEST_DATABASE_URL и пропускается без неё.
+"""
+import pytest
+from sqlalchemy import text
+
+from benchmarks.explain_indexes import explain_indexes, hot_queries
+
+USER_ID = 1
+BLOCK_ID = "explain-lesson-block-1"
+LESSON_ID = "explain-lesson"
+
+
+@pytest.mark.parametrize(
+    "name", [name for name, _, _ in hot_queries(USER_ID, BLOCK_ID, LESSON_ID)]
+)
+def test_hot_query_uses_expected_index(db, name):
+    queries = {name: (stmt, expected) for name, stmt, expected in hot_queries(USER_ID, BLOCK_ID, LESSON_ID)}
+    stmt, expected = queries[name]
+
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    assert expected in explain_indexes(db, stmt)
@@ -0,0 +1,57 @@
+"""
+Алгоритмы планирования: last_review из колонки timestamptz приходит aware,
+а момент ответа (datetime.utcnow()) — naive. review и review_batch должны
+давать одинаковый результат для обоих соглашений.
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.utils.schedulers import CardState, FSRSScheduler, SM2Scheduler
+
+NOW = datetime(2026, 10, 18, 12, 0)
+LAST_REVIEW = NOW - timedelta(days=7)
+SCHEDULERS = [FSRSScheduler(), SM2Scheduler()]
+
+
+def _state(last_review):
+    return CardState(last_review=last_review, interval=7, ease_factor=2.5, stability=7.0, difficulty=5.0)
+
+
+def _schedule(state: CardState):
+    return state.next_review, state.interval, state.stability, state.difficulty
+
+
+@pytest.mark.parametrize("scheduler", SCHEDULERS, ids=lambda scheduler: scheduler.name)
+@pytest.mark.parametrize("is_correct", [True, False])
+@pytest.mark.parametrize("tz", [timezone.utc, timezone(timedelta(hours=3))], ids=["utc", "utc+3"])
+def test_review_accepts_aware_last_review(scheduler, is_correct, tz):
+    aware = LAST_REVIEW.replace(tzinfo=timezone.utc).astimezone(tz)
+
+    expected = scheduler.review(_state(LAST_REVIEW), is_correct, NOW)
+    actual = scheduler.review(_state(aware), is_correct, NOW)
+
+    assert _schedule(actual) == _schedule(expected)
+
+
+@pytest.mark.parametrize("scheduler", SCHEDULERS, ids=lambda scheduler: scheduler.name)
+def test_review_batch_accepts_aware_last_review(scheduler):
+    def columns(last_review):
+        return {
+            "last_review": last_review,
+            "interval": np.array([7, 7]),
+            "ease_factor": np.array([2.5, np.nan]),
+            "stability": np.array([7.0, np.nan]),
+            "difficulty": np.array([5.0, np.nan]),
+        }
+
+    naive = np.array([LAST_REVIEW, "NaT"], dtype="datetime64[us]")
+    aware = np.array([LAST_REVIEW.replace(tzinfo=timezone.utc), None], dtype=object)
+    is_correct = np.array([True, False])
+
+    expected = scheduler.review_batch(columns(naive), is_correct, NOW)
+    actual = scheduler.review_batch(columns(aware), is_correct, NOW.replace(tzinfo=timezone.utc))
+
+    for name in ("next_review", "interval"):
+        np.testing.assert_array_equal(actual[name], expected[name])
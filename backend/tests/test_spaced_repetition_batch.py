@@ -0,0 +1,83 @@
+"""
+calculate_next_review_batch против скалярной calculate_next_review: на
+случайных входных данных и на краевых случаях результат должен совпадать
+побитово (next_review, interval, ease_factor).
+
+Оценка ответа генерируется по шкале SM-2 (0..5): quality < 3 — ошибка.
+"""
+from datetime import datetime, timedelta
+from itertools import product
+
+import numpy as np
+import pytest
+
+from app.utils.spaced_repetition import REVIEW_INTERVALS, calculate_next_review
+from app.utils.spaced_repetition_batch import calculate_next_review_batch, snap_intervals
+
+BASE = datetime(2026, 1, 1)
+
+
+def _scalar(last_review, interval, ease_factor, is_correct, now):
+    return calculate_next_review(
+        None if np.isnat(last_review) else last_review.item(),
+        None,
+        int(interval),
+        None if np.isnan(ease_factor) else float(ease_factor),
+        bool(is_correct),
+        now=now.item()
+    )
+
+
+def _assert_matches_scalar(last_review, interval, ease_factor, is_correct, now):
+    batch_next, batch_interval, batch_ease = calculate_next_review_batch(
+        last_review, interval, ease_factor, is_correct, now
+    )
+    for i in range(len(interval)):
+        expected = _scalar(last_review[i], interval[i], ease_factor[i], is_correct[i], now[i])
+        actual = (batch_next[i].item(), int(batch_interval[i]), float(batch_ease[i]))
+        assert actual == expected, (
+            f"last_review={last_review[i]}, interval={interval[i]}, "
+            f"ease_factor={ease_factor[i]}, is_correct={is_correct[i]}"
+        )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_on_random_inputs(seed):
+    rng = np.random.default_rng(seed)
+    samples = 20_000
+    quality = rng.integers(0, 6, samples)
+    interval = np.where(rng.random(samples) < 0.2, rng.integers(0, 2, samples), rng.integers(0, 120, samples))
+    # None (NaN) и 0 заменяются коэффициентом по умолчанию
+    ease_factor = np.round(rng.uniform(1.0, 3.0, samples), 2)
+    ease_factor[rng.random(samples) < 0.05] = np.nan
+    ease_factor[rng.random(samples) < 0.02] = 0.0
+    last_review = np.where(
+        rng.random(samples) < 0.1,
+        np.datetime64("NaT"),
+        np.datetime64(BASE) - rng.integers(0, 400 * 86400, samples).astype("timedelta64[s]")
+    ).astype("datetime64[us]")
+    now = (np.datetime64(BASE) + rng.integers(0, 86400 * 1_000_000, samples).astype("timedelta64[us]"))
+
+    _assert_matches_scalar(last_review, interval, ease_factor, quality >= 3, now)
+
+
+def test_batch_matches_scalar_on_edge_cases():
+    intervals = (0, 1, 2, 3, 4, 5, 6, 7, 8, 11, 12, 16, 25, 26, 35, 36, 100)
+    ease_factors = (np.nan, 0.0, 1.3, 1.4, 2.0, 2.5, 2.8)
+    last_reviews = (np.datetime64("NaT"), np.datetime64(BASE - timedelta(days=3)))
+    cases = list(product(last_reviews, intervals, ease_factors, (True, False)))
+
+    last_review, interval, ease_factor, is_correct = (np.array(column) for column in zip(*cases))
+    now = np.full(len(cases), np.datetime64(BASE), dtype="datetime64[us]")
+
+    _assert_matches_scalar(
+        last_review.astype("datetime64[us]"), interval.astype(np.int64), ease_factor.astype(np.float64),
+        is_correct.astype(bool), now
+    )
+
+
+def test_snap_intervals_matches_scalar_grid():
+    # Равноудалённые значения (4, 25) уходят к меньшему интервалу, как min()
+    values = np.arange(0, 200)
+    expected = [min(REVIEW_INTERVALS, key=lambda x: abs(x - value)) for value in values.tolist()]
+    assert snap_intervals(values).tolist() == expected
@@ -1,6 +1,6 @@
 import { resilientGet, resilientPost, handleApiError } from './api'
 import { cache } from '@/utils/cache'
-import type { Course } from '@/types'
+import type { Course, CourseSummary } from '@/types'
 
 export interface CourseResponse extends Omit<Course, 'category'> {
   category?: {
@@ -12,6 +12,11 @@ export interface CourseResponse extends Omit<Course, 'category'> {
   last_updated?: string
 }
 
+export interface CourseSummaryResponse extends Omit<CourseSummary, 'category'> {
+  category_id: string
+  category?: CourseResponse['category']
+}
+
 export interface CourseEnrollResponse {
   message: string
   course_id: string
@@ -24,18 +29,18 @@ export interface LessonListItem {
   description: string
 }
 
-export const getCourses = async (categoryId?: string): Promise<CourseResponse[]> => {
+export const getCourses = async (categoryId?: string): Promise<CourseSummaryResponse[]> => {
   const cacheKey = `courses_${categoryId || 'all'}`
 
   try {
     const params = categoryId ? { category_id: categoryId } : {}
-    const response = await resilientGet<CourseResponse[]>('/courses', { params })
+    const response = await resilientGet<CourseSummaryResponse[]>('/courses', { params })
 
     cache.set(cacheKey, response.data, 300000)
 
     return response.data
   } catch (error) {
-    const cached = cache.get<CourseResponse[]>(cacheKey)
+    const cached = cache.get<CourseSummaryResponse[]>(cacheKey)
     if (cached) {
       console.warn('Using cached data due to API error')
       return cached
@@ -1,12 +1,12 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import type { Course, Lesson } from '@/types'
+import type { CourseSummary, Lesson } from '@/types'
 import type { UserProgressResponse } from '@/services/progressService'
 import type { LessonListItem } from '@/services/coursesService'
 
 export const useCoursesStore = defineStore('courses', () => {
-  const activeCourse = ref<Course | null>(null)
-  const availableCourses = ref<Course[]>([])
+  const activeCourse = ref<CourseSummary | null>(null)
+  const availableCourses = ref<CourseSummary[]>([])
   const enrolledCourses = ref<string[]>([])
   const completedLessons = ref<string[]>([])
   const currentLesson = ref<Lesson | null>(null)
@@ -26,6 +26,20 @@ export interface Course {
   promo_video_url?: string
 }
 
+// Курс в списке каталога (GET /courses): без тяжёлых полей описания
+export type CourseSummary = Pick<
+  Course,
+  | 'course_id'
+  | 'title'
+  | 'category'
+  | 'level'
+  | 'estimated_duration_hours'
+  | 'total_lessons'
+  | 'total_practice_tasks'
+  | 'short_description'
+  | 'cover_image_url'
+>
+
 export interface Lesson {
   id: string
   course_id: string